@@ -1,8 +1,13 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Coroutine
+
 from iotech.microservice import MicroService
 from iotech.microservice.web import WebService
 
 from . import views
-from .engine import SearchEngine
+from .engine import SearchEngine, configs, scraping
 
 import logging
 LOGGER = logging.getLogger(__name__)
@@ -20,7 +25,39 @@ class Controller(WebService, MicroService):
         MicroService.__init__(self)
         WebService.__init__(self, views, **kwargs)
         self._engine = SearchEngine(self.app)
+        # The background jobs run on their own threads: the default executor serves the interactive requests
+        self._background = ThreadPoolExecutor(
+            max_workers=configs.ENGINE_BACKGROUND_WORKERS.get(), thread_name_prefix='background')
 
     @property
     def engine(self) -> SearchEngine:
         return self._engine
+
+    def _in_background(self, func: Callable) -> Callable[[], Coroutine]:
+        """ Wrap a job to run on the background threads. """
+        @functools.wraps(func)
+        async def _run():
+            return await asyncio.get_running_loop().run_in_executor(self._background, func)
+        return _run
+
+    def on_start(self):
+        # Warm up the connectors' sites in the background
+        self.add_job(self._in_background(self._engine.warm_up))
+        # Follow the sites moving between their mirrors
+        self.add_job(self._in_background(self._engine.probe_mirrors), 'interval',
+                     seconds=configs.ENGINE_MIRRORS_PROBE_INTERVAL.get())
+        # Keep the resolved media URLs in use valid
+        self.add_job(self._engine.revalidate_resolved, 'interval', kwargs=dict(executor=self._background),
+                     seconds=configs.ENGINE_RESOLVED_REVALIDATE_INTERVAL.get())
+        # Keep the most popular searches warm in the results cache
+        self.add_job(self._in_background(self._engine.prewarm), 'interval',
+                     seconds=configs.ENGINE_PREWARM_INTERVAL.get())
+        # Sync the local catalog at start and periodically
+        if self._engine.has_catalog:
+            self.add_job(self._in_background(self._engine.sync_catalog))
+            self.add_job(self._in_background(self._engine.sync_catalog), 'interval',
+                         seconds=configs.ENGINE_CATALOG_SYNC_INTERVAL.get())
+
+    def on_stop(self):
+        self._background.shutdown(wait=False, cancel_futures=True)
+        scraping.parsing.shutdown()
@@ -0,0 +1,71 @@
+import contextlib
+import contextvars
+import math
+import threading
+from typing import Iterator, Optional
+
+from . import configs
+
+_current: contextvars.ContextVar = contextvars.ContextVar('budget', default=None)
+
+
+class SearchBudget:
+    """ Budget of a connector search, shared by its scraping workers: main results, fetches and retry backoff. """
+
+    def __init__(self, max_main: int = None, max_fetches: int = None, max_backoff: float = None):
+        self._max_main: float = max_main if max_main is not None else math.inf
+        self._max_fetches: float = max_fetches if max_fetches is not None else math.inf
+        self._max_backoff: float = max_backoff if max_backoff is not None else math.inf
+        self._main: int = 0
+        self._fetches: int = 0
+        self._backoff: float = 0.
+        self._lock = threading.Lock()
+
+    @classmethod
+    def default(cls):
+        return cls(configs.ENGINE_BUDGET_MAX_MAIN.get(), configs.ENGINE_BUDGET_MAX_FETCHES.get(),
+                   configs.ENGINE_BUDGET_MAX_BACKOFF.get())
+
+    @staticmethod
+    def current() -> Optional['SearchBudget']:
+        """ Budget of the search sending the current requests, if any. """
+        return _current.get()
+
+    @contextlib.contextmanager
+    def applied(self) -> Iterator:
+        """ Bound the retry backoff of the requests sent within the block (see take_backoff). """
+        token = _current.set(self)
+        try:
+            yield
+        finally:
+            _current.reset(token)
+
+    @property
+    def is_met(self) -> bool:
+        """ Check if the search already collected the maximum number of main results. """
+        return self._main >= self._max_main
+
+    @property
+    def is_exhausted(self) -> bool:
+        """ Check if no more fetches should be scheduled. """
+        return self.is_met or self._fetches >= self._max_fetches
+
+    def take_fetch(self) -> bool:
+        """ Take an outbound fetch from the budget, if still available. """
+        with self._lock:
+            if self.is_exhausted:
+                return False
+            self._fetches += 1
+            return True
+
+    def take_backoff(self, delay: float) -> bool:
+        """ Take the backoff before a retry from the budget, if still available. """
+        with self._lock:
+            if self._backoff + delay > self._max_backoff:
+                return False
+            self._backoff += delay
+            return True
+
+    def add_main(self, count: int = 1):
+        with self._lock:
+            self._main += count
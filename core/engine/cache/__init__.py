@@ -1 +1,5 @@
 from .manager import Cache
+from .results import ResultCache
+from .http import HttpCache
+from .contexts import ContextStore
+from .resolved import ResolvedCache
@@ -0,0 +1,43 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from iotech.utils.classes import Singleton
+
+from .. import configs
+
+
+@Singleton
+class ContextStore:
+    """ Short-lived in-memory store of the contexts handed by the results to the searches they link to. """
+
+    def __init__(self):
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, context: dict) -> str:
+        """ Store a context, and return its handle. """
+        handle = secrets.token_urlsafe(12)
+        with self._lock:
+            self._entries[handle] = (time.time() + configs.ENGINE_CONTEXT_TTL.get(), context)
+            while len(self._entries) > configs.ENGINE_CONTEXT_MAX_ENTRIES.get():
+                self._entries.popitem(last=False)
+        return handle
+
+    def get(self, handle: Optional[str]) -> Optional[dict]:
+        """ Get a non-expired context, None if unknown or expired. """
+        if not handle:
+            return
+        with self._lock:
+            entry = self._entries.get(handle)
+            if not entry:
+                return
+            expires_at, context = entry
+            if expires_at <= time.time():
+                del self._entries[handle]
+                return
+            # The contexts in use are evicted last
+            self._entries.move_to_end(handle)
+            return context
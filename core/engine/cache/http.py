@@ -0,0 +1,276 @@
+import contextlib
+import email.utils
+import hashlib
+import json
+import mmap
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from iotech.utils.classes import Singleton
+
+from .. import configs
+
+import logging
+LOGGER = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    body_hash TEXT NOT NULL,
+    status INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+CREATE INDEX IF NOT EXISTS responses_body_hash ON responses (body_hash);
+CREATE TABLE IF NOT EXISTS bodies (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL
+);
+-- Running total of the bodies' size, kept by the triggers (initialized from the bodies of an older index)
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    size INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO usage (id, size) SELECT 0, COALESCE(SUM(size), 0) FROM bodies;
+CREATE TRIGGER IF NOT EXISTS bodies_inserted AFTER INSERT ON bodies
+BEGIN
+    UPDATE usage SET size = size + NEW.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS bodies_deleted AFTER DELETE ON bodies
+BEGIN
+    UPDATE usage SET size = size - OLD.size WHERE id = 0;
+END;
+"""
+
+# Least recently used responses evicted per query
+_EVICTION_BATCH = 64
+# Seconds between the updates of the access time of a response, so that most lookups only read
+_ACCESS_GRANULARITY = 60
+
+_directive_pattern = re.compile(r"([\w-]+)(?:=\"?([^\",]*)\"?)?")
+
+# Heuristic freshness from Last-Modified: a fraction of the age of the page, bounded (RFC 9111, 4.2.2)
+_HEURISTIC_FRACTION = 0.1
+_HEURISTIC_MAX_TTL = 24 * 3600
+
+
+def _parse_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return
+
+
+def freshness(headers) -> Optional[float]:
+    """
+    Seconds a response stays fresh according to its headers (Cache-Control, Expires, Last-Modified).
+    :return: The freshness lifetime, or None if the response must not be stored.
+    """
+    directives = {k.lower(): v for k, v in _directive_pattern.findall(headers.get('Cache-Control', ''))}
+    if 'no-store' in directives:
+        return
+    age = int(headers['Age']) if headers.get('Age', '').isdigit() else 0
+    if 'no-cache' in directives:
+        return 0.
+    if directives.get('max-age', '').isdigit():
+        return max(int(directives['max-age']) - age, 0.)
+    date = _parse_date(headers.get('Date')) or time.time()
+    expires = _parse_date(headers.get('Expires'))
+    if 'Expires' in headers:
+        return max((expires or 0) - date - age, 0.)
+    last_modified = _parse_date(headers.get('Last-Modified'))
+    if last_modified:
+        return min(max(date - last_modified, 0.) * _HEURISTIC_FRACTION, _HEURISTIC_MAX_TTL)
+    return 0.
+
+
+class CachedResponse:
+    """ Response stored in the HTTP cache. """
+    __slots__ = ('key', 'body_hash', 'status', 'headers', 'expires_at')
+
+    def __init__(self, key: str, body_hash: str, status: int, headers: Dict[str, str], expires_at: float):
+        self.key: str = key
+        self.body_hash: str = body_hash
+        self.status: int = status
+        self.headers: CaseInsensitiveDict = CaseInsensitiveDict(headers)
+        self.expires_at: float = expires_at
+
+    @property
+    def is_fresh(self) -> bool:
+        return self.expires_at > time.time()
+
+    @property
+    def validators(self) -> Dict[str, str]:
+        """ Headers of a conditional request revalidating the response. """
+        validators = dict()
+        if self.headers.get('ETag'):
+            validators['If-None-Match'] = self.headers['ETag']
+        if self.headers.get('Last-Modified'):
+            validators['If-Modified-Since'] = self.headers['Last-Modified']
+        return validators
+
+
+@Singleton
+class HttpCache:
+    """
+    On-disk cache of the fetched pages. Bodies are stored compressed and addressed by their content hash,
+    so identical pages share their file; the least recently used responses are evicted to keep the bodies
+    within the disk budget (http_cache_size).
+    """
+
+    def __init__(self):
+        self._dir: str = os.path.join(configs.ENGINE_CACHE_DIR.get(), 'http')
+        os.makedirs(self._dir, exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(os.path.join(self._dir, 'index.db'), timeout=30)
+        connection.execute('PRAGMA journal_mode=WAL')
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def make_key(url: str, params=None) -> str:
+        return requests.Request('GET', url, params=params).prepare().url
+
+    def _body_path(self, body_hash: str) -> str:
+        return os.path.join(self._dir, body_hash[:2], f"{body_hash}.z")
+
+    def lookup(self, key: str) -> Optional[CachedResponse]:
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT body_hash, status, headers, expires_at, accessed_at FROM responses WHERE key=?",
+                (key,)).fetchone()
+            if not row:
+                return
+            now = time.time()
+            if now - row[4] > _ACCESS_GRANULARITY:
+                connection.execute("UPDATE responses SET accessed_at=? WHERE key=?", (now, key))
+        return CachedResponse(key, row[0], row[1], json.loads(row[2]), row[3])
+
+    def read(self, entry: CachedResponse) -> Optional[bytes]:
+        """ Read the body of a cached response; large bodies are memory-mapped instead of copied. """
+        try:
+            with open(self._body_path(entry.body_hash), 'rb') as file:
+                if os.fstat(file.fileno()).st_size >= configs.ENGINE_HTTP_CACHE_MMAP_SIZE.get():
+                    with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                        return zlib.decompress(mapped)
+                return zlib.decompress(file.read())
+        except (OSError, zlib.error) as e:
+            LOGGER.warning(f"Unreadable cached body of {entry.key}: {e}")
+
+    def to_response(self, entry: CachedResponse) -> Optional[requests.Response]:
+        body = self.read(entry)
+        if body is None:
+            return
+        response = requests.Response()
+        response.status_code = entry.status
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response.url = entry.key
+        response.reason = 'OK'
+        # noinspection PyProtectedMember
+        response._content = body
+        return response
+
+    def store(self, key: str, response: requests.Response, min_ttl: int = 0):
+        """
+        Store a response, if cacheable.
+        :param key: Key of the request.
+        :param response: The response, with its body already read.
+        :param min_ttl: (optional) Minimum freshness of the response, overriding the server's one.
+        """
+        if response.status_code != 200:
+            return
+        ttl = freshness(response.headers)
+        if ttl is None:
+            return
+        ttl = max(ttl, min_ttl or 0)
+        # The body is stored decoded
+        headers = CaseInsensitiveDict(response.headers)
+        for name in ('Content-Encoding', 'Content-Length'):
+            headers.pop(name, None)
+        if not ttl and 'ETag' not in headers and 'Last-Modified' not in headers:
+            return
+        body_hash = hashlib.sha256(response.content).hexdigest()
+        compressed = None if os.path.exists(self._body_path(body_hash)) else zlib.compress(response.content)
+        now = time.time()
+        with self._connect() as connection:
+            # Under the write lock, so that no eviction removes the body between its check and the row referring it
+            connection.execute("BEGIN IMMEDIATE")
+            size = self._write_body(body_hash, response.content, compressed)
+            connection.execute("INSERT OR IGNORE INTO bodies (hash, size) VALUES (?, ?)", (body_hash, size))
+            connection.execute(
+                "INSERT OR REPLACE INTO responses (key, body_hash, status, headers, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, body_hash, response.status_code, json.dumps(dict(headers)), now + ttl, now))
+        self._evict()
+
+    def revalidated(self, entry: CachedResponse, response: requests.Response, min_ttl: int = 0):
+        """ Refresh a cached response after a 304 Not Modified, merging the updated headers. """
+        entry.headers.update(response.headers)
+        entry.headers.pop('Content-Length', None)
+        ttl = max(freshness(entry.headers) or 0, min_ttl or 0)
+        entry.expires_at = time.time() + ttl
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE responses SET headers=?, expires_at=?, accessed_at=? WHERE key=?",
+                (json.dumps(dict(entry.headers)), entry.expires_at, time.time(), entry.key))
+
+    def _write_body(self, body_hash: str, body: bytes, compressed: bytes = None) -> int:
+        """ Write a compressed body, unless already stored; return its size on disk. """
+        path = self._body_path(body_hash)
+        if os.path.exists(path):
+            return os.path.getsize(path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        compressed = compressed or zlib.compress(body)
+        with open(temp_path, 'wb') as file:
+            file.write(compressed)
+        os.replace(temp_path, path)
+        return len(compressed)
+
+    def _usage(self, connection: sqlite3.Connection) -> int:
+        return connection.execute("SELECT size FROM usage WHERE id=0").fetchone()[0]
+
+    def _evict(self):
+        budget = configs.ENGINE_HTTP_CACHE_SIZE.get()
+        with self._connect() as connection:
+            if self._usage(connection) <= budget:
+                return
+            # The bodies are removed under the write lock too (see store)
+            connection.execute("BEGIN IMMEDIATE")
+            total = self._usage(connection)
+            # Drop the least recently used responses, a batch at a time along the accessed_at index, and their
+            # bodies once no other response refers to them
+            while total > budget:
+                rows = connection.execute("SELECT key, body_hash FROM responses ORDER BY accessed_at LIMIT ?",
+                                          (_EVICTION_BATCH,)).fetchall()
+                if not rows:
+                    break
+                for key, body_hash in rows:
+                    connection.execute("DELETE FROM responses WHERE key=?", (key,))
+                    if connection.execute("SELECT 1 FROM responses WHERE body_hash=?", (body_hash,)).fetchone():
+                        continue
+                    connection.execute("DELETE FROM bodies WHERE hash=?", (body_hash,))
+                    with contextlib.suppress(OSError):
+                        os.remove(self._body_path(body_hash))
+                    total = self._usage(connection)
+                    if total <= budget:
+                        break
+        LOGGER.debug(f"HTTP cache evicted down to {total} bytes")
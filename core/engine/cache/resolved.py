@@ -0,0 +1,185 @@
+import contextlib
+import datetime
+import hashlib
+import os
+import re
+import sqlite3
+import time
+import urllib.parse
+from typing import List, Optional, Tuple
+
+from iotech.utils.classes import Singleton
+
+from .. import configs
+from ..security import encrypt_dict, decrypt_dict
+
+import logging
+LOGGER = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS resolved (
+    key TEXT PRIMARY KEY,
+    uid TEXT NOT NULL,
+    arguments TEXT NOT NULL,
+    value TEXT NOT NULL,
+    url TEXT,
+    host TEXT NOT NULL,
+    signed INTEGER NOT NULL,
+    resolved_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS resolved_expires_at ON resolved (expires_at);
+CREATE TABLE IF NOT EXISTS lifetimes (
+    host TEXT PRIMARY KEY,
+    lifetime REAL NOT NULL
+);
+"""
+
+# Expiry timestamps of the signed URLs (seconds or milliseconds), in their query or path tokens (e.g. hdnts)
+_expiry_pattern = re.compile(r"(?:^|[?&;~/=])(?:expires?|expiry|exp|e|validto)=(\d{13}|\d{10})(?:$|[&;~/])",
+                             re.IGNORECASE)
+
+
+def parse_expiry(url: str) -> Optional[float]:
+    """ Expiry of a signed URL, as a timestamp, if it states one. """
+    query = {k.lower(): v for k, v in urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query)}
+    if query.get('x-amz-expires', '').isdigit():
+        try:
+            signed_at = datetime.datetime.strptime(query.get('x-amz-date', ''), '%Y%m%dT%H%M%SZ')
+            return signed_at.replace(tzinfo=datetime.timezone.utc).timestamp() + int(query['x-amz-expires'])
+        except ValueError:
+            pass
+    match = _expiry_pattern.search(urllib.parse.unquote(url))
+    if match:
+        value = int(match[1])
+        return value / 1000 if len(match[1]) == 13 else float(value)
+
+
+class ResolvedEntry:
+    """ Resolved media of the cache, with the arguments to resolve it again (the last ones which resolved it). """
+    __slots__ = ('key', 'uid', 'arguments', 'value', 'url', 'host', 'signed', 'resolved_at', 'expires_at')
+
+    def __init__(self, key: str, uid: str, arguments: dict, value: dict, url: Optional[str], host: str,
+                 signed: bool, resolved_at: float, expires_at: float):
+        self.key: str = key
+        self.uid: str = uid
+        self.arguments: dict = arguments
+        self.value: dict = value
+        self.url: Optional[str] = url
+        self.host: str = host
+        self.signed: bool = signed
+        self.resolved_at: float = resolved_at
+        self.expires_at: float = expires_at
+
+
+@Singleton
+class ResolvedCache:
+    """
+    On-disk cache of the results of the deferred executions (e.g. the resolved media file URLs), by connector and
+    arguments identifying the media (see SearchConnector.deferred_key), valid until the expiry of their URL: stated
+    by the URL if signed (see parse_expiry), else the lifetime learned for its host from the revalidations
+    (starting from resolved_ttl). Entries are never served within resolved_margin of their
+    expiry, so that a player has the time to start.
+    """
+
+    def __init__(self):
+        os.makedirs(configs.ENGINE_CACHE_DIR.get(), exist_ok=True)
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+
+    @contextlib.contextmanager
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(os.path.join(configs.ENGINE_CACHE_DIR.get(), 'resolved.db'), timeout=30)
+        connection.execute('PRAGMA journal_mode=WAL')
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def make_key(uid: str, key_arguments: dict) -> str:
+        unique_str = ''.join(["'%s':'%s';" % (key, val) for (key, val) in sorted(key_arguments.items())])
+        return hashlib.sha1(f"{uid};{unique_str}".encode()).hexdigest()
+
+    def lifetime(self, host: str) -> float:
+        """ Lifetime of the URLs of a host, learned from the revalidations. """
+        with self._connect() as connection:
+            row = connection.execute("SELECT lifetime FROM lifetimes WHERE host=?", (host,)).fetchone()
+        return row[0] if row else float(configs.ENGINE_RESOLVED_TTL.get())
+
+    def learn(self, host: str, age: float, valid: bool):
+        """
+        Learn the lifetime of the URLs of a host from a revalidation.
+        :param host: Host of the URL.
+        :param age: Seconds since the URL was resolved.
+        :param valid: Whether the URL was still valid.
+        """
+        lifetime = self.lifetime(host)
+        # A valid URL lives at least its age, an invalid one less
+        lifetime = max(lifetime, age) if valid else min(lifetime, age)
+        with self._connect() as connection:
+            connection.execute("INSERT OR REPLACE INTO lifetimes (host, lifetime) VALUES (?, ?)", (host, lifetime))
+
+    def get_many(self, uid: str, key_arguments_list: List[dict]) -> List[Optional[dict]]:
+        """ Get the valid values of several entries in one query, in the order of their identifying arguments. """
+        keys = [self.make_key(uid, key_arguments) for key_arguments in key_arguments_list]
+        now = time.time()
+        with self._connect() as connection:
+            rows = connection.execute(
+                f"SELECT key, value FROM resolved WHERE key IN ({','.join('?' * len(keys))}) AND expires_at>?",
+                (*keys, now + configs.ENGINE_RESOLVED_MARGIN.get())).fetchall()
+            connection.executemany("UPDATE resolved SET accessed_at=? WHERE key=?", [(now, row[0]) for row in rows])
+        values = {key: decrypt_dict(value) for key, value in rows}
+        return [values.get(key) for key in keys]
+
+    def get(self, uid: str, key_arguments: dict) -> Optional[dict]:
+        return self.get_many(uid, [key_arguments])[0]
+
+    def set_many(self, uid: str, items: List[Tuple[dict, dict, dict, Optional[str]]]):
+        """
+        Set several entries in one transaction.
+        :param uid: Uid of the connector resolving them.
+        :param items: The identifying arguments, the arguments to resolve it again, the value and the media URL
+        (if any) of the entries.
+        """
+        if not items:
+            return
+        now = time.time()
+        rows = list()
+        for key_arguments, arguments, value, url in items:
+            host = (urllib.parse.urlsplit(url).hostname or '') if url else ''
+            expires_at = parse_expiry(url) if url else None
+            signed = expires_at is not None
+            if not signed:
+                expires_at = now + self.lifetime(host)
+            rows.append((self.make_key(uid, key_arguments), uid, encrypt_dict(**arguments), encrypt_dict(**value),
+                         url, host, signed, now, expires_at, now))
+        with self._connect() as connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO resolved (key, uid, arguments, value, url, host, signed, resolved_at, "
+                "expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def set(self, uid: str, key_arguments: dict, arguments: dict, value: dict, url: Optional[str]):
+        self.set_many(uid, [(key_arguments, arguments, value, url)])
+
+    def due(self, until: float, accessed_since: float) -> List[ResolvedEntry]:
+        """ Entries accessed recently, expiring before a time. """
+        with self._connect() as connection:
+            rows = connection.execute(
+                "SELECT key, uid, arguments, value, url, host, signed, resolved_at, expires_at FROM resolved "
+                "WHERE expires_at<=? AND accessed_at>=? ORDER BY expires_at", (until, accessed_since)).fetchall()
+        return [ResolvedEntry(key, uid, decrypt_dict(arguments), decrypt_dict(value), url, host, bool(signed),
+                              resolved_at, expires_at)
+                for key, uid, arguments, value, url, host, signed, resolved_at, expires_at in rows]
+
+    def extend(self, key: str, expires_at: float):
+        """ Extend the validity of an entry, after a successful revalidation. """
+        with self._connect() as connection:
+            connection.execute("UPDATE resolved SET expires_at=MAX(expires_at, ?) WHERE key=?", (expires_at, key))
+
+    def prune(self, accessed_before: float):
+        """ Drop the entries not accessed since a time. """
+        with self._connect() as connection:
+            connection.execute("DELETE FROM resolved WHERE accessed_at<?", (accessed_before,))
@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple, List
+
+from iotech.utils.classes import Singleton
+
+from .. import configs
+
+ResultKey = Tuple[str, Optional[str], Optional[Tuple]]
+
+
+def make_key(query: str, uid: str = None, filters_key: Tuple = None) -> ResultKey:
+    return ' '.join((query or '').lower().split()), uid, filters_key
+
+
+@Singleton
+class ResultCache:
+    """
+    In-memory cache of the search results, with expiration (results_ttl; disabled if 0) and a bounded number of
+    entries.
+    """
+
+    def __init__(self):
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: ResultKey):
+        """
+        Get a non-expired search result.
+        :rtype Optional[SearchResult]
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return
+            expires_at, result = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return
+            self._entries.move_to_end(key)
+            return result
+
+    def set(self, key: ResultKey, result, ttl: int = None):
+        ttl = ttl or configs.ENGINE_RESULTS_TTL.get()
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > configs.ENGINE_RESULTS_MAX_ENTRIES.get():
+                self._entries.popitem(last=False)
+
+    def expires_in(self, key: ResultKey) -> float:
+        """ Seconds before the cached result expires, zero if not cached. """
+        with self._lock:
+            entry = self._entries.get(key)
+        if not entry:
+            return 0
+        return max(entry[0] - time.time(), 0)
+
+    def keys(self) -> List[ResultKey]:
+        with self._lock:
+            return list(self._entries.keys())
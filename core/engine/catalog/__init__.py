@@ -0,0 +1,2 @@
+from .index import CatalogIndex
+from .crawler import CatalogCrawler
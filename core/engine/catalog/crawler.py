@@ -0,0 +1,45 @@
+from typing import Iterable
+
+from ..connectors.base import SearchConnector
+from .. import configs
+from .index import CatalogIndex
+
+import logging
+LOGGER = logging.getLogger(__name__)
+
+
+class CatalogCrawler:
+    """ Background crawler syncing the listings of the connectors into the catalog index. """
+
+    def __init__(self, index: CatalogIndex, connectors: Iterable[SearchConnector]):
+        self._index: CatalogIndex = index
+        self._connectors = list(connectors)
+
+    def sync(self):
+        for connector in self._connectors:
+            try:
+                self._sync_connector(connector)
+            except Exception as e:
+                LOGGER.warning(f"{connector.uid()}: catalog sync failed: {e}")
+
+    def _sync_connector(self, connector: SearchConnector):
+        uid = connector.uid()
+        max_pages = configs.ENGINE_CATALOG_MAX_PAGES.get()
+        next_page, complete = self._index.get_state(uid)
+        # Delta refresh of the newest pages
+        if next_page > 1:
+            for page in range(1, max_pages + 1):
+                records = connector.catalog_page(page)
+                if not records or not self._index.upsert(uid, records):
+                    break
+        # Backfill from the last crawled page
+        if not complete:
+            for page in range(next_page, next_page + max_pages):
+                records = connector.catalog_page(page)
+                if not records:
+                    complete = True
+                    break
+                self._index.upsert(uid, records)
+                next_page = page + 1
+            self._index.set_state(uid, next_page, complete)
+            LOGGER.info(f"{uid}: catalog synced up to page {next_page - 1}")
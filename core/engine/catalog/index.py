@@ -0,0 +1,136 @@
+import contextlib
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Optional
+
+from .. import configs
+
+import logging
+LOGGER = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    uid TEXT NOT NULL,
+    url TEXT NOT NULL,
+    original_title TEXT NOT NULL,
+    image_url TEXT,
+    year INTEGER,
+    lang TEXT,
+    media_type TEXT,
+    updated_at REAL NOT NULL,
+    UNIQUE (uid, url)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS titles USING fts5(
+    original_title, content='items', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS items_ai AFTER INSERT ON items BEGIN
+    INSERT INTO titles(rowid, original_title) VALUES (new.id, new.original_title);
+END;
+CREATE TRIGGER IF NOT EXISTS items_ad AFTER DELETE ON items BEGIN
+    INSERT INTO titles(titles, rowid, original_title) VALUES ('delete', old.id, old.original_title);
+END;
+CREATE TRIGGER IF NOT EXISTS items_au AFTER UPDATE ON items BEGIN
+    INSERT INTO titles(titles, rowid, original_title) VALUES ('delete', old.id, old.original_title);
+    INSERT INTO titles(rowid, original_title) VALUES (new.id, new.original_title);
+END;
+CREATE TABLE IF NOT EXISTS sync_state (
+    uid TEXT PRIMARY KEY,
+    next_page INTEGER NOT NULL,
+    complete INTEGER NOT NULL,
+    synced_at REAL NOT NULL
+);
+"""
+
+_RECORD_FIELDS = ('original_title', 'url', 'image_url', 'year', 'lang', 'media_type')
+
+
+def _match_expression(query: str) -> Optional[str]:
+    tokens = re.findall(r"\w+", query.lower())
+    if not tokens:
+        return
+    return ' '.join(f'"{t}"' for t in tokens[:-1]) + f' "{tokens[-1]}"*'
+
+
+class CatalogIndex:
+    """
+    Local full-text index (SQLite FTS5) of the titles of the connectors' catalogs.
+    """
+
+    def __init__(self, path: str = None):
+        self._path: str = path or os.path.join(
+            configs.ENGINE_CACHE_DIR.get(), configs.ENGINE_CATALOG_FILE_NAME.get())
+        with self._connect() as connection:
+            connection.executescript(_SCHEMA)
+            # Indexes created before the media types were recorded
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(items)")]
+            if 'media_type' not in columns:
+                connection.execute("ALTER TABLE items ADD COLUMN media_type TEXT")
+
+    @contextlib.contextmanager
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self._path, timeout=30)
+        connection.execute('PRAGMA journal_mode=WAL')
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    def upsert(self, uid: str, records: Iterable[dict]) -> int:
+        """
+        Insert or update catalog records of a connector.
+        :return: The number of records not already in the index.
+        """
+        now = time.time()
+        new_count = 0
+        with self._connect() as connection:
+            for record in records:
+                values = [record.get(k) for k in _RECORD_FIELDS]
+                cursor = connection.execute(
+                    "UPDATE items SET original_title=?, image_url=?, year=?, lang=?, media_type=?, updated_at=? "
+                    "WHERE uid=? AND url=?", (values[0], *values[2:], now, uid, values[1]))
+                if not cursor.rowcount:
+                    connection.execute(
+                        "INSERT INTO items (uid, original_title, url, image_url, year, lang, media_type, updated_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (uid, *values, now))
+                    new_count += 1
+        return new_count
+
+    def search(self, query: str, uids: Iterable[str], limit: int = None) -> Dict[str, List[dict]]:
+        """ Full-text search the query in the catalogs of the given connectors, grouping the records by uid. """
+        expression = _match_expression(query)
+        uids = list(uids)
+        if not expression or not uids:
+            return dict()
+        limit = limit or configs.ENGINE_CATALOG_MAX_RESULTS.get()
+        placeholders = ', '.join('?' * len(uids))
+        sql = (f"SELECT items.uid, {', '.join('items.' + k for k in _RECORD_FIELDS)} "
+               f"FROM titles JOIN items ON items.id = titles.rowid "
+               f"WHERE titles MATCH ? AND items.uid IN ({placeholders}) ORDER BY rank LIMIT ?")
+        result: Dict[str, List[dict]] = dict()
+        try:
+            with self._connect() as connection:
+                rows = connection.execute(sql, (expression, *uids, limit)).fetchall()
+        except sqlite3.Error as e:
+            LOGGER.warning(f"Catalog search failed: {e}")
+            return result
+        for uid, *values in rows:
+            result.setdefault(uid, []).append(dict(zip(_RECORD_FIELDS, values)))
+        return result
+
+    def get_state(self, uid: str) -> (int, bool):
+        """ Get the next listing page to crawl and whether the full crawl of the connector is complete. """
+        with self._connect() as connection:
+            row = connection.execute("SELECT next_page, complete FROM sync_state WHERE uid=?", (uid,)).fetchone()
+        if not row:
+            return 1, False
+        return row[0], bool(row[1])
+
+    def set_state(self, uid: str, next_page: int, complete: bool):
+        with self._connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO sync_state (uid, next_page, complete, synced_at) VALUES (?, ?, ?, ?)",
+                (uid, next_page, int(complete), time.time()))
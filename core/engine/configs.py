@@ -0,0 +1,59 @@
+from iotech.configurator import Config
+
+# CONFIGURATIONS
+ENGINE_RESULTS_TTL = Config(int, "ENGINE", "results_ttl", 300)
+ENGINE_RESULTS_MAX_ENTRIES = Config(int, "ENGINE", "results_max_entries", 512)
+ENGINE_PREWARM_INTERVAL = Config(int, "ENGINE", "prewarm_interval", 240)
+ENGINE_PREWARM_TOP = Config(int, "ENGINE", "prewarm_top", 10)
+ENGINE_PREWARM_MIN_SCORE = Config(float, "ENGINE", "prewarm_min_score", 1.5)
+ENGINE_POPULARITY_HALF_LIFE = Config(int, "ENGINE", "popularity_half_life", 6 * 3600)
+ENGINE_PAGE_SIZE = Config(int, "ENGINE", "page_size", 30)
+ENGINE_CACHE_DIR = Config(str, "ENGINE", "cache_dir", ".mycache")
+ENGINE_CATALOG = Config(bool, "ENGINE", "catalog", False)
+ENGINE_CATALOG_FILE_NAME = Config(str, "ENGINE", "catalog_file_name", "catalog.db")
+ENGINE_CATALOG_SYNC_INTERVAL = Config(int, "ENGINE", "catalog_sync_interval", 3 * 3600)
+ENGINE_CATALOG_MAX_PAGES = Config(int, "ENGINE", "catalog_max_pages", 20)
+ENGINE_CATALOG_MAX_RESULTS = Config(int, "ENGINE", "catalog_max_results", 50)
+ENGINE_BUDGET_MAX_MAIN = Config(int, "ENGINE", "budget_max_main", 60)
+ENGINE_BUDGET_MAX_FETCHES = Config(int, "ENGINE", "budget_max_fetches", 40)
+ENGINE_BUDGET_MAX_BACKOFF = Config(float, "ENGINE", "budget_max_backoff", 4.)
+ENGINE_PARSE_WORKERS = Config(int, "ENGINE", "parse_workers", 0)
+ENGINE_MAX_BODY_SIZE = Config(int, "ENGINE", "max_body_size", 8 * 1024 * 1024)
+ENGINE_HTTP_CACHE = Config(bool, "ENGINE", "http_cache", True)
+ENGINE_HTTP_CACHE_SIZE = Config(int, "ENGINE", "http_cache_size", 256 * 1024 * 1024)
+ENGINE_HTTP_CACHE_MMAP_SIZE = Config(int, "ENGINE", "http_cache_mmap_size", 1024 * 1024)
+ENGINE_PARSE_MEMO_MAX_ENTRIES = Config(int, "ENGINE", "parse_memo_max_entries", 1024)
+ENGINE_WARC_MODE = Config(str, "ENGINE", "warc_mode", "")
+ENGINE_WARC_DIR = Config(str, "ENGINE", "warc_dir", ".mycache/warc")
+ENGINE_WARC_LATENCY = Config(float, "ENGINE", "warc_latency", 0.)
+ENGINE_WARC_BYPASS = Config(bool, "ENGINE", "warc_bypass", False)
+ENGINE_CLEARANCE_TTL = Config(int, "ENGINE", "clearance_ttl", 3600)
+ENGINE_WARMUP = Config(bool, "ENGINE", "warmup", True)
+ENGINE_MIRRORS_PROBE_INTERVAL = Config(int, "ENGINE", "mirrors_probe_interval", 300)
+ENGINE_MIRRORS_PROBE_TIMEOUT = Config(float, "ENGINE", "mirrors_probe_timeout", 10.)
+ENGINE_HEDGE = Config(bool, "ENGINE", "hedge", True)
+ENGINE_HEDGE_PERCENTILE = Config(float, "ENGINE", "hedge_percentile", 95.)
+ENGINE_HOST_CONCURRENCY = Config(int, "ENGINE", "host_concurrency", 4)
+ENGINE_HOST_CONCURRENCY_MIN = Config(int, "ENGINE", "host_concurrency_min", 1)
+ENGINE_HOST_CONCURRENCY_MAX = Config(int, "ENGINE", "host_concurrency_max", 32)
+ENGINE_MAX_CONNECTIONS = Config(int, "ENGINE", "max_connections", 32)
+ENGINE_BACKGROUND_SHARE = Config(float, "ENGINE", "background_share", 0.5)
+ENGINE_BACKGROUND_WORKERS = Config(int, "ENGINE", "background_workers", 2)
+ENGINE_RETRIES = Config(int, "ENGINE", "retries", 2)
+ENGINE_RETRY_BACKOFF = Config(float, "ENGINE", "retry_backoff", 0.5)
+ENGINE_RETRY_MAX_BACKOFF = Config(float, "ENGINE", "retry_max_backoff", 8.)
+ENGINE_RETRY_BUDGET_RATIO = Config(float, "ENGINE", "retry_budget_ratio", 0.1)
+ENGINE_RETRY_BUDGET_RESERVE = Config(float, "ENGINE", "retry_budget_reserve", 10.)
+ENGINE_DNS_CACHE = Config(bool, "ENGINE", "dns_cache", True)
+ENGINE_DNS_TTL = Config(int, "ENGINE", "dns_ttl", 300)
+ENGINE_DNS_MIN_TTL = Config(int, "ENGINE", "dns_min_ttl", 30)
+ENGINE_HAPPY_EYEBALLS_DELAY = Config(float, "ENGINE", "happy_eyeballs_delay", 0.25)
+ENGINE_CONTEXT_TTL = Config(int, "ENGINE", "context_ttl", 900)
+ENGINE_CONTEXT_MAX_ENTRIES = Config(int, "ENGINE", "context_max_entries", 4096)
+ENGINE_DEFER_BATCH_CONCURRENCY = Config(int, "ENGINE", "defer_batch_concurrency", 4)
+ENGINE_RESOLVED_TTL = Config(int, "ENGINE", "resolved_ttl", 1800)
+ENGINE_RESOLVED_MARGIN = Config(int, "ENGINE", "resolved_margin", 300)
+ENGINE_RESOLVED_REVALIDATE_INTERVAL = Config(int, "ENGINE", "resolved_revalidate_interval", 600)
+ENGINE_RESOLVED_KEEP = Config(int, "ENGINE", "resolved_keep", 24 * 3600)
+# Mirror domains by connector uid
+MIRRORS = Config((list, str), "MIRRORS", None, [])
@@ -3,10 +3,11 @@ import json
 from typing import List, Optional
 
 import requests
-from bs4 import BeautifulSoup
 
 from ... import scraping
 from ..base import SearchConnector, SearchResult
+from ...filters import SearchFilters
+from ...budget import SearchBudget
 from .classes import Anime, Episode, Related
 
 
@@ -16,6 +17,20 @@ class AnimeUnity(SearchConnector):
     # TODO: get the download URL and put in deferred player
 
     base_url = "https://www.animeunity.tv"
+    _archive_page_size = 30
+
+    media_types = ('anime', 'movie', 'series')
+    languages = ('it',)
+    native_filters = ('year', 'type')
+    _archive_types = {'movie': 'Movie', 'series': 'TV'}
+
+    @classmethod
+    def site_url(cls) -> Optional[str]:
+        return cls.base_url
+
+    @classmethod
+    def set_site_url(cls, url: str):
+        cls.base_url = url
 
     @staticmethod
     def _format_search_results(json_string):
@@ -53,25 +68,42 @@ class AnimeUnity(SearchConnector):
                    "order": order, "status": status, "genres": genres,
                    "offset": offset}
         page = scraping.get(f"{cls.base_url}/archivio", params=payload)
-        soup = BeautifulSoup(page.content, 'html.parser')
-        archive = soup.find('archivio')
-        if not archive or 'records' not in archive.attrs:
+        records = scraping.extract_attribute(
+            page.content, 'archivio', 'records', encoding=scraping.encoding_of(page, cls.encoding))
+        if not records:
             return []
-        return cls._format_search_results(archive.attrs['records'])
+        return cls._format_search_results(records)
+
+    @classmethod
+    def _from_anime(cls, anime: Anime):
+        # image_base64 = base64.b64encode(requests.get(anime.cover_image).content)
+        # ext = anime.thumbnail.split('.')[-1]
+        # image_url = f'data:image/{ext};base64, {image_base64.decode()}'
+        image_url = anime.thumbnail
+        return cls(
+            original_title=anime.main_title, url=anime.url,
+            image_url=image_url, lang='it'
+        )
+
+    @classmethod
+    def catalog_page(cls, page: int) -> Optional[List[dict]]:
+        anime_list = cls._do_search(offset=(page - 1) * cls._archive_page_size)
+        return [cls._from_anime(anime).catalog_record() for anime in anime_list]
 
     @classmethod
-    def search(cls, query: str) -> Optional[SearchResult]:
-        anime_list = cls._do_search(title=query, order="Popolarità")
+    def search(cls, query: str, filters: SearchFilters = None, budget: SearchBudget = None) -> Optional[SearchResult]:
+        budget = budget or SearchBudget()
+        kwargs = dict()
+        if filters and filters.year:
+            kwargs['year'] = filters.year
+        if filters and filters.type in cls._archive_types:
+            kwargs['type_'] = cls._archive_types[filters.type]
+        anime_list = cls._do_search(title=query, order="Popolarità", **kwargs)
         _list = list()
         for anime in anime_list:
-            # image_base64 = base64.b64encode(requests.get(anime.cover_image).content)
-            # ext = anime.thumbnail.split('.')[-1]
-            # image_url = f'data:image/{ext};base64, {image_base64.decode()}'
-            image_url = anime.thumbnail
-            item = cls(
-                original_title=anime.main_title, url=anime.url,
-                image_url=image_url, lang='it'
-            )
-            _list.append(item)
+            if budget.is_met:
+                break
+            _list.append(cls._from_anime(anime))
+            budget.add_main()
         return SearchResult(_list)
 
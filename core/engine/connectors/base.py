@@ -1,17 +1,30 @@
 import abc
+import functools
 import urllib.parse
 import webbrowser
-from typing import Optional, List, Any, Dict
+from typing import Optional, List, Any, Dict, Tuple
 
 from quart import render_template, url_for
 
-from .. import security
+from .. import security, utils, ranking, configs
+from ..filters import SearchFilters
+from ..budget import SearchBudget
 
 _lang_map = {'en': 'ENG', 'it': 'ITA'}
 
 
 class SearchConnector:
     children: List = []
+    # Media types and languages served by the connector, and the filters applied natively by its search
+    media_types: Tuple[str, ...] = ()
+    languages: Tuple[str, ...] = ('en',)
+    native_filters: Tuple[str, ...] = ()
+    # Encoding of the site's pages, if known; else the charset declared by the server, or UTF-8
+    encoding: Optional[str] = None
+    # Minimum seconds to reuse the site's detail pages from the HTTP cache, overriding the server's freshness
+    cache_ttl: int = 0
+    # Mirror domains of the site, in order of preference; overridden by the connector's option in [MIRRORS]
+    mirrors: Tuple[str, ...] = ()
 
     def __init__(
             self,
@@ -22,6 +35,7 @@ class SearchConnector:
             image_url: str = None,
             lang: str = None,
             year: int = None,
+            media_type: str = None,
             *args,
             **kwargs
     ):
@@ -32,6 +46,7 @@ class SearchConnector:
         self._image_url: str = image_url
         self._lang: str = lang
         self._year: int = year
+        self._media_type: Optional[str] = media_type
 
     def __lt__(self, other):
         return self.title < other.title
@@ -50,6 +65,10 @@ class SearchConnector:
             return title
         return f"{title} {language_string}"
 
+    @functools.cached_property
+    def ranked_title(self) -> ranking.RankedTitle:
+        return ranking.RankedTitle(self._original_title, self._year)
+
     @property
     def query_title(self) -> str:
         return self._original_title.lower()
@@ -58,10 +77,40 @@ class SearchConnector:
     def url(self) -> str:
         return self._url
 
+    @property
+    def year(self) -> Optional[int]:
+        return self._year
+
+    @property
+    def lang(self) -> str:
+        return self._lang or 'en'
+
+    @property
+    def media_type(self) -> Optional[str]:
+        """ Media type of the item, implied by the connector if it serves a single one; None if unknown. """
+        if self._media_type:
+            return self._media_type
+        if len(self.media_types) == 1:
+            return self.media_types[0]
+
     @classmethod
     def uid(cls) -> str:
         return cls.__name__.lower()
 
+    @classmethod
+    def site_url(cls) -> Optional[str]:
+        """ Base URL of the site scraped by the connector. """
+        return getattr(cls, '_base_url_', None)
+
+    @classmethod
+    def set_site_url(cls, url: str):
+        """ Switch the connector to another mirror of its site. """
+        cls._base_url_ = url
+
+    @classmethod
+    def mirror_urls(cls) -> List[str]:
+        return configs.MIRRORS.get(cls.uid()) or list(cls.mirrors) or [cls.site_url()]
+
     @property
     def link(self) -> str:
         return security.url_for('search', m=self.media_hash)
@@ -87,15 +136,54 @@ class SearchConnector:
     def get_content(self) -> dict:
         return {'url': self.url}
 
+    def catalog_record(self) -> dict:
+        return dict(original_title=self._original_title, url=self._url, image_url=self._image_url,
+                    year=self._year, lang=self._lang, media_type=self._media_type)
+
+    @classmethod
+    def catalog_page(cls, page: int) -> Optional[List[dict]]:
+        """
+        Get the catalog records of a page of the site listing, used to sync the local catalog.
+        :param page: Number of the listing page, starting from 1.
+        :return: The list of catalog records, empty past the last page; None if the site has no listing.
+        """
+        return None
+
+    @classmethod
+    def expand(cls, **kwargs):
+        """
+        List on demand the items nested in an item of a parent connector, e.g. the episodes of a season.
+        :rtype Optional[SearchResult]
+        :param kwargs: Content of the parent item, given by its link.
+        """
+        return None
+
+    @classmethod
+    def from_catalog(cls, query: str, records: List[dict]):
+        """
+        :rtype SearchResult
+        """
+        main, secondary = [], []
+        for record in records:
+            item = cls(**record)
+            if utils.check_in(query, item.title):
+                main.append(item)
+            else:
+                secondary.append(item)
+        return SearchResult(main, secondary)
+
     @classmethod
     async def render_player_deferred(
             cls, player_poster_url: str = None,
-            player_src_base_url: str = '', mime_type: str = None, ajax_method: str = None, **kwargs):
+            player_src_base_url: str = '', mime_type: str = None, ajax_method: str = None,
+            batch: dict = None, **kwargs):
         """
         Render a deferred media-player (video-player with deferred loading function).
         :param player_poster_url: (optional) URL of the player poster to render after defer loading.
         :param player_src_base_url: (optional) Base source url to prepend to the deferred result file.
         :param mime_type: (optional) Mime-type of the deferred resource; default is 'video/mp4'.
+        :param batch: (optional) Key-value arguments of deferred_items, to resolve the sibling media (e.g. the other
+        episodes of the season) the player can switch to.
         :param kwargs: (optional) Key-value arguments to pass to the deferred function.
         """
         mime_type = mime_type or 'video/mp4'
@@ -105,6 +193,9 @@ class SearchConnector:
             kwargs['ajax_url'] = url_for('deferred_execute')
             kwargs['ajax_method'] = ajax_method or 'post'
             kwargs['encrypted_ajax_data'] = security.encrypt_dict(u=cls.uid(), **kwargs)
+            if batch:
+                kwargs['batch_ajax_url'] = url_for('deferred_execute_batch')
+                kwargs['encrypted_batch_data'] = security.encrypt_dict(u=cls.uid(), **batch)
         return await render_template(
             'media/player/deferred.html',
             player_poster=player_poster_url,
@@ -120,16 +211,42 @@ class SearchConnector:
     async def execute_deferred(cls, **kwargs) -> Optional[Dict]:
         return dict()
 
+    @classmethod
+    def deferred_key(cls, **kwargs) -> Dict:
+        """
+        Arguments of execute_deferred identifying the media, to cache its result: the ones rendered for the player
+        only (title, details, ajax URL and method) are left out, so that the same media shares its entry whichever
+        player or batch resolves it.
+        """
+        return {k: v for k, v in kwargs.items() if k not in ('title', 'details', 'ajax_url', 'ajax_method')}
+
+    @classmethod
+    def deferred_file_url(cls, result: dict) -> Optional[str]:
+        """ Absolute URL of the media file of a deferred result, if any, to revalidate it. """
+        return result.get('file_url')
+
+    @classmethod
+    def deferred_items(cls, **kwargs) -> Dict[str, Dict]:
+        """
+        List the media of a batch (e.g. the episodes of a season), to resolve together.
+        :return: The key-value arguments of execute_deferred, by key of the media.
+        """
+        return dict()
+
     @classmethod
     async def execute(cls, content: Any) -> Any:
         return cls.new_tab(content['url'])
 
     @classmethod
     @abc.abstractmethod
-    def search(cls, query: str):
+    def search(cls, query: str, filters: SearchFilters = None, budget: SearchBudget = None, context: dict = None):
         """
         :rtype Optional[SearchResult]
         :param query:
+        :param filters: (optional) Filters of the search, to apply natively where supported.
+        :param budget: (optional) Budget of main results and detail fetches of the search.
+        :param context: (optional) Context handed by the parent result of a drill-down search, e.g. the records it
+        already scraped; passed only if any, so only the children connectors need to accept it.
         :return:
         """
         pass
@@ -141,6 +258,8 @@ class SearchResult:
         main = main and {x.title: x for x in main} or dict()
         secondary = secondary and {x.title: x for x in secondary} or dict()
         self._reduce(main, secondary)
+        self.page: int = 1
+        self.has_next: bool = False
 
     def _reduce(self, main: dict, secondary: dict):
         self.main = main
@@ -158,6 +277,26 @@ class SearchResult:
     def sorted(self):
         return self.__class__(sorted(self.main.values()), sorted(self.secondary.values()))
 
+    def ranked(self, query: str, page: int = 1, page_size: int = None, year: int = None):
+        """
+        Rank the results by relevance to the query and get a page of them, main results first.
+        :param query: The search query.
+        :param page: (optional) Number of the page to get, starting from 1.
+        :param page_size: (optional) Number of results per page.
+        :param year: (optional) Target year of the results; if not given, a trailing year in the query is used.
+        :rtype SearchResult
+        """
+        page_size = page_size or configs.ENGINE_PAGE_SIZE.get()
+        scored = ranking.rank(ranking.RankedQuery(query, year), [*self.main.values(), *self.secondary.values()])
+        main_ids = {id(x) for x in self.main.values()}
+        ordered = [x for _, x in scored if id(x) in main_ids] + [x for _, x in scored if id(x) not in main_ids]
+        start = (max(page, 1) - 1) * page_size
+        items = ordered[start:start + page_size]
+        result = self.__class__([x for x in items if id(x) in main_ids], [x for x in items if id(x) not in main_ids])
+        result.page = max(page, 1)
+        result.has_next = len(ordered) > start + page_size
+        return result
+
     @property
     def is_empty(self) -> bool:
         return not self.main and not self.secondary
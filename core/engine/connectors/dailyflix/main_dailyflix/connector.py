@@ -1,14 +1,43 @@
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
+import re
 import urllib.parse
 from typing import List, Optional
 
+from bs4 import SoupStrainer
+
 from .... import utils, scraping
+from ....scraping.selectors import ExtractionSpec, Field
 from ...base import SearchConnector, SearchResult
+from ....filters import SearchFilters
+from ....budget import SearchBudget
 
 import logging
 
 LOGGER = logging.getLogger(__name__)
 
+_rows_spec = ExtractionSpec(
+    SoupStrainer('tr'), SoupStrainer('table', {'class': 'table'}),
+    title=Field(SoupStrainer('a')), href=Field(SoupStrainer('a'), attr='href'))
+_details_spec = ExtractionSpec(
+    file_url=Field(SoupStrainer('iframe'), attr='src'),
+    breadcrumbs=Field(SoupStrainer('a', {'rel': 'tag'}), many=True),
+    image_url=Field(SoupStrainer('img', {'aria-label': re.compile(r"^Poster")}), attr='src')
+)
+
+
+# Extraction routines, run in the parsing workers if enabled
+
+@scraping.extractor(version=2)
+def _extract_rows(markup: str) -> List[dict]:
+    with scraping.released(scraping.parsing.parse(markup, _rows_spec.strainer)) as soup:
+        return _rows_spec.extract(soup)
+
+
+@scraping.extractor(version=2)
+def _extract_details(markup: str) -> dict:
+    with scraping.released(scraping.parsing.parse(markup, _details_spec.strainer)) as soup:
+        return _details_spec.extract_one(soup)
+
 
 class MainDailyFlix(SearchConnector):
 
@@ -16,28 +45,25 @@ class MainDailyFlix(SearchConnector):
     _base_storage_url_ = "https://filemoon.sx/"
     _untrusted_source_url = 'https://playhydrax.com'
 
+    media_types = ('movie',)
+
     @classmethod
     async def execute(cls, content: dict):
         return cls.new_tab(content['url'])
 
     @classmethod
-    def _scrape_tr(cls, tr):
-        td = tr.find('td')
-        if not td:
-            return
-        link = td.find('a')
-        if not link:
+    def _scrape_tr(cls, budget: SearchBudget, row: dict):
+        if not row['href'] or not budget.take_fetch():
             return
-        title = link.text
-        soup = scraping.get_soup(link['href'])
-        iframe = soup.find('iframe')
-        if not iframe:
+        title = row['title']
+        details = scraping.get_extracted(
+            row['href'], _extract_details, encoding=cls.encoding, min_ttl=cls.cache_ttl)
+        if not details['file_url']:
             return
-        file_url = iframe['src'].split('<')[0].strip()
+        file_url = details['file_url'].split('<')[0].strip()
         if file_url.startswith(cls._untrusted_source_url):
             return
-        breadcrumbs = [a.text for a in soup.findAll(
-            lambda tag: tag.name == 'a' and 'rel' in tag.attrs and 'tag' in tag.attrs['rel'])]
+        breadcrumbs = details['breadcrumbs']
         if 'TV' in breadcrumbs:
             return
         kwargs = dict()
@@ -46,33 +72,34 @@ class MainDailyFlix(SearchConnector):
                 kwargs['year'] = int(b.replace('#', ''))
             except:
                 pass
-        posters = soup.findAll(
-            lambda tag: tag.name == 'img' and 'aria-label' in tag.attrs
-                        and tag.attrs['aria-label'].startswith('Poster'))
-        if posters:
-            image_url = posters[0]['src']
-        else:
-            image_url = None
-        return cls(original_title=title, url=file_url, image_url=image_url, **kwargs)
+        return cls(original_title=title, url=file_url, image_url=details['image_url'], **kwargs)
 
     @classmethod
-    def search(cls, query: str) -> Optional[SearchResult]:
+    def search(cls, query: str, filters: SearchFilters = None, budget: SearchBudget = None) -> Optional[SearchResult]:
+        budget = budget or SearchBudget()
         main_items: List[MainDailyFlix] = list()
         secondary_items: List[MainDailyFlix] = list()
         # Scrape items list
-        soup = scraping.get_soup(f"{cls._base_url_}/?s={urllib.parse.quote(query)}")
-        table = soup.find('table', {'class': 'table'})
-        if not table:
+        rows = scraping.get_extracted(
+            f"{cls._base_url_}/?s={urllib.parse.quote(query)}", _extract_rows, encoding=cls.encoding)
+        if not rows:
             return
         # Multiprocess table items
-        trs = table.find_all('tr')
-        with ThreadPoolExecutor(max_workers=10) as p:
-            for item in p.map(cls._scrape_tr, trs):
+        with scraping.ContextExecutor(max_workers=10) as p:
+            futures = [p.submit(cls._scrape_tr, budget, row) for row in rows]
+            for future in as_completed(futures):
+                item = future.result()
                 if item:
                     if utils.check_in(query, item.title):
                         main_items.append(item)
+                        budget.add_main()
                     else:
                         secondary_items.append(item)
+                if budget.is_met:
+                    # Cancel the pending detail fetches
+                    for f in futures:
+                        f.cancel()
+                    break
         # Return results
         return SearchResult(main_items, secondary_items)
 
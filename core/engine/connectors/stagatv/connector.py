@@ -1,5 +1,11 @@
+import functools
+from typing import Optional, List
+
 from ... import security
+from ...cache import ContextStore
 from ..base import SearchConnector, SearchResult
+from ...filters import SearchFilters
+from ...budget import SearchBudget
 from .series_season import StagaTV_Series
 from .lib import Series
 
@@ -7,17 +13,52 @@ from .lib import Series
 class StagaTV(SearchConnector):
 
     children = [StagaTV_Series]
+    media_types = ('series',)
+
+    @classmethod
+    def site_url(cls) -> Optional[str]:
+        return Series._base_url_
+
+    @classmethod
+    def set_site_url(cls, url: str):
+        Series._base_url_ = url
+
+    def __init__(self, series: List[Series] = None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Seasons of the series listed (and the first one scraped), handed to the drill-down search
+        self._series: List[Series] = series or []
+
+    @functools.cached_property
+    def _context_handle(self) -> Optional[str]:
+        # Stored once per result, however many times it is rendered
+        if self._series:
+            return ContextStore().put(dict(series=[s.to_record() for s in self._series]))
 
     @property
     def link(self) -> str:
-        return security.url_for('search', q=self.query_title, u=StagaTV_Series.uid())
+        kwargs = dict()
+        if self._context_handle:
+            kwargs['h'] = self._context_handle
+        return security.url_for('search', q=self.query_title, u=StagaTV_Series.uid(), **kwargs)
+
+    @classmethod
+    def catalog_page(cls, page: int) -> Optional[List[dict]]:
+        # The series list is a single page
+        if page > 1:
+            return []
+        return [dict(original_title=series.title, url=series.url) for series in Series.get_uniques('')]
 
     @classmethod
-    def search(cls, query: str) -> SearchResult:
+    def search(cls, query: str, filters: SearchFilters = None, budget: SearchBudget = None) -> SearchResult:
+        budget = budget or SearchBudget()
         _list = list()
-        for series in Series.get_uniques(query):  # type: Series
+        for group in Series.get_groups(query):  # type: List[Series]
+            if not budget.take_fetch():
+                break
+            series = group[0]
             series.scrape()
-            item = cls(original_title=series.title, image_url=series.image_url, year=series.year)
+            item = cls(original_title=series.title, image_url=series.image_url, year=series.year, series=group)
             _list.append(item)
+            budget.add_main()
         # Return results
         return SearchResult(_list)
@@ -1,128 +1,168 @@
-import functools
 import re
-from typing import Optional, List
+from collections import OrderedDict
+from typing import Optional, List, Dict
 
+from bs4 import SoupStrainer
 from iotech.utils import dt
 from ... import scraping, utils
+from ...scraping.selectors import ExtractionSpec, Field
+
+_series_list_spec = ExtractionSpec(
+    SoupStrainer('li'), SoupStrainer('div', {'class': 'soralist'}),
+    text=Field(None), full_title=Field(SoupStrainer('a')), url=Field(SoupStrainer('a'), attr='href'))
+_episode_list_spec = ExtractionSpec(
+    SoupStrainer('li'), SoupStrainer('div', 'epsdlist'),
+    url=Field(SoupStrainer('a'), attr='href'), number=Field(SoupStrainer('div', {'class': 'epl-num'})))
+_episode_box_spec = ExtractionSpec(
+    seasons=Field(SoupStrainer('span', {'class': 'ts-chl-collapsible'}), many=True),
+    lists=Field(SoupStrainer('div', {'class': 'ts-chl-collapsible-content'}), many=True, spec=_episode_list_spec))
+# The poster image is the one whose alt is the full title, so the alt of every candidate is kept
+_series_spec = ExtractionSpec(
+    images=Field(SoupStrainer('img', {'class': 'ts-post-image'}), many=True,
+                 spec=ExtractionSpec(alt=Field(None, attr='alt'), src=Field(None, attr='src'))),
+    date=Field(SoupStrainer('time', {'itemprop': 'dateCreated'}), attr='datetime'),
+    gallery=Field(SoupStrainer('div', {'class': 'gallery_img'}),
+                  spec=ExtractionSpec(href=Field(SoupStrainer('a'), attr='href'))),
+    box=Field(SoupStrainer('div', {'class': 'bixbox ts-ep-list'}), spec=_episode_box_spec))
+
+
+_season_pattern = re.compile(r"Season (?P<number>.*[0-9])")
+_episode_pattern = re.compile(r"S.* EP(?P<number>.*[0-9])")
+_series_season_pattern = re.compile(r".*\(S(?P<number>[0-9][1-2])\)")
 
 
 class SeriesSeasonEpisode:
     files_dl_base_url = "https://stagatvfiles.com"
-    files_base_url_pattern = r"https:\/\/stagatvfiles\.com\/videos\/file\/(?P<data_file>.*)\/.*"
-
-    # noinspection PyTypeChecker
-    def __init__(self, series_season, season_string: str, base_soup):
-        self._series_season = series_season
-        self._season_string = season_string
-        self._base_soup = base_soup
-        self._item_soup = None
-
-    @functools.cached_property
-    def _full_number(self) -> str:
-        return self._base_soup.find('div', {'class': 'epl-num'}).text
-
-    @functools.cached_property
-    def season_number(self) -> Optional[int]:
-        match = re.match(r"Season (?P<number>.*[0-9])", self._season_string)
-        if not match:
-            return
-        return int(match['number'].strip())
+    files_url_pattern = re.compile(r"https:\/\/stagatvfiles\.com\/videos\/file\/(?P<data_file>.*)\/.*")
 
-    @functools.cached_property
-    def episode_number(self) -> Optional[int]:
-        match = re.match(r"S.* EP(?P<number>.*[0-9])", self._full_number)
-        if not match:
-            return
-        return int(match['number'].strip())
+    __slots__ = ('clean_title', 'season_number', 'episode_number', 'url')
+
+    def __init__(self, clean_title: str, season_number: Optional[int], episode_number: Optional[int], url: str):
+        self.clean_title: str = clean_title
+        self.season_number: Optional[int] = season_number
+        self.episode_number: Optional[int] = episode_number
+        self.url: str = url
 
-    @functools.cached_property
+    @classmethod
+    def from_record(cls, series_full_title: str, season_string: str, record: dict):
+        """
+        Build an episode from its extracted link.
+        :param series_full_title: Full title of the series.
+        :param season_string: Label of the season the episode belongs to.
+        :param record: Url and number label of the episode link.
+        """
+        season_number = None
+        match = _season_pattern.match(season_string)
+        if match:
+            season_number = int(match['number'].strip())
+        episode_number = None
+        match = _episode_pattern.match(record['number'])
+        if match:
+            episode_number = int(match['number'].strip())
+        return cls(series_full_title.split('(')[0].strip(), season_number, episode_number, record['url'])
+
+    @property
     def title(self) -> str:
         return f"{self.clean_title} ({self.details_string})"
 
-    @functools.cached_property
-    def clean_title(self) -> str:
-        return self._series_season.full_title.split('(')[0].strip()
-
-    @functools.cached_property
+    @property
     def details_string(self) -> str:
         return f"S{self.season_number} E{str(self.episode_number).zfill(2)}"
 
-    @functools.cached_property
-    def url(self) -> str:
-        return self._base_soup['href']
-
 
 class Series:
 
     _base_url_ = "https://www.stagatv.com"
+    # Minimum seconds to reuse the series pages from the HTTP cache
+    _cache_ttl_ = 3600
 
-    # noinspection PyTypeChecker
-    def __init__(self, base_soup):
-        self._base_soup = base_soup
-        self._item_soup = None
+    __slots__ = ('full_title', 'url', 'image_url', 'year', 'poster_url', 'episodes', 'scraped')
 
-    @functools.cached_property
-    def full_title(self) -> str:
-        return self._base_soup.text
+    def __init__(self, full_title: str, url: str):
+        self.full_title: str = full_title
+        self.url: str = url
+        # Scraped properties
+        self.image_url: Optional[str] = None
+        self.year: Optional[int] = None
+        self.poster_url: Optional[str] = None
+        self.episodes: List[SeriesSeasonEpisode] = []
+        self.scraped: bool = False
+
+    @classmethod
+    def from_record(cls, record: dict):
+        """
+        Restore a series from its record, with the scraped properties if any.
+        :param record: Record of the series (see to_record).
+        """
+        series = cls(record['full_title'], record['url'])
+        if record.get('scraped'):
+            series.image_url = record['image_url']
+            series.year = record['year']
+            series.poster_url = record['poster_url']
+            series.episodes = record['episodes']
+            series.scraped = True
+        return series
+
+    def to_record(self) -> dict:
+        return {attr: getattr(self, attr) for attr in self.__slots__}
 
-    @functools.cached_property
+    @property
     def season_number(self) -> int:
-        season_match = re.match(r".*\(S(?P<number>[0-9][1-2])\)", self.full_title)
+        season_match = _series_season_pattern.match(self.full_title)
         if season_match:
             return int(season_match['number'])
 
-    @functools.cached_property
+    @property
     def title(self) -> str:
         return self.full_title.split(f'(S')[0].strip()
 
-    # Scraped properties
-
     def scrape(self):
-        self._item_soup = scraping.get_soup(self._base_soup['href'])
-
-    @property
-    def image_url(self) -> Optional[str]:
-        if not self._item_soup:
+        """ Scrape the series page properties, unless already scraped. """
+        if self.scraped:
             return
-        return self._item_soup.find('img', {'class': 'ts-post-image', 'alt': self.full_title})['src']
+        details = scraping.get_extracted(self.url, _extract_series, self.full_title, min_ttl=self._cache_ttl_)
+        self.image_url = details['image_url']
+        self.year = details['year']
+        self.poster_url = details['poster_url']
+        self.episodes = details['episodes']
+        self.scraped = True
 
-    @property
-    def year(self) -> Optional[int]:
-        if not self._item_soup:
-            return
-        date_time = self._item_soup.find('time', {'itemprop': 'dateCreated'})['datetime']
-        return dt.datetime.from_iso(date_time).year
+    def get_seasons_episodes(self) -> List[SeriesSeasonEpisode]:
+        return self.episodes
 
-    @property
-    def poster_url(self) -> Optional[str]:
-        if not self._item_soup:
-            return
-        gallery_image = self._item_soup.find('div', {'class': 'gallery_img'})
-        poster_url = '#'
-        if gallery_image:
-            poster_url = gallery_image.find('a')['href']
-        return poster_url
+    def get_seasons(self) -> Dict[Optional[int], int]:
+        """ Number of episodes by season, in the order of the page. """
+        seasons = OrderedDict()
+        for episode in self.episodes:
+            seasons[episode.season_number] = seasons.get(episode.season_number, 0) + 1
+        return seasons
 
-    def get_seasons_episodes(self) -> List[SeriesSeasonEpisode]:
-        if not self._item_soup:
-            return []
-        _list = list()
-        box = self._item_soup.find('div', {'class': 'bixbox ts-ep-list'})
-        spans = [s.text for s in box.find_all('span', {'class': 'ts-chl-collapsible'})]
-        divs = [d.find('div', 'epsdlist') for d in box.find_all('div', {'class': 'ts-chl-collapsible-content'})]
-        for season_string, episode_list in zip(spans, divs):
-            for episode_li in episode_list.find_all('li'):
-                episode = SeriesSeasonEpisode(self, season_string, episode_li.find('a'))
-                _list.append(episode)
-        return _list
+    def get_season_episodes(self, season_number: Optional[int]) -> List[SeriesSeasonEpisode]:
+        return [e for e in self.episodes if e.season_number == season_number]
 
     @classmethod
-    def _yield_all_list_items(cls, query: str) -> List:
+    def _yield_all_list_items(cls, query: str) -> List[dict]:
         # Scrape series list
-        soup = scraping.get_soup(f"{cls._base_url_}/series-lists/", cloud=False)
-        seasons_list = soup.find('div', {'class': 'soralist'})
+        records = scraping.get_extracted(
+            f"{cls._base_url_}/series-lists/", _extract_series_list, cloud=False, min_ttl=cls._cache_ttl_)
         # Yield items which title matches the query
-        return seasons_list.findAll(lambda t: t.name == 'li' and utils.check_in(query, t.text))
+        return [record for record in records
+                if record['full_title'] is not None and utils.check_in(query, record['text'])]
+
+    @classmethod
+    def get_groups(cls, query: str) -> List[List]:
+        """
+        Series matching the query, grouped by title (i.e. the seasons of a series), in the order of the list.
+        :rtype List[List[Series]]
+        :param query:
+        :return:
+        """
+        _groups = OrderedDict()
+        # Scrape series list
+        for record in cls._yield_all_list_items(query):
+            item = cls(record['full_title'], record['url'])
+            _groups.setdefault(item.title, []).append(item)
+        return list(_groups.values())
 
     @classmethod
     def get_uniques(cls, query: str) -> List:
@@ -131,14 +171,7 @@ class Series:
         :param query:
         :return:
         """
-        _items = dict()
-        # Scrape series list
-        for item_li in cls._yield_all_list_items(query):
-            item = cls(item_li.find('a'))
-            _item_id = item.title
-            if _item_id not in _items:
-                _items[_item_id] = item
-        return list(_items.values())
+        return [group[0] for group in cls.get_groups(query)]
 
     @classmethod
     def get_all(cls, query: str) -> List:
@@ -147,4 +180,28 @@ class Series:
         :param query:
         :return:
         """
-        return [cls(item_li.find('a')) for item_li in cls._yield_all_list_items(query)]
+        return [cls(record['full_title'], record['url']) for record in cls._yield_all_list_items(query)]
+
+
+# Extraction routines, run in the parsing workers if enabled
+
+@scraping.extractor(version=2)
+def _extract_series_list(markup: str) -> List[dict]:
+    with scraping.released(scraping.parsing.parse(markup, _series_list_spec.strainer)) as soup:
+        return _series_list_spec.extract(soup)
+
+
+@scraping.extractor(version=2)
+def _extract_series(markup: str, full_title: str) -> dict:
+    with scraping.released(scraping.parsing.parse(markup, _series_spec.strainer)) as soup:
+        record = _series_spec.extract_one(soup)
+    episodes = list()
+    if record['box']:
+        for season_string, episode_list in zip(record['box']['seasons'], record['box']['lists']):
+            episodes.extend(SeriesSeasonEpisode.from_record(full_title, season_string, link) for link in episode_list)
+    image_url = next((image['src'] for image in record['images'] if image['alt'] == full_title), None)
+    return dict(
+        image_url=image_url,
+        year=dt.datetime.from_iso(record['date']).year if record['date'] else None,
+        poster_url=record['gallery']['href'] if record['gallery'] else '#',
+        episodes=episodes)
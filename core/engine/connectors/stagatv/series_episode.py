@@ -0,0 +1,112 @@
+from typing import Dict, Optional
+
+from bs4 import SoupStrainer
+
+from ..base import SearchConnector, SearchResult
+from .lib import Series, SeriesSeasonEpisode
+from ...filters import SearchFilters
+from ...budget import SearchBudget
+from ... import scraping
+from ...scraping.selectors import ExtractionSpec, Field
+
+_file_spec = ExtractionSpec(SoupStrainer('div', {'class': 'dl-item'}), file_url=Field(SoupStrainer('a'), attr='href'))
+
+
+@scraping.extractor(version=1)
+def _extract_file_url(markup: str) -> Optional[str]:
+    # Extraction routine, run in the parsing workers if enabled
+    with scraping.released(scraping.parsing.parse(markup, _file_spec.strainer)) as soup:
+        record = _file_spec.extract_one(soup)
+    return record['file_url'] if record else None
+
+
+class StagaTV_SeriesEpisode(SearchConnector):
+
+    media_types = ('series',)
+
+    @classmethod
+    def site_url(cls) -> Optional[str]:
+        return Series._base_url_
+
+    @classmethod
+    def set_site_url(cls, url: str):
+        Series._base_url_ = url
+
+    def __init__(self, poster_url: str, season: dict = None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._poster_url: str = poster_url
+        # Arguments of deferred_items, to list the episodes of the same season
+        self._season: Optional[dict] = season
+
+    def get_content(self) -> dict:
+        return {'title': self._base_title, 'url': self.url, 'details': self._details, 'poster': self._poster_url,
+                'season': self._season}
+
+    @classmethod
+    async def _file_of(cls, episode_url: str) -> (str, Optional[dict]):
+        """ Scrape the file URL of an episode page, and the data to post to resolve it, if found. """
+        # Parsed off the event loop, as the episodes of a batch are resolved concurrently on it
+        file_url = await scraping.get_extracted_async(episode_url, _extract_file_url, encoding=cls.encoding)
+        match = SeriesSeasonEpisode.files_url_pattern.match(file_url) if file_url else None
+        if match:
+            return file_url, {'token': match['data_file'], 'api': '1'}
+        return file_url, None
+
+    @classmethod
+    async def execute_deferred(cls, url: str, data: dict = None, **kwargs) -> dict:
+        if data is None:
+            # Batch item (see deferred_items): the file is on the episode page
+            url, data = await cls._file_of(url)
+            if data is None:
+                return
+        response = (await scraping.post_async(url, data=data)).json()
+        if response:
+            return dict(file_url=response['file'])
+
+    @classmethod
+    def deferred_key(cls, url: str, page: str = None, **kwargs) -> dict:
+        # The episode page, which the player (as page, with the file URL already scraped) and the batch items (as
+        # url) both carry
+        return dict(page=page or url)
+
+    @classmethod
+    def deferred_file_url(cls, result: dict) -> Optional[str]:
+        # The player prepends the files host
+        return SeriesSeasonEpisode.files_dl_base_url + result['file_url']
+
+    @classmethod
+    def deferred_items(cls, url: str, full_title: str, season: Optional[int] = None, **kwargs) -> Dict[str, dict]:
+        """ List the episode pages of a season of a series, by episode details. """
+        series = Series(full_title, url)
+        series.scrape()
+        return {episode.details_string: dict(url=episode.url) for episode in series.get_season_episodes(season)}
+
+    @classmethod
+    async def execute(cls, content: dict):
+        kwargs = dict()
+        file_url, kwargs['data'] = await cls._file_of(content['url'])
+        if kwargs['data'] is None:
+            kwargs['data'] = {}
+            kwargs['error'] = 'Episode file not found'
+        poster = content['poster']
+        return await cls.render_player_deferred(
+            title=content['title'], details=content['details'],
+            url=file_url, page=content['url'], player_poster_url=poster,
+            player_src_base_url=SeriesSeasonEpisode.files_dl_base_url, batch=content.get('season'), **kwargs)
+
+    @classmethod
+    def expand(cls, url: str, full_title: str, season: Optional[int] = None, **kwargs) -> SearchResult:
+        """ List the episodes of a season of a series. """
+        series = Series(full_title, url)
+        series.scrape()
+        season_kwargs = dict(url=url, full_title=full_title, season=season)
+        return SearchResult([
+            cls(original_title=episode.title, details=episode.details_string,
+                base_title=series.title, image_url=series.image_url,
+                poster_url=series.poster_url, season=season_kwargs, url=episode.url)
+            for episode in series.get_season_episodes(season)])
+
+    @classmethod
+    def search(cls, query: str, filters: SearchFilters = None, budget: SearchBudget = None) -> SearchResult:
+        # Episodes are listed by season only (see expand)
+        return SearchResult()
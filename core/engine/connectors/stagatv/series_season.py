@@ -1,69 +1,81 @@
-import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List
+import functools
+from concurrent.futures import as_completed
+from typing import List, Optional
 
 from ..base import SearchConnector, SearchResult
-from .lib import Series, SeriesSeasonEpisode
+from .lib import Series
+from .series_episode import StagaTV_SeriesEpisode
+from ...filters import SearchFilters
+from ...budget import SearchBudget
 from ... import security, scraping
+from ...cache import ContextStore
 
 
-class StagaTV_SeriesSeason(SearchConnector):
+def _series_from_context(query: str, context: Optional[dict]) -> List[Series]:
+    """ Series handed by the parent result of a drill-down, else those of the series list matching the query. """
+    if context and context.get('series'):
+        return [Series.from_record(record) for record in context['series']]
+    return Series.get_all(query)
 
-    def __init__(self, poster_url: str, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._poster_url: str = poster_url
 
-    def get_content(self) -> dict:
-        return {'title': self._base_title, 'url': self.url, 'details': self._details, 'poster': self._poster_url}
+class StagaTV_SeriesSeason(SearchConnector):
+
+    children = [StagaTV_SeriesEpisode]
+    media_types = ('series',)
 
     @classmethod
-    async def execute_deferred(cls, url: str, data: dict, **kwargs) -> dict:
-        response = scraping.post(url, data=data).json()
-        if response:
-            return dict(file_url=response['file'])
+    def site_url(cls) -> Optional[str]:
+        return Series._base_url_
 
     @classmethod
-    async def execute(cls, content: dict):
-        kwargs = dict()
-        soup = scraping.get_soup(content['url'])
-        file_url = soup.find('div', {'class': 'dl-item'}).find('a')['href']
-        match = re.match(SeriesSeasonEpisode.files_base_url_pattern, file_url)
-        if match:
-            token = match['data_file']
-            kwargs['data'] = {'token': token, 'api': '1'}
-        else:
-            kwargs['data'] = {}
-            kwargs['error'] = 'Episode file not found'
-        poster = content['poster']
-        return await cls.render_player_deferred(
-            title=content['title'], details=content['details'],
-            url=file_url, player_poster_url=poster,
-            player_src_base_url=SeriesSeasonEpisode.files_dl_base_url, **kwargs)
+    def set_site_url(cls, url: str):
+        Series._base_url_ = url
+
+    def __init__(self, full_title: str, season_number: Optional[int], *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._full_title: str = full_title
+        self._season_number: Optional[int] = season_number
+
+    @property
+    def link(self) -> str:
+        # The episodes are listed on demand
+        return security.url_for(
+            'expand', u=StagaTV_SeriesEpisode.uid(), url=self.url, full_title=self._full_title,
+            season=self._season_number)
 
     @classmethod
-    def _search_season_episodes(cls, series: Series):
+    def _search_seasons(cls, budget: SearchBudget, series: Series):
         _list = list()
+        if not series.scraped and not budget.take_fetch():
+            return _list
         series.scrape()
-        episodes = series.get_seasons_episodes()
-        # with ThreadPoolExecutor(max_workers=len(episodes)) as p:
-        #     futures = [p.submit(e.scrape) for e in episodes]
-        #     wait(futures)
-        for episode in episodes:
+        for season_number, episodes_count in series.get_seasons().items():
+            season_string = f" S{season_number}" if season_number is not None else ''
             _list.append(cls(
-                original_title=episode.title, details=episode.details_string,
-                base_title=series.title, image_url=series.image_url,
-                poster_url=series.poster_url, url=episode.url))
+                full_title=series.full_title, season_number=season_number,
+                original_title=f"{series.title}{season_string} ({episodes_count} episodes)",
+                image_url=series.image_url, url=series.url))
         return _list
 
     @classmethod
-    def search(cls, query: str) -> SearchResult:
+    def search(cls, query: str, filters: SearchFilters = None, budget: SearchBudget = None,
+               context: dict = None) -> SearchResult:
+        budget = budget or SearchBudget()
         _list = list()
-        series_list = Series.get_all(query)
-        with ThreadPoolExecutor(max_workers=len(series_list)) as executor:
-            futures = [executor.submit(cls._search_season_episodes, s) for s in series_list]
+        series_list = _series_from_context(query, context)
+        if not series_list:
+            return SearchResult()
+        with scraping.ContextExecutor(max_workers=len(series_list)) as executor:
+            futures = [executor.submit(cls._search_seasons, budget, s) for s in series_list]
             for future in as_completed(futures):
                 search_result: List[cls] = future.result()
                 _list += search_result
+                budget.add_main(len(search_result))
+                if budget.is_met:
+                    # Cancel the pending series fetches
+                    for f in futures:
+                        f.cancel()
+                    break
         # Return results
         return SearchResult(_list)
 
@@ -71,17 +83,46 @@ class StagaTV_SeriesSeason(SearchConnector):
 class StagaTV_Series(SearchConnector):
 
     children = [StagaTV_SeriesSeason]
+    media_types = ('series',)
+
+    @classmethod
+    def site_url(cls) -> Optional[str]:
+        return Series._base_url_
+
+    @classmethod
+    def set_site_url(cls, url: str):
+        Series._base_url_ = url
+
+    def __init__(self, series: Series = None, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Scraped series, handed to the drill-down search
+        self._series: Optional[Series] = series
+
+    @functools.cached_property
+    def _context_handle(self) -> Optional[str]:
+        # Stored once per result, however many times it is rendered
+        if self._series:
+            return ContextStore().put(dict(series=[self._series.to_record()]))
 
     @property
     def link(self) -> str:
-        return security.url_for('search', q=self.query_title, u=StagaTV_SeriesSeason.uid())
+        kwargs = dict()
+        if self._context_handle:
+            kwargs['h'] = self._context_handle
+        return security.url_for('search', q=self.query_title, u=StagaTV_SeriesSeason.uid(), **kwargs)
 
     @classmethod
-    def search(cls, query: str) -> SearchResult:
+    def search(cls, query: str, filters: SearchFilters = None, budget: SearchBudget = None,
+               context: dict = None) -> SearchResult:
+        budget = budget or SearchBudget()
         _list = list()
-        for series in Series.get_all(query):  # type: Series
-            series.scrape()
-            item = cls(original_title=series.full_title, image_url=series.image_url)
+        for series in _series_from_context(query, context):  # type: Series
+            if not series.scraped:
+                if not budget.take_fetch():
+                    break
+                series.scrape()
+            item = cls(original_title=series.full_title, image_url=series.image_url, series=series)
             _list.append(item)
+            budget.add_main()
         # Return results
         return SearchResult(_list)
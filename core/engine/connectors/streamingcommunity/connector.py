@@ -1,68 +1,111 @@
 import functools
 import json
 import urllib.parse
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import as_completed
 from typing import List, Optional
 
 from .utils import get_ratio
 from ... import scraping, utils
 from ..base import SearchConnector, SearchResult
+from ...filters import SearchFilters
+from ...budget import SearchBudget
 
 import logging
 LOGGER = logging.getLogger(__name__)
 
 
 class _Series:
+    __slots__ = ('title', 'image_url', 'series_url', 'year', 'media_type')
 
-    def __init__(self, title, image_url: str, series_url: str, year: int):
+    def __init__(self, title, image_url: str, series_url: str, year: int, media_type: Optional[str]):
         self.title = title
         self.image_url = image_url
         self.series_url = series_url
         self.year = year
+        self.media_type = media_type
 
 
 class StreamingCommunity(SearchConnector):
 
     children = []
+    media_types = ('movie', 'series')
+    languages = ('it',)
+    native_filters = ('type',)
+    _record_types = {'movie': 'movie', 'tv': 'series'}
 
     _base_url_ = "https://streamingcommunity.blue"
-    _base_titles_url_ = f"{_base_url_}/titles"
+
+    @staticmethod
+    def _pseudo_title(record: dict) -> str:
+        return ' '.join(x.title() for x in record['slug'].split('-'))
+
+    @classmethod
+    def _series_url(cls, record: dict) -> str:
+        # Built on the current mirror of the site
+        return f"{cls._base_url_}/titles/{record['id']}-{record['slug']}"
 
     @classmethod
-    def _unpack(cls, query: str, record: dict):
-        pseudo_title = ' '.join(x.title() for x in record['slug'].split('-'))
-        if utils.check_in(query, pseudo_title):
-            resource = f"{record['id']}-{record['slug']}"
+    def catalog_page(cls, page: int) -> Optional[List[dict]]:
+        response = scraping.get(f"{cls._base_url_}/archivio?page={page}")
+        records_json = scraping.extract_attribute(
+            response.content, None, 'records-json', encoding=scraping.encoding_of(response, cls.encoding))
+        if not records_json:
+            return []
+        return [dict(original_title=record.get('name') or cls._pseudo_title(record),
+                     url=cls._series_url(record),
+                     image_url=next((image['sc_url'] for image in record.get('images', [])), None),
+                     lang='it', media_type=cls._record_types.get(record.get('type')))
+                for record in json.loads(records_json)]
+
+    @classmethod
+    def _unpack(cls, query: str, filters: Optional[SearchFilters], budget: SearchBudget, record: dict):
+        # Skip the records of other media types before fetching their details
+        record_type = cls._record_types.get(record.get('type'))
+        if filters and filters.type and record_type and record_type != filters.type:
+            return
+        pseudo_title = cls._pseudo_title(record)
+        if utils.check_in(query, pseudo_title) and budget.take_fetch():
             image_ratios = {image['sc_url']: get_ratio(image['sc_url']) for image in record['images']}
             image_url = min(image_ratios, key=image_ratios.get)
-            series_url = f"{cls._base_titles_url_}/{resource}"
-            series_soup = scraping.get_soup(series_url)
-            original_title = series_soup.find('h1', {'class': 'title'}).text
-            info = series_soup.find('div', {'class': 'info-span'})
-            year = int(info.find('span', {'class': 'desc'}).text.split(' ')[0])
-            return _Series(original_title, image_url, series_url, year)
+            series_url = cls._series_url(record)
+            series_soup = scraping.get_soup(series_url, encoding=cls.encoding, min_ttl=cls.cache_ttl)
+            with scraping.released(series_soup):
+                original_title = series_soup.find('h1', {'class': 'title'}).text
+                info = series_soup.find('div', {'class': 'info-span'})
+                year = int(info.find('span', {'class': 'desc'}).text.split(' ')[0])
+            return _Series(original_title, image_url, series_url, year, record_type)
 
     @classmethod
-    def search(cls, query: str) -> Optional[SearchResult]:
+    def search(cls, query: str, filters: SearchFilters = None, budget: SearchBudget = None) -> Optional[SearchResult]:
         """
         Search series-groups on StagaTV and return links to search a StagaTV_Series.
         """
+        budget = budget or SearchBudget()
         # Scrape series list
         url = f"{cls._base_url_}/search?q={urllib.parse.quote(query)}"
-        soup = scraping.get_soup(url)
-        search_result = soup.find('the-search-page')
-        if not search_result:
+        response = scraping.get(url)
+        records_json = scraping.extract_attribute(
+            response.content, 'the-search-page', 'records-json', encoding=scraping.encoding_of(response, cls.encoding))
+        if not records_json:
             return
-        records = json.loads(search_result['records-json'])
+        records = json.loads(records_json)
         item_list: List[StreamingCommunity] = list()
-        partial = functools.partial(cls._unpack, query)
-        with ThreadPoolExecutor(5) as p:
-            for series in p.map(partial, records):
+        partial = functools.partial(cls._unpack, query, filters, budget)
+        with scraping.ContextExecutor(5) as p:
+            futures = [p.submit(partial, record) for record in records]
+            for future in as_completed(futures):
+                series = future.result()
                 if series:
                     item_list.append(cls(
                         original_title=series.title, url=series.series_url,
-                        image_url=series.image_url, year=series.year, lang='it'
+                        image_url=series.image_url, year=series.year, lang='it', media_type=series.media_type
                     ))
+                    budget.add_main()
+                if budget.is_met:
+                    # Cancel the pending detail fetches
+                    for f in futures:
+                        f.cancel()
+                    break
         # Return results
         return SearchResult(item_list)
 
@@ -1,46 +1,75 @@
 from typing import Optional, List
 
+from bs4 import SoupStrainer
+
 from ..connector import SuperVideo
 from ...base import SearchConnector
 from .... import scraping
+from ....scraping.selectors import ExtractionSpec, Field
+from ....budget import SearchBudget
+
+_details_spec = ExtractionSpec(
+    SoupStrainer('li'), SoupStrainer('ul', {'id': 'details'}),
+    label=Field(SoupStrainer('label')),
+    span=Field(SoupStrainer('span'), spec=ExtractionSpec(
+        id=Field(None, attr='id'), value=Field(None, attr='data-value'), names=Field(SoupStrainer('a'), many=True))),
+    link=Field(SoupStrainer('a')),
+    text=Field(None))
+
+
+@scraping.extractor(version=2)
+def _extract_details(markup: str) -> dict:
+    # Extraction routine, run in the parsing workers if enabled
+    with scraping.released(scraping.parsing.parse(markup, _details_spec.strainer)) as soup:
+        return AltaDefinizione.extract_item_details(_details_spec.extract(soup))
 
 
 class AltaDefinizione(SuperVideo):
 
     _base_url_ = 'https://altadefinizione.navy'
+    # Film detail pages rarely change
+    cache_ttl = 24 * 3600
+    media_types = ('movie',)
 
     @classmethod
     def _get_wrappers(cls, soup) -> List:
         return soup.find_all('div', 'wrapperImage')
 
     @staticmethod
-    def _extract_item_details(item_soup):
+    def extract_item_details(rows: List[dict]) -> dict:
+        """
+        Details of a film by label, from the rows of its details list.
+        :param rows: Rows extracted by the details spec.
+        """
         details = {}
-        for li in item_soup.find('ul', {'id': 'details'}).find_all('li'):
-            label = li.find('label')
-            key = label.text.split(':')[0].strip()
-            span = li.find('span')
+        for row in rows:
+            key = row['label'].split(':')[0].strip()
+            span = row['span']
             if span:
                 if span['id'] == 'staring':
-                    value = [a.text for a in span.find_all('a')]
+                    value = span['names']
                 else:
-                    value = span.attrs['data-value']
+                    value = span['value']
+            elif row['link'] is not None:
+                value = row['link']
             else:
-                a = li.find('a')
-                if a:
-                    value = a.text
-                else:
-                    value = int(li.text.split('\n')[-1])
+                value = int(row['text'].split('\n')[-1])
             details[key] = value
         return details
 
     @classmethod
-    def _scrape_item(cls, wrapper) -> Optional[SearchConnector]:
+    def _catalog_record(cls, wrapper) -> Optional[dict]:
         a = wrapper.find('a')
         image_url = a.find('img').attrs['src']
         item_url = a.attrs['href']
         title = wrapper.find('div', {'class': 'info'}).find('h2', {'class': 'titleFilm'}).find('a').text
-        item_soup = scraping.get_soup(item_url)
-        details = cls._extract_item_details(item_soup)
+        return dict(original_title=title, url=item_url, image_url=image_url, lang='it')
+
+    @classmethod
+    def _scrape_item(cls, wrapper, budget: SearchBudget = None) -> Optional[SearchConnector]:
+        record = cls._catalog_record(wrapper)
+        if budget and not budget.take_fetch():
+            return
+        details = scraping.get_extracted(record['url'], _extract_details, encoding=cls.encoding, min_ttl=cls.cache_ttl)
         year = details['Anno']
-        return cls(original_title=title, url=item_url, image_url=image_url, year=year, lang='it')
+        return cls(year=year, **record)
@@ -1,19 +1,25 @@
+import re
 from typing import Optional, List
 
 from ..connector import SuperVideo
 from ...base import SearchConnector
+from ....budget import SearchBudget
+
+
+_series_url_pattern = re.compile(r"/serie-?tv/", re.IGNORECASE)
 
 
 class Cb01(SuperVideo):
 
     _base_url_ = 'https://cb01.taxi'
+    media_types = ('movie', 'series')
 
     @classmethod
     def _get_wrappers(cls, soup) -> List:
         return soup.find_all('div', {'class': 'mp-post'})
 
     @classmethod
-    def _scrape_item(cls, wrapper) -> Optional[SearchConnector]:
+    def _scrape_item(cls, wrapper, budget: SearchBudget = None) -> Optional[SearchConnector]:
         a = wrapper.find('a')
         image = a.find('img')
         image_url = image.attrs['src']
@@ -22,4 +28,7 @@ class Cb01(SuperVideo):
         split = original_title.split('(')
         title = split[0]
         year = split[1].replace(')', '')
-        return cls(original_title=title, url=item_url, image_url=image_url, year=year, lang='it')
\ No newline at end of file
+        # The series are published under their own section of the site
+        media_type = 'series' if _series_url_pattern.search(item_url) else 'movie'
+        return cls(original_title=title, url=item_url, image_url=image_url, year=year, lang='it',
+                   media_type=media_type)
\ No newline at end of file
@@ -1,13 +1,34 @@
 import abc
-from typing import Optional, Tuple, Union, List
+import re
+from typing import Optional, List
+
+from bs4 import SoupStrainer
 
 from ... import utils, scraping
+from ...scraping.selectors import ExtractionSpec, Field
 from ..base import SearchConnector, SearchResult
+from ...filters import SearchFilters
+from ...budget import SearchBudget
+
+_trusted_player = re.compile(re.escape('supervideo.tv'))
+_player_spec = ExtractionSpec(
+    data_target=Field(SoupStrainer(['a', 'li'], {'data-target': _trusted_player}), attr='data-target', many=True),
+    data_link=Field(SoupStrainer(['a', 'li'], {'data-link': _trusted_player}), attr='data-link', many=True),
+    iframes=Field(SoupStrainer('iframe', {'src': True}), attr='src', many=True)
+)
+
+
+@scraping.extractor(version=2)
+def _extract_player(markup: str) -> dict:
+    # Extraction routine, run in the parsing workers if enabled
+    with scraping.released(scraping.parsing.parse(markup, _player_spec.strainer)) as soup:
+        return _player_spec.extract_one(soup)
 
 
 class SuperVideo(SearchConnector):
 
     _base_url_ = 'https://cb01.taxi'
+    languages = ('it',)
 
     @property
     def src(self):
@@ -15,45 +36,36 @@ class SuperVideo(SearchConnector):
 
     @classmethod
     async def execute(cls, content: dict):
-        soup = scraping.get_soup(content['url'])
-        partials, key = cls._find_in_soup(soup)
+        record = await scraping.get_extracted_async(
+            content['url'], _extract_player, encoding=cls.encoding, min_ttl=cls.cache_ttl)
+        link = cls._find_player_link(record)
         for frame_name in ['guardahd', 'altaqualita/player']:
-            if partials:
+            if link:
                 break
-            partials, key = cls._find_in_frame(soup, frame_name)
-        if partials:
-            if key:
-                p = partials[0].attrs[key]
-                if p.startswith('//'):
-                    p = f"https:{p}"
-            else:
-                p = partials
-            return cls.new_tab(p)
+            link = await cls._find_in_frame(record, frame_name)
+        if link:
+            if link.startswith('//'):
+                link = f"https:{link}"
+            return cls.new_tab(link)
 
     @classmethod
-    def _find_in_soup(cls, soup, trusted: str = 'supervideo.tv') -> (list, str):
-        tags = ["a", "li"]
-        k = "data-target"
-        partials = soup.findAll(lambda tag: tag.name in tags and tag.get(k) and trusted in tag.get(k))
-        if partials:
-            return partials, k
-        k = "data-link"
-        partials = soup.findAll(lambda tag: tag.name in tags and tag.get(k) and trusted in tag.get(k))
-        return partials, k
+    def _find_player_link(cls, record: dict) -> Optional[str]:
+        links = record['data_target'] or record['data_link']
+        if links:
+            return links[0]
 
     @classmethod
-    def _find_in_frame(cls, soup, trusted: str) -> Tuple[Optional[Union[list, str]], Optional[str]]:
-        iframes = soup.findAll(lambda tag: tag.name == "iframe" and trusted in tag['src'])
-        if iframes:
-            src = iframes[0].attrs['src']
+    async def _find_in_frame(cls, record: dict, trusted: str) -> Optional[str]:
+        src = next((s for s in record['iframes'] if trusted in s), None)
+        if src:
             if src.startswith('/'):
-                return f"{cls._base_url_}{src}", None
-            return cls._find_in_soup(scraping.get_soup(src))
-        return None, None
+                return f"{cls._base_url_}{src}"
+            return cls._find_player_link(
+                await scraping.get_extracted_async(src, _extract_player, encoding=cls.encoding))
 
     @classmethod
     @abc.abstractmethod
-    def _scrape_item(cls, wrapper) -> Optional[SearchConnector]:
+    def _scrape_item(cls, wrapper, budget: SearchBudget = None) -> Optional[SearchConnector]:
         return
 
     @classmethod
@@ -62,26 +74,41 @@ class SuperVideo(SearchConnector):
         return list()
 
     @classmethod
-    def _do_search(cls, query: str, title_only: bool) -> SearchResult:
+    def _catalog_record(cls, wrapper) -> Optional[dict]:
+        item = cls._scrape_item(wrapper)
+        return item and item.catalog_record()
+
+    @classmethod
+    def catalog_page(cls, page: int) -> Optional[List[dict]]:
+        with scraping.released(scraping.get_soup(f"{cls._base_url_}/page/{page}/", encoding=cls.encoding)) as soup:
+            return [r for r in map(cls._catalog_record, cls._get_wrappers(soup)) if r]
+
+    @classmethod
+    def _do_search(cls, query: str, title_only: bool, budget: SearchBudget) -> SearchResult:
         main_list = []
         secondary_list = []
         url = f"{cls._base_url_}/index.php?do=search"
         form = {'do': 'search', 'subaction': 'search', 'story': query}
         if title_only:
             form['titleonly'] = 3
-        soup = scraping.post_soup(url, data=form)
-        for wrapper in cls._get_wrappers(soup):
-            item = cls._scrape_item(wrapper)
-            if item:
-                if utils.check_in(query, item.title):
-                    main_list.append(item)
-                else:
-                    secondary_list.append(item)
+        with scraping.released(scraping.post_soup(url, data=form, encoding=cls.encoding)) as soup:
+            for wrapper in cls._get_wrappers(soup):
+                if budget.is_met:
+                    break
+                item = cls._scrape_item(wrapper, budget)
+                if item:
+                    if utils.check_in(query, item.title):
+                        main_list.append(item)
+                        budget.add_main()
+                    else:
+                        secondary_list.append(item)
         return SearchResult(main_list, secondary_list)
 
     @classmethod
-    def search(cls, query: str) -> Optional[SearchResult]:
-        result = cls._do_search(query, title_only=True)
-        no_title_result = cls._do_search(query, title_only=False)
-        result.merge(no_title_result)
+    def search(cls, query: str, filters: SearchFilters = None, budget: SearchBudget = None) -> Optional[SearchResult]:
+        budget = budget or SearchBudget()
+        result = cls._do_search(query, title_only=True, budget=budget)
+        if not budget.is_met:
+            no_title_result = cls._do_search(query, title_only=False, budget=budget)
+            result.merge(no_title_result)
         return result
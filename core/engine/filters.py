@@ -0,0 +1,75 @@
+from typing import Optional, Tuple, Iterable
+
+
+class SearchFilters:
+    """
+    Structured filters of a search. Connectors declare the media types and languages they serve, and which
+    filters they apply natively; the remaining filters are applied locally on their results.
+    """
+    TYPES = ('movie', 'series', 'anime')
+    FIELDS = ('year', 'type', 'lang')
+
+    def __init__(self, year: int = None, type_: str = None, lang: str = None):
+        if type_ is not None and type_ not in self.TYPES:
+            raise ValueError(f"Invalid media type: {type_}.")
+        self.year: Optional[int] = year
+        self.type: Optional[str] = type_
+        self.lang: Optional[str] = lang
+
+    def __bool__(self):
+        return any(v is not None for v in self.key)
+
+    def __repr__(self):
+        return ', '.join(f"{k}={v}" for k, v in zip(self.FIELDS, self.key) if v is not None)
+
+    @property
+    def key(self) -> Tuple:
+        return self.year, self.type, self.lang
+
+    @classmethod
+    def from_key(cls, key: Optional[Tuple]):
+        return cls(*key) if key else cls()
+
+    @classmethod
+    def from_args(cls, args):
+        """ Parse the filters from request arguments, ignoring invalid values. """
+        year = args.get('year', type=int)
+        type_ = args.get('type') or None
+        return cls(year=year, type_=type_ if type_ in cls.TYPES else None, lang=args.get('lang') or None)
+
+    def accepts(self, connector) -> bool:
+        """ Check whether a connector can serve results for these filters. """
+        if self.type and connector.media_types and self.type not in connector.media_types:
+            return False
+        if self.lang and self.lang not in connector.languages:
+            return False
+        return True
+
+    def match(self, item, native: Iterable[str] = ()) -> bool:
+        """ Check whether a result item matches the filters not already applied natively by its connector. """
+        # The items which year is unknown cannot honour the filter
+        if self.year is not None and 'year' not in native:
+            try:
+                if int(item.year) != self.year:
+                    return False
+            except (TypeError, ValueError):
+                return False
+        # The items which type is unknown cannot honour the filter
+        if self.type is not None and 'type' not in native and item.media_type != self.type:
+            return False
+        if self.lang is not None and 'lang' not in native and item.lang != self.lang:
+            return False
+        return True
+
+    def apply(self, result, native: Iterable[str] = ()):
+        """
+        Filter a search result locally.
+        :type result: SearchResult
+        :rtype SearchResult
+        """
+        if not self or not result:
+            return result
+        native = tuple(native)
+        main = [x for x in result.main.values() if self.match(x, native)]
+        secondary = [x for x in result.secondary.values() if self.match(x, native)]
+        return result.__class__(main, secondary)
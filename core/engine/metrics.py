@@ -0,0 +1,37 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Union
+
+from iotech.utils.classes import Singleton
+
+Number = Union[int, float]
+
+
+@Singleton
+class Metrics:
+    """
+    In-process registry of the engine counters and gauges, optionally split by a label (e.g. connector or host).
+    """
+
+    def __init__(self):
+        self._values: Dict[str, Dict[str, Number]] = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def incr(self, name: str, value: Number = 1, label: str = ''):
+        with self._lock:
+            series = self._values[name]
+            series[label] = series.get(label, 0) + value
+
+    def set(self, name: str, value: Number, label: str = ''):
+        with self._lock:
+            self._values[name][label] = value
+
+    def get(self, name: str, label: str = '') -> Number:
+        with self._lock:
+            return self._values.get(name, {}).get(label, 0)
+
+    def snapshot(self) -> dict:
+        """ Current values by name; values split by label are nested by label. """
+        with self._lock:
+            return {name: series.get('') if list(series) == [''] else dict(series)
+                    for name, series in sorted(self._values.items())}
@@ -0,0 +1,47 @@
+import math
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from . import configs
+
+
+class QueryPopularity:
+    """
+    Decaying popularity counter of the searches: each hit adds one to the score of the search key, while
+    the score halves every half-life period.
+    """
+
+    def __init__(self, half_life: float = None, max_entries: int = 1024):
+        self._half_life: float = half_life or configs.ENGINE_POPULARITY_HALF_LIFE.get()
+        self._max_entries: int = max_entries
+        self._scores: Dict[Tuple, Tuple[float, float]] = dict()
+        self._lock = threading.Lock()
+
+    def _decayed(self, score: float, t: float, now: float) -> float:
+        return score * math.pow(2, -(now - t) / self._half_life)
+
+    def hit(self, key: Tuple):
+        now = time.time()
+        with self._lock:
+            score, t = self._scores.get(key, (0., now))
+            self._scores[key] = (self._decayed(score, t, now) + 1, now)
+            if len(self._scores) > self._max_entries:
+                # Drop the least popular half of the entries
+                ranked = sorted(self._scores, key=lambda k: self._decayed(*self._scores[k], now))
+                for k in ranked[:len(ranked) // 2]:
+                    del self._scores[k]
+
+    def top(self, n: int, min_score: float = 0., hit_since: float = 0.) -> List[Tuple]:
+        """
+        Get the most popular search keys, most popular first, dropping those decayed below min_score since hit_since.
+        :param min_score: Minimum decayed score of the keys.
+        :param hit_since: (optional) Time of the oldest last hit of the keys.
+        """
+        now = time.time()
+        with self._lock:
+            scores = {k: self._decayed(s, t, now) for k, (s, t) in self._scores.items()}
+            for k in [k for k, score in scores.items() if score < min_score and self._scores[k][1] < hit_since]:
+                del self._scores[k]
+        keys = [k for k, score in scores.items() if score >= min_score and self._scores.get(k, (0, 0))[1] >= hit_since]
+        return sorted(keys, key=scores.get, reverse=True)[:n]
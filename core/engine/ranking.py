@@ -0,0 +1,85 @@
+import re
+import unicodedata
+from typing import Iterable, List, Optional, Tuple, FrozenSet
+
+_articles = frozenset({'il', 'lo', 'la', 'i', 'gli', 'le', 'l', 'un', 'uno', 'una'})
+_year_pattern = re.compile(r"^(19|20)\d{2}$")
+_non_word_pattern = re.compile(r"[\W_]+")
+
+# Score weights
+_TOKENS_WEIGHT = 0.5
+_TRIGRAMS_WEIGHT = 0.3
+_CONTAINS_WEIGHT = 0.1
+_YEAR_WEIGHT = 0.1
+
+
+def normalize(title: str) -> str:
+    """ Normalize a title for comparison: accents folding, no punctuation, lowercase and no Italian articles. """
+    folded = unicodedata.normalize('NFKD', title or '')
+    folded = ''.join(c for c in folded if not unicodedata.combining(c))
+    tokens = _non_word_pattern.sub(' ', folded.lower()).split()
+    return ' '.join(t for t in tokens if t not in _articles) or ' '.join(tokens)
+
+
+def _trigrams(string: str) -> FrozenSet[str]:
+    padded = f"  {string} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _to_year(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RankedTitle:
+    """ Normalized forms of a title, computed once and reused for every ranking. """
+    __slots__ = ('normalized', 'tokens', 'trigrams', 'year')
+
+    def __init__(self, title: str, year=None):
+        self.normalized: str = normalize(title)
+        self.tokens: FrozenSet[str] = frozenset(self.normalized.split())
+        self.trigrams: FrozenSet[str] = _trigrams(self.normalized)
+        self.year: Optional[int] = _to_year(year)
+
+
+class RankedQuery(RankedTitle):
+    """ Normalized forms of a query; a trailing year in the query is used as the target year. """
+
+    def __init__(self, query: str, year: int = None):
+        tokens = normalize(query).split()
+        if year is None and len(tokens) > 1 and _year_pattern.match(tokens[-1]):
+            year = tokens.pop()
+        super().__init__(' '.join(tokens), year)
+
+
+def score(query: RankedQuery, title: RankedTitle) -> float:
+    if not query.tokens:
+        return 0.
+    # Fraction of the query tokens found (or prefixing a token) in the title
+    matched = sum(1 for q in query.tokens if q in title.tokens or any(t.startswith(q) for t in title.tokens))
+    value = _TOKENS_WEIGHT * matched / len(query.tokens)
+    # Trigram similarity
+    union = len(query.trigrams | title.trigrams)
+    if union:
+        value += _TRIGRAMS_WEIGHT * len(query.trigrams & title.trigrams) / union
+    if query.normalized in title.normalized:
+        value += _CONTAINS_WEIGHT
+    # Year proximity
+    if query.year is not None and title.year is not None:
+        value += _YEAR_WEIGHT / (1 + abs(query.year - title.year))
+    return value
+
+
+def rank(query: RankedQuery, items: Iterable, key=lambda item: item.ranked_title) -> List[Tuple[float, object]]:
+    """
+    Score all the items against the query in a single pass.
+    :param query: The ranked query.
+    :param items: Items to rank.
+    :param key: (optional) Function to get the RankedTitle of an item.
+    :return: List of (score, item), best first.
+    """
+    scored = [(score(query, key(item)), item) for item in items]
+    scored.sort(key=lambda x: (-x[0], key(x[1]).normalized))
+    return scored
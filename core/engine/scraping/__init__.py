@@ -0,0 +1,260 @@
+import asyncio
+import contextlib
+import functools
+import re
+import threading
+import time
+from typing import Callable, Dict, Iterator, Optional, TypeVar
+
+import bs4
+import cloudscraper
+import requests
+
+from .. import configs
+from ..cache.http import HttpCache
+from . import parsing, memo, warc, mirrors, transfer, resolver
+from .limits import HostLimits
+from .retry import RetryPolicy
+from .scheduler import RequestScheduler, ContextExecutor, scheduling, INTERACTIVE, BACKGROUND
+from .clearance import ClearanceStore
+from .memo import extractor
+from .attributes import extract_attribute
+
+import logging
+LOGGER = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+_CHUNK_SIZE = 64 * 1024
+_charset_pattern = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+
+
+class ResponseTooLarge(Exception):
+    pass
+
+
+def _read(response: requests.Response, max_bytes: int = None) -> requests.Response:
+    # Stream the body, stopping as soon as it exceeds the size cap
+    max_bytes = max_bytes or configs.ENGINE_MAX_BODY_SIZE.get()
+    content_length = response.headers.get('Content-Length')
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        response.close()
+        raise ResponseTooLarge(f"{response.url}: {content_length} bytes exceed the cap of {max_bytes}")
+    chunks = []
+    size = 0
+    # The cap applies to the decompressed body
+    for chunk in transfer.decode_stream(response, _CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            response.close()
+            raise ResponseTooLarge(f"{response.url}: body exceeds the cap of {max_bytes} bytes")
+        chunks.append(chunk)
+    # noinspection PyProtectedMember
+    response._content = b''.join(chunks)
+    transfer.record(transfer.wire_size(response, size), size)
+    warc.archive(response)
+    return response
+
+
+# Transport adapters shared by all the sessions, by cloud flag, scheme and TLS profile of the scrapers (their
+# adapters handshake with the cipher suite and curve of the browser they impersonate)
+_adapters: Dict[tuple, requests.adapters.BaseAdapter] = dict()
+_adapters_lock = threading.Lock()
+
+
+def _session(cloud: bool) -> requests.Session:
+    session = cloudscraper.create_scraper() if cloud else requests.Session()
+    # Share the connection pools between the sessions, so that connections are kept alive across requests
+    with _adapters_lock:
+        for prefix in ('https://', 'http://'):
+            key = (cloud, prefix, getattr(session, 'cipherSuite', None), getattr(session, 'ecdhCurve', None))
+            if key not in _adapters:
+                # Resolve the hosts through the in-process DNS cache
+                _adapters[key] = resolver.mount(session.get_adapter(prefix))
+            session.mount(prefix, _adapters[key])
+    # Record or replay the traffic if enabled
+    return warc.mount(session)
+
+
+def warm_up(url: str, cloud: bool = True):
+    """ Open a keep-alive connection to a site and solve its challenge, if any, bypassing the HTTP cache. """
+    _read(_get(url, cloud))
+
+
+def _send(method: str, url: str, cloud: bool, *args, headers: dict = None, **kwargs) -> requests.Response:
+    # Negotiate the best compression; zstd is decoded by _read only, so not where urllib3 reads the body itself:
+    # the challenge pages in the scraper
+    headers = {'Accept-Encoding': transfer.accept_encoding(zstd=not cloud), **(headers or {})}
+    kwargs['headers'] = headers
+    if not cloud:
+        return _session(cloud).request(method, url, *args, verify=False, stream=True, **kwargs)
+    # Reuse the Cloudflare clearance of the host, solving it once if missing
+    return ClearanceStore().request(_session(cloud), method, url, *args, stream=True, **kwargs)
+
+
+def _timed_send(record_latency: Callable[[float], None], method: str, url: str, cloud: bool, *args,
+                **kwargs) -> requests.Response:
+    # Time to the response headers, on the wire only
+    start = time.perf_counter()
+    response = _send(method, url, cloud, *args, **kwargs)
+    record_latency(time.perf_counter() - start)
+    return response
+
+
+def _request(method: str, url: str, cloud: bool, *args, record_latency: Callable[[float], None] = None,
+             **kwargs) -> requests.Response:
+    """
+    Send a request, within the concurrency limits.
+    :param record_latency: (optional) Function receiving the seconds the request took on the wire, without the
+    time it waited for the limits.
+    """
+    send = functools.partial(_timed_send, record_latency) if record_latency else _send
+    if warc.bypass():
+        return send(method, url, cloud, *args, **kwargs)
+    # Adapt the concurrency to the rate limits of each host, within the global budget of the requests
+    return HostLimits().send(url, lambda: RequestScheduler().send(lambda: send(method, url, cloud, *args, **kwargs)))
+
+
+def _get(url: str, cloud: bool = True, *args, retry: bool = True, **kwargs) -> requests.Response:
+    mirror_set = mirrors.MirrorRegistry().find(url)
+    if mirror_set is None or warc.bypass():
+        send = functools.partial(_request, 'GET', url, cloud, *args, **kwargs)
+    else:
+        # Hedge the slow requests to the sites with mirrors, and move the ones to dead mirrors
+        send = functools.partial(mirror_set.send, url, lambda mirror_url, record_latency: _request(
+            'GET', mirror_url, cloud, *args, record_latency=record_latency, **kwargs))
+    retry = retry and not warc.bypass()
+    return RetryPolicy(retries=None if retry else 0).call('GET', url, send)
+
+
+def get(url: str, cloud: bool = True, *args, max_bytes: int = None, min_ttl: int = 0, retry: bool = True,
+        **kwargs) -> requests.Response:
+    """
+    GET a page, through the on-disk HTTP cache if enabled (http_cache).
+    :param min_ttl: (optional) Minimum seconds to reuse the cached page, overriding the server's freshness.
+    :param retry: (optional) Whether to retry the transient failures, blocking the thread during the backoff.
+    """
+    # Recorded traffic bypasses the cache, so that every page is archived
+    if not configs.ENGINE_HTTP_CACHE.get() or warc.mode() == warc.RECORD or warc.bypass():
+        return _read(_get(url, cloud, *args, retry=retry, **kwargs), max_bytes)
+    cache = HttpCache()
+    key = cache.make_key(url, kwargs.get('params'))
+    entry = cache.lookup(key)
+    if entry and entry.is_fresh:
+        response = cache.to_response(entry)
+        if response is not None:
+            return response
+    if entry and entry.validators:
+        # Conditional revalidation of the stale page
+        kwargs['headers'] = {**(kwargs.get('headers') or {}), **entry.validators}
+    response = _get(url, cloud, *args, retry=retry, **kwargs)
+    if entry and response.status_code == 304:
+        response.close()
+        cached_response = cache.to_response(entry)
+        if cached_response is not None:
+            cache.revalidated(entry, response, min_ttl)
+            return cached_response
+        # The cached body is lost: fetch the page again
+        kwargs['headers'] = {k: v for k, v in kwargs['headers'].items() if k not in entry.validators}
+        response = _get(url, cloud, *args, retry=retry, **kwargs)
+    response = _read(response, max_bytes)
+    cache.store(key, response, min_ttl)
+    return response
+
+
+async def get_async(url: str, *args, **kwargs) -> requests.Response:
+    """
+    GET a page from a coroutine (see get): the request runs in a thread, and the backoff between the retries
+    waits on the event loop.
+    """
+    return await RetryPolicy().acall('GET', url, lambda: asyncio.to_thread(get, url, *args, retry=False, **kwargs))
+
+
+def post(url: str, cloud: bool = True, *args, max_bytes: int = None, **kwargs) -> requests.Response:
+    return _read(_request('POST', url, cloud, *args, **kwargs), max_bytes)
+
+
+async def post_async(url: str, *args, **kwargs) -> requests.Response:
+    """ POST from a coroutine (see post): the request runs in a thread, so that concurrent ones overlap. """
+    return await asyncio.to_thread(post, url, *args, **kwargs)
+
+
+def is_available(url: str, cloud: bool = False, timeout: float = 10., **kwargs) -> bool:
+    """
+    Whether a resource is still served, without downloading it: HEAD, or a GET of its first byte where HEAD is
+    not allowed. Connection errors are raised, as they tell nothing about the resource.
+    """
+    response = _request('HEAD', url, cloud, allow_redirects=True, timeout=timeout, **kwargs)
+    response.close()
+    if response.status_code in (405, 501):
+        response = _request('GET', url, cloud, headers={'Range': 'bytes=0-0'}, timeout=timeout, **kwargs)
+        response.close()
+    return response.status_code < 400
+
+
+def encoding_of(response: requests.Response, encoding: str = None) -> str:
+    """ Encoding of a response: the one expected for the site, else the declared charset, else UTF-8 (no sniffing). """
+    if encoding:
+        return encoding
+    match = _charset_pattern.search(response.headers.get('Content-Type', ''))
+    return match[1] if match else 'utf-8'
+
+
+def decode(response: requests.Response, encoding: str = None) -> str:
+    """ Decode the raw body of a response once (see encoding_of). """
+    try:
+        return response.content.decode(encoding_of(response, encoding), errors='replace')
+    except LookupError:
+        LOGGER.debug(f"{response.url}: unknown encoding, decoding as UTF-8")
+        return response.content.decode('utf-8', errors='replace')
+
+
+def get_soup(url: str, *args, encoding: str = None, **kwargs) -> bs4.BeautifulSoup:
+    return parsing.parse(decode(get(url, *args, **kwargs), encoding))
+
+
+async def get_soup_async(url: str, *args, encoding: str = None, **kwargs) -> bs4.BeautifulSoup:
+    """ Fetch and parse a page from a coroutine (see get_async): the parse runs in a thread, off the event loop. """
+    response = await get_async(url, *args, **kwargs)
+    return await asyncio.to_thread(lambda: parsing.parse(decode(response, encoding)))
+
+
+def post_soup(url: str, *args, encoding: str = None, **kwargs) -> bs4.BeautifulSoup:
+    return parsing.parse(decode(post(url, *args, **kwargs), encoding))
+
+
+def get_extracted(url: str, extractor: Callable[..., T], *args, encoding: str = None, **kwargs) -> T:
+    """
+    Fetch a page and run an extraction routine on its decoded markup (see parsing.run).
+    :param url: URL of the page.
+    :param extractor: Module-level function taking the markup and the args, and returning compact records.
+    :param args: Additional arguments of the extractor.
+    :param encoding: (optional) Encoding expected for the site (see encoding_of).
+    :param kwargs: Arguments of the request.
+    """
+    return _extract(get(url, **kwargs), extractor, args, encoding)
+
+
+async def get_extracted_async(url: str, extractor: Callable[..., T], *args, encoding: str = None, **kwargs) -> T:
+    """ Fetch a page and extract its records from a coroutine (see get_extracted and get_async). """
+    response = await get_async(url, **kwargs)
+    return await asyncio.to_thread(_extract, response, extractor, args, encoding)
+
+
+def _extract(response: requests.Response, extractor: Callable[..., T], args: tuple, encoding: str = None) -> T:
+    encoding = encoding_of(response, encoding)
+    # Unchanged pages reuse the records already extracted from them
+    key = memo.make_key(extractor, response.content, encoding, args)
+    return memo.ParseMemo().run(key, lambda: parsing.run(extractor, decode(response, encoding), *args))
+
+
+@contextlib.contextmanager
+def released(soup: bs4.BeautifulSoup) -> Iterator[bs4.BeautifulSoup]:
+    """
+    Decompose a tree as soon as the data is pulled out of it.
+    Values extracted within the block must be plain strings, not nodes, since nodes reference the whole document.
+    """
+    try:
+        yield soup
+    finally:
+        soup.decompose()
@@ -0,0 +1,54 @@
+import functools
+import html
+import re
+from typing import Optional
+
+import bs4
+
+import logging
+LOGGER = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=None)
+def _pattern(tag: Optional[str], attribute: str) -> re.Pattern:
+    tag_name = re.escape(tag) if tag else rb'[\w-]+'
+    if isinstance(tag_name, str):
+        tag_name = tag_name.encode()
+    # The attribute name starts after a space or the closing quote of the previous value, not within a longer name
+    # (e.g. records in data-records)
+    return re.compile(
+        rb'<' + tag_name + rb'\s(?:[^>"\']|"[^"]*"|\'[^\']*\')*?(?<=[\s"\'])' + re.escape(attribute).encode()
+        + rb'\s*=\s*(?:"(?P<dq>[^"]*)"|\'(?P<sq>[^\']*)\')', re.IGNORECASE)
+
+
+def _fast_extract(body: bytes, tag: Optional[str], attribute: str, encoding: str) -> Optional[str]:
+    match = _pattern(tag, attribute).search(body)
+    if not match:
+        return
+    value = match['dq'] if match['dq'] is not None else match['sq']
+    return html.unescape(value.decode(encoding))
+
+
+def _dom_extract(body: bytes, tag: Optional[str], attribute: str, encoding: str) -> Optional[str]:
+    soup = bs4.BeautifulSoup(body, 'html.parser', from_encoding=encoding)
+    element = soup.find(tag or True, attrs={attribute: True})
+    if element:
+        return element[attribute]
+
+
+def extract_attribute(body: bytes, tag: Optional[str], attribute: str, encoding: str = 'utf-8') -> Optional[str]:
+    """
+    Extract the (unescaped) value of an attribute of the first matching tag, scanning the raw response body
+    without building the DOM; falls back to the DOM if the fast path fails.
+    :param body: Raw bytes of the page.
+    :param tag: Name of the tag holding the attribute; if None, any tag.
+    :param attribute: Name of the attribute.
+    :param encoding: (optional) Encoding of the page; default is UTF-8.
+    """
+    try:
+        value = _fast_extract(body, tag, attribute, encoding)
+        if value is not None:
+            return value
+    except (UnicodeDecodeError, LookupError) as e:
+        LOGGER.debug(f"Fast extraction of '{attribute}' failed: {e}")
+    return _dom_extract(body, tag, attribute, encoding)
@@ -0,0 +1,161 @@
+import contextlib
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.parse
+from typing import Dict, Optional
+
+import requests
+from cloudscraper.cloudflare import Cloudflare
+from iotech.utils.classes import Singleton
+
+from .. import configs
+
+try:
+    import fcntl
+except ImportError:
+    # Without file locks, solves are serialized within the process only
+    fcntl = None
+
+import logging
+LOGGER = logging.getLogger(__name__)
+
+# Cookies set by Cloudflare once a challenge is solved
+_CLEARANCE_COOKIES = ('cf_clearance', '__cf_bm', 'cf_chl_rc_m')
+
+
+def is_challenged(response: requests.Response) -> bool:
+    return response.status_code in (403, 429, 503) and response.headers.get('Server', '').startswith('cloudflare')
+
+
+@Singleton
+class ClearanceStore:
+    """ Store of the Cloudflare clearances (cookies and user-agent) by host, in memory and in a file per host. """
+
+    def __init__(self):
+        self._dir: str = os.path.join(configs.ENGINE_CACHE_DIR.get(), 'clearance')
+        os.makedirs(self._dir, exist_ok=True)
+        # Clearances by host and user-agent, as in their files
+        self._entries: Dict[str, Dict[str, dict]] = dict()
+        self._entries_lock = threading.Lock()
+        self._locks: Dict[str, threading.Lock] = dict()
+        self._locks_lock = threading.Lock()
+
+    def _path(self, host: str, extension: str) -> str:
+        return os.path.join(self._dir, f"{hashlib.sha1(host.encode()).hexdigest()}.{extension}")
+
+    def _read(self, host: str) -> Dict[str, dict]:
+        try:
+            with open(self._path(host, 'json'), encoding='utf-8') as file:
+                entries = json.load(file)
+        except (OSError, ValueError):
+            entries = dict()
+        with self._entries_lock:
+            self._entries[host] = entries
+        return entries
+
+    def load(self, host: str, reload: bool = False) -> Optional[dict]:
+        """
+        Get the newest non-expired clearance of a host, by user-agent.
+        :param host: Host of the clearance.
+        :param reload: (optional) Read its file again, for the clearances stored by the other processes.
+        """
+        with self._entries_lock:
+            entries = self._entries.get(host)
+        if entries is None or reload:
+            entries = self._read(host)
+        now = time.time()
+        valid = [e for e in entries.values() if e['expires_at'] > now]
+        if valid:
+            return max(valid, key=lambda e: e['stored_at'])
+
+    def save(self, host: str, session: requests.Session):
+        """ Store the cookies of a session for its host and user-agent, replacing the expired ones. """
+        now = time.time()
+        user_agent = session.headers.get('User-Agent', '')
+        # Sessions are not shared between hosts, so all their cookies belong to the host
+        cookies = [dict(name=c.name, value=c.value, domain=c.domain, path=c.path, expires=c.expires, secure=c.secure)
+                   for c in session.cookies]
+        # The clearance expires with its cookies, and anyway after the configured TTL
+        expires_at = now + configs.ENGINE_CLEARANCE_TTL.get()
+        for cookie in cookies:
+            if cookie['name'] in _CLEARANCE_COOKIES and cookie['expires']:
+                expires_at = min(expires_at, cookie['expires'])
+        path = self._path(host, 'json')
+        with self._file_lock(host):
+            try:
+                with open(path, encoding='utf-8') as file:
+                    entries = json.load(file)
+            except (OSError, ValueError):
+                entries = dict()
+            entries = {k: e for k, e in entries.items() if e['expires_at'] > now}
+            entries[user_agent] = dict(
+                host=host, user_agent=user_agent, cookies=cookies, stored_at=now, expires_at=expires_at)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(entries, file)
+            os.replace(temp_path, path)
+            with self._entries_lock:
+                self._entries[host] = entries
+
+    @staticmethod
+    def apply(entry: dict, session: requests.Session):
+        """ Set the user-agent and the cookies of a stored clearance on a session. """
+        session.headers['User-Agent'] = entry['user_agent']
+        for cookie in entry['cookies']:
+            session.cookies.set(
+                cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'],
+                expires=cookie['expires'], secure=cookie['secure'])
+
+    @contextlib.contextmanager
+    def _file_lock(self, host: str):
+        with open(self._path(host, 'lock'), 'a') as file:
+            if fcntl:
+                fcntl.flock(file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(file, fcntl.LOCK_UN)
+
+    @contextlib.contextmanager
+    def solving(self, host: str):
+        """ Serialize the challenge solves of a host, between the threads and the processes. """
+        with self._locks_lock:
+            lock = self._locks.setdefault(host, threading.Lock())
+        with lock, self._file_lock(f"{host}#solve"):
+            yield
+
+    def request(self, session, method: str, url: str, *args, **kwargs) -> requests.Response:
+        """
+        Send a request with a Cloudflare scraper, reusing the clearance of the host; one solve per host at a time.
+        :param session: Cloudflare scraper (cloudscraper) sending the request.
+        """
+        host = urllib.parse.urlsplit(url).hostname or ''
+        entry = self.load(host)
+        if entry is not None:
+            self.apply(entry, session)
+        cookies = {c.name: c.value for c in session.cookies}
+        # The challenges are solved below, under the lock of the host, instead of within the scraper's request
+        session.disableCloudflareV1 = True
+        response = session.request(method, url, *args, **kwargs)
+        cloudflare = Cloudflare(session)
+        if cloudflare.is_Challenge_Request(response):
+            with self.solving(host):
+                # Another thread or process may have solved it in the meantime
+                solved = self.load(host, reload=True)
+                if solved is not None and (entry is None or solved['stored_at'] > entry['stored_at']):
+                    response.close()
+                    self.apply(solved, session)
+                    response = session.request(method, url, *args, **kwargs)
+                if cloudflare.is_Challenge_Request(response):
+                    response = cloudflare.Challenge_Response(response, **kwargs)
+                    if not is_challenged(response):
+                        self.save(host, session)
+                    return response
+        # Keep the clearance solved again, or the cookies refreshed, by the request, and the hosts first visited
+        if not is_challenged(response) and (entry is None or {c.name: c.value for c in session.cookies} != cookies):
+            self.save(host, session)
+        return response
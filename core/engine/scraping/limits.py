@@ -0,0 +1,96 @@
+import threading
+import time
+import urllib.parse
+from typing import Callable, Dict, Optional
+
+import requests
+from iotech.utils.classes import Singleton
+
+from .. import configs
+from ..metrics import Metrics
+from .clearance import is_challenged
+
+import logging
+LOGGER = logging.getLogger(__name__)
+
+# Latency within this factor of the host's average is stable, and lets the limit grow
+_STABLE_FACTOR = 2.
+_LATENCY_ALPHA = 0.1
+
+
+def _is_throttled(response: requests.Response) -> bool:
+    return response.status_code in (429, 503) or is_challenged(response)
+
+
+class HostLimit:
+    """ Adaptive concurrency limit of a host (AIMD): +1 per round of stable responses, halved once per throttling. """
+
+    def __init__(self, host: str):
+        self.host: str = host
+        self.limit: float = float(configs.ENGINE_HOST_CONCURRENCY.get())
+        self._in_flight: int = 0
+        self._latency: Optional[float] = None
+        self._decreased_at: float = 0.
+        self._condition = threading.Condition()
+
+    def acquire(self) -> float:
+        """ Wait for a free slot; return the start time of the request. """
+        with self._condition:
+            while self._in_flight >= int(self.limit):
+                self._condition.wait()
+            self._in_flight += 1
+            Metrics().set('host_in_flight', self._in_flight, label=self.host)
+        return time.monotonic()
+
+    def release(self, started: float, throttled: Optional[bool]):
+        """ Free the slot of a request, adapting the limit to its outcome (None for failures with no signal). """
+        latency = time.monotonic() - started
+        metrics = Metrics()
+        with self._condition:
+            self._in_flight -= 1
+            if throttled:
+                metrics.incr('host_throttle_events', label=self.host)
+                # Requests sent before the last decrease do not decrease the limit again
+                if started >= self._decreased_at:
+                    self.limit = max(self.limit / 2, configs.ENGINE_HOST_CONCURRENCY_MIN.get())
+                    self._decreased_at = time.monotonic()
+                    LOGGER.info(f"{self.host} throttled: concurrency limited to {int(self.limit)}")
+            elif throttled is False:
+                if self._latency is None or latency <= self._latency * _STABLE_FACTOR:
+                    self.limit = min(self.limit + 1 / self.limit, configs.ENGINE_HOST_CONCURRENCY_MAX.get())
+                self._latency = latency if self._latency is None else (
+                        _LATENCY_ALPHA * latency + (1 - _LATENCY_ALPHA) * self._latency)
+            metrics.set('host_concurrency_limit', int(self.limit), label=self.host)
+            metrics.set('host_in_flight', self._in_flight, label=self.host)
+            self._condition.notify_all()
+
+
+@Singleton
+class HostLimits:
+    """ Adaptive concurrency limits of the outbound requests, by host. """
+
+    def __init__(self):
+        self._limits: Dict[str, HostLimit] = dict()
+        self._lock = threading.Lock()
+
+    def get(self, host: str) -> HostLimit:
+        with self._lock:
+            limit = self._limits.get(host)
+            if limit is None:
+                limit = self._limits[host] = HostLimit(host)
+            return limit
+
+    def send(self, url: str, request: Callable[[], requests.Response]) -> requests.Response:
+        """ Send a request within the concurrency limit of its host; the slot is held until the headers arrive. """
+        limit = self.get(urllib.parse.urlsplit(url).hostname or '')
+        started = limit.acquire()
+        try:
+            response = request()
+        except requests.Timeout:
+            limit.release(started, throttled=True)
+            raise
+        except BaseException:
+            limit.release(started, None)
+            raise
+        limit.release(started, _is_throttled(response))
+        return response
@@ -0,0 +1,72 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional, Tuple
+
+from iotech.utils.classes import Singleton
+
+from .. import configs
+from ..metrics import Metrics
+
+MemoKey = Tuple[str, int, str, Tuple]
+
+
+def extractor(version: int):
+    """ Declare the version of an extraction routine, to bump whenever it changes (see make_key). """
+    def decorator(func: Callable) -> Callable:
+        func.extractor_version = version
+        return func
+    return decorator
+
+
+def make_key(func: Callable, body: bytes, encoding: str, args: Tuple = ()) -> MemoKey:
+    # Routines are named relative to the connectors package, e.g. stagatv.lib._extract_series
+    name = f"{func.__module__.rsplit('.connectors.', 1)[-1]}.{func.__qualname__}"
+    return (name, getattr(func, 'extractor_version', 0),
+            hashlib.sha1(body).hexdigest(), (encoding, *args))
+
+
+@Singleton
+class ParseMemo:
+    """ In-memory cache of the records extracted from the pages, shared by the callers (not to be modified). """
+
+    def __init__(self):
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: MemoKey) -> Optional[Tuple]:
+        """
+        Get the memoized records of a page.
+        :return: The records in a 1-tuple, or None if not memoized.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        metrics = Metrics()
+        if entry is None:
+            metrics.incr('parse_memo_misses', label=key[0])
+        else:
+            metrics.incr('parse_memo_hits', label=key[0])
+            metrics.incr('parse_memo_saved_seconds', entry[1], label=key[0])
+        hits, misses = metrics.get('parse_memo_hits', key[0]), metrics.get('parse_memo_misses', key[0])
+        metrics.set('parse_memo_hit_rate', round(hits / (hits + misses), 3), label=key[0])
+        return entry and (entry[0],)
+
+    def set(self, key: MemoKey, records, parse_time: float):
+        with self._lock:
+            self._entries[key] = (records, parse_time)
+            self._entries.move_to_end(key)
+            while len(self._entries) > configs.ENGINE_PARSE_MEMO_MAX_ENTRIES.get():
+                self._entries.popitem(last=False)
+
+    def run(self, key: MemoKey, func: Callable[[], object]):
+        """ Get the memoized records of a page, or run the extraction and memoize them. """
+        memoized = self.get(key)
+        if memoized is not None:
+            return memoized[0]
+        start = time.perf_counter()
+        records = func()
+        self.set(key, records, time.perf_counter() - start)
+        return records
@@ -0,0 +1,177 @@
+import collections
+import functools
+import threading
+import urllib.parse
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Callable, Deque, Dict, Iterable, List, Optional
+
+import requests
+from iotech.utils.classes import Singleton
+
+from .. import configs
+from ..metrics import Metrics
+from .scheduler import ContextExecutor
+
+import logging
+LOGGER = logging.getLogger(__name__)
+
+# Latency samples kept per mirror, and needed before hedging on a percentile of them
+_WINDOW = 100
+_MIN_SAMPLES = 20
+
+_executor = ContextExecutor(max_workers=32, thread_name_prefix='hedge')
+# The probes have their own threads, so that they never wait behind the hedged requests, nor delay them
+_probe_executor = ContextExecutor(max_workers=8, thread_name_prefix='mirror-probe')
+
+
+def _close(future: Future):
+    # Release the connection of the response which lost the race
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class MirrorSet:
+    """
+    Mirror domains of a site, in order of preference, with their liveness and latency.
+    The fastest live mirror becomes the base URL of the connectors of the site.
+    """
+
+    def __init__(self, urls: List[str], connectors: List, cloud: bool = True):
+        """
+        :param cloud: (optional) Whether the site is scraped (and so probed) with the Cloudflare scraper.
+        """
+        self.urls: List[str] = [url.rstrip('/') for url in urls]
+        self._connectors: List = connectors
+        self._cloud: bool = cloud
+        self._alive: Dict[str, bool] = {url: True for url in self.urls}
+        self._latencies: Dict[str, Deque[float]] = {url: collections.deque(maxlen=_WINDOW) for url in self.urls}
+        self._lock = threading.Lock()
+        self.current: str = self.urls[0]
+        for c in connectors:
+            if c.site_url() != self.current:
+                c.set_site_url(self.current)
+
+    def mirror_of(self, url: str) -> Optional[str]:
+        return next((m for m in self.urls if url == m or url.startswith(f"{m}/")), None)
+
+    def record(self, mirror: str, seconds: float):
+        with self._lock:
+            self._latencies[mirror].append(seconds)
+
+    def percentile(self, mirror: str, percentile: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._latencies[mirror])
+        if len(samples) < _MIN_SAMPLES:
+            return
+        return samples[min(int(len(samples) * percentile / 100), len(samples) - 1)]
+
+    def _alternate(self, mirror: str) -> Optional[str]:
+        # Fastest live mirror other than the given one
+        live = [m for m in self.urls if m != mirror and self._alive[m]]
+        return min(live, key=lambda m: self.percentile(m, 50) or float('inf'), default=None)
+
+    def _probe(self, mirror: str) -> Optional[float]:
+        """ Time to the response headers of a mirror's home page, or None if dead or moved to another domain. """
+        # Through the scraping stack (clearances, DNS cache, host limits), as the requests to the mirror
+        from . import _request
+        latencies = list()
+        try:
+            response = _request('GET', f"{mirror}/", self._cloud, timeout=configs.ENGINE_MIRRORS_PROBE_TIMEOUT.get(),
+                                allow_redirects=False, record_latency=latencies.append)
+        except requests.RequestException as e:
+            LOGGER.debug(f"Mirror {mirror} unreachable: {e}")
+            return
+        elapsed = latencies[0]
+        response.close()
+        if response.is_redirect:
+            location = urllib.parse.urljoin(mirror, response.headers.get('Location', ''))
+            if urllib.parse.urlsplit(location).hostname != urllib.parse.urlsplit(mirror).hostname:
+                LOGGER.info(f"Mirror {mirror} moved to {location}")
+                return
+        # Challenges (403, 503) still prove the mirror alive
+        if response.status_code >= 500 and response.status_code != 503:
+            return
+        return elapsed
+
+    def probe(self):
+        """ Probe the liveness and latency of the mirrors, and switch the connectors to the fastest live one. """
+        latencies = dict(zip(self.urls, _probe_executor.map(self._probe, self.urls)))
+        metrics = Metrics()
+        for mirror, latency in latencies.items():
+            self._alive[mirror] = latency is not None
+            if latency is not None:
+                self.record(mirror, latency)
+            metrics.set('mirror_alive', int(latency is not None), label=mirror)
+            metrics.set('mirror_latency', round(self.percentile(mirror, 50) or latency or 0, 3), label=mirror)
+        live = [m for m in self.urls if latencies[m] is not None]
+        if not live:
+            LOGGER.warning(f"No live mirror of {self.urls[0]}")
+            return
+        fastest = min(live, key=lambda m: self.percentile(m, 50) or latencies[m])
+        if fastest != self.current:
+            LOGGER.info(f"Switching {', '.join(c.uid() for c in self._connectors)} to the mirror {fastest}")
+            self.current = fastest
+            for c in self._connectors:
+                c.set_site_url(fastest)
+
+    def send(self, url: str, request: Callable[[str, Callable[[float], None]], requests.Response]) -> requests.Response:
+        """
+        Send a request to a mirror, hedging it on the fastest other live mirror when it is slower than the
+        configured percentile of its latencies (hedge_percentile); URLs of dead mirrors go to the current one.
+        :param url: URL of the request.
+        :param request: Function sending the request to a mirror URL, and passing the seconds the request took on
+        the wire (without the queueing before it) to the given recorder.
+        """
+        mirror = self.mirror_of(url)
+        if not self._alive[mirror] and self._alive[self.current]:
+            url, mirror = f"{self.current}{url[len(mirror):]}", self.current
+
+        def _timed(target_url: str, target_mirror: str) -> requests.Response:
+            return request(target_url, functools.partial(self.record, target_mirror))
+
+        alternate = self._alternate(mirror)
+        delay = self.percentile(mirror, configs.ENGINE_HEDGE_PERCENTILE.get())
+        if not configs.ENGINE_HEDGE.get() or alternate is None or delay is None:
+            return _timed(url, mirror)
+        primary = _executor.submit(_timed, url, mirror)
+        done, _ = wait([primary], timeout=delay)
+        if done and primary.exception() is None:
+            return primary.result()
+        Metrics().incr('mirror_hedged_requests', label=mirror)
+        pending = {primary, _executor.submit(_timed, f"{alternate}{url[len(mirror):]}", alternate)}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                for loser in pending:
+                    loser.add_done_callback(_close)
+                return future.result()
+        raise error
+
+
+@Singleton
+class MirrorRegistry:
+    """ Mirror sets of the connectors' sites, grouped by site. """
+
+    def __init__(self):
+        self._sets: List[MirrorSet] = list()
+
+    def register(self, connectors: Iterable):
+        groups: Dict[str, List] = dict()
+        for c in connectors:
+            if c.site_url():
+                groups.setdefault(c.site_url(), []).append(c)
+        # The mirrors of a site are the ones of its top connector
+        self._sets = [MirrorSet(group[0].mirror_urls(), group) for group in groups.values()]
+
+    def find(self, url: str) -> Optional[MirrorSet]:
+        return next((s for s in self._sets if s.mirror_of(url)), None)
+
+    def probe(self):
+        """ Probe the mirrors of all the sites having more than one. """
+        for mirror_set in self._sets:
+            if len(mirror_set.urls) > 1:
+                mirror_set.probe()
@@ -0,0 +1,85 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+import bs4
+from iotech.configurator import Config
+
+from .. import configs
+
+import logging
+LOGGER = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+# Configuration of the parent, as the workers load it
+_snapshot: Optional[str] = None
+
+
+def parse(markup: str, only: bs4.SoupStrainer = None) -> bs4.BeautifulSoup:
+    """
+    Parse a page.
+    :param markup: Decoded markup of the page; no encoding detection runs here.
+    :param only: (optional) Matcher of the tags to build, with their subtrees; the rest of the page is skipped.
+    """
+    return bs4.BeautifulSoup(markup, parse_only=only)
+
+
+def _pool_size() -> int:
+    workers = configs.ENGINE_PARSE_WORKERS.get()
+    if workers < 0:
+        return os.cpu_count() or 1
+    return workers
+
+
+def _write_snapshot() -> str:
+    """ Write the configuration of the process, with the values set at runtime, to a temporary file. """
+    descriptor, path = tempfile.mkstemp(prefix='parse-workers-', suffix='.ini')
+    with os.fdopen(descriptor, 'w', encoding='utf-8') as file:
+        Config.parser.write(file)
+    return path
+
+
+def _get_pool() -> Optional[ProcessPoolExecutor]:
+    global _pool, _snapshot
+    if _pool is None and _pool_size():
+        with _pool_lock:
+            if _pool is None:
+                # Spawned workers load the configuration files, then the values of the parent over them, to import
+                # the connectors' modules
+                _snapshot = _write_snapshot()
+                _pool = ProcessPoolExecutor(
+                    max_workers=_pool_size(), mp_context=multiprocessing.get_context('spawn'),
+                    initializer=Config.init, initargs=(Config.directory, *(Config.file_names or ()), _snapshot))
+                LOGGER.info(f"Started {_pool_size()} parsing workers")
+    return _pool
+
+
+def run(extractor: Callable[..., T], markup: str, *args) -> T:
+    """
+    Run an extraction routine on a page, in the parsing worker processes if enabled (parse_workers),
+    otherwise in the calling thread.
+    :param extractor: Module-level function taking the markup and the args, and returning compact records.
+    :param markup: Decoded markup of the page.
+    :param args: Additional arguments of the extractor.
+    """
+    pool = _get_pool()
+    if pool is None:
+        return extractor(markup, *args)
+    return pool.submit(extractor, markup, *args).result()
+
+
+def shutdown():
+    global _pool, _snapshot
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+        if _snapshot is not None:
+            os.remove(_snapshot)
+            _snapshot = None
@@ -0,0 +1,244 @@
+import ipaddress
+import itertools
+import selectors
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import requests.adapters
+import urllib3
+import urllib3.connection
+import urllib3.exceptions
+import urllib3.util.connection
+from iotech.utils.classes import Singleton
+
+from .. import configs
+from ..metrics import Metrics
+
+try:
+    import dns.resolver
+except ImportError:
+    # Without dnspython, the records live for the configured TTL (dns_ttl)
+    dns = None
+
+import logging
+LOGGER = logging.getLogger(__name__)
+
+AddrInfo = Tuple[int, int, int, str, tuple]
+
+# Records are refreshed in the background once past this fraction of their TTL
+_REFRESH_AHEAD = 0.8
+
+_refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix='dns')
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+def _record_ttl(host: str) -> Optional[int]:
+    """ Smallest TTL of the A and AAAA records of a host, if dnspython is installed. """
+    if dns is None:
+        return
+    ttls = []
+    for record_type in ('A', 'AAAA'):
+        try:
+            ttls.append(dns.resolver.resolve(host, record_type).rrset.ttl)
+        except Exception:
+            continue
+    return min(ttls, default=None)
+
+
+class _Entry:
+    __slots__ = ('addresses', 'resolved_at', 'ttl', 'refreshing')
+
+    def __init__(self, addresses: List[AddrInfo], ttl: float):
+        self.addresses: List[AddrInfo] = addresses
+        self.resolved_at: float = time.monotonic()
+        self.ttl: float = ttl
+        self.refreshing: bool = False
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.resolved_at
+
+
+@Singleton
+class DnsCache:
+    """ In-process cache of the addresses of the hosts, refreshed in the background close to their expiry. """
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, int, int], _Entry] = dict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _ttl(ttl: Optional[int]) -> float:
+        if ttl is None:
+            ttl = configs.ENGINE_DNS_TTL.get()
+        return max(ttl, configs.ENGINE_DNS_MIN_TTL.get())
+
+    def _resolve(self, host: str, port: int, family: int, ttl: Optional[int] = None) -> _Entry:
+        addresses = socket.getaddrinfo(host, port, family, socket.SOCK_STREAM)
+        entry = _Entry(addresses, self._ttl(ttl))
+        with self._lock:
+            self._entries[(host, port, family)] = entry
+        return entry
+
+    def _learn_ttl(self, host: str, entry: _Entry):
+        # The records are looked up off the connecting thread
+        ttl = _record_ttl(host)
+        if ttl is not None:
+            entry.ttl = self._ttl(ttl)
+
+    def _refresh(self, host: str, port: int, family: int, entry: _Entry):
+        try:
+            self._resolve(host, port, family, _record_ttl(host))
+            Metrics().incr('dns_refreshes')
+        except OSError as e:
+            LOGGER.debug(f"Refresh of {host} failed: {e}")
+            entry.refreshing = False
+
+    def getaddrinfo(self, host: str, port: int, family: int = socket.AF_UNSPEC) -> List[AddrInfo]:
+        if _is_ip(host):
+            return socket.getaddrinfo(host, port, family, socket.SOCK_STREAM)
+        with self._lock:
+            entry = self._entries.get((host, port, family))
+            refresh = entry is not None and not entry.refreshing and entry.age >= _REFRESH_AHEAD * entry.ttl
+            if refresh:
+                entry.refreshing = True
+        if entry is None or entry.age >= 2 * entry.ttl:
+            Metrics().incr('dns_cache_misses')
+            # Cached for the configured TTL until the one of the records is known
+            entry = self._resolve(host, port, family)
+            if dns is not None:
+                _refresher.submit(self._learn_ttl, host, entry)
+            return entry.addresses
+        Metrics().incr('dns_cache_hits')
+        if refresh:
+            _refresher.submit(self._refresh, host, port, family, entry)
+        return entry.addresses
+
+
+def _interleave(addresses: List[AddrInfo]) -> List[AddrInfo]:
+    """ Alternate the address families, starting with the first one returned (RFC 8305, 4). """
+    families = dict()
+    for address in addresses:
+        families.setdefault(address[0], []).append(address)
+    return [a for group in itertools.zip_longest(*families.values()) for a in group if a]
+
+
+def _connect(address: AddrInfo, source_address, socket_options) -> socket.socket:
+    family, socket_type, protocol, _, sockaddr = address
+    sock = socket.socket(family, socket_type, protocol)
+    try:
+        for option in socket_options or ():
+            sock.setsockopt(*option)
+        if source_address:
+            sock.bind(source_address)
+        sock.setblocking(False)
+        sock.connect_ex(sockaddr)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def create_connection(address, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, source_address=None, socket_options=None):
+    """ urllib3's create_connection, resolving through the DNS cache and racing the addresses (happy eyeballs). """
+    host, port = address
+    host = host.strip('[]')
+    addresses = _interleave(DnsCache().getaddrinfo(host, port, urllib3.util.connection.allowed_gai_family()))
+    if not addresses:
+        raise OSError("getaddrinfo returns an empty list")
+    socket_timeout = socket.getdefaulttimeout() if timeout is socket._GLOBAL_DEFAULT_TIMEOUT else timeout
+    deadline = None if socket_timeout is None else time.monotonic() + socket_timeout
+    delay = configs.ENGINE_HAPPY_EYEBALLS_DELAY.get()
+    pending = iter(addresses)
+    error: Optional[OSError] = None
+    with selectors.DefaultSelector() as selector:
+        next_attempt = time.monotonic()
+        while True:
+            now = time.monotonic()
+            if next_attempt is not None and now >= next_attempt:
+                address = next(pending, None)
+                next_attempt = None
+                if address is not None:
+                    try:
+                        selector.register(_connect(address, source_address, socket_options), selectors.EVENT_WRITE)
+                        next_attempt = now + delay
+                        if len(selector.get_map()) > 1:
+                            Metrics().incr('happy_eyeballs_fallbacks')
+                    except OSError as e:
+                        error = e
+                        next_attempt = now
+                        continue
+            if not selector.get_map() and next_attempt is None:
+                raise error or OSError(f"Unable to connect to {host}:{port}")
+            if deadline is not None and now >= deadline:
+                for key in list(selector.get_map().values()):
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+                raise socket.timeout(f"Connection to {host}:{port} timed out")
+            waits = [t - now for t in (next_attempt, deadline) if t is not None]
+            for key, _ in selector.select(max(min(waits), 0) if waits else None):
+                sock = key.fileobj
+                selector.unregister(sock)
+                code = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if code:
+                    sock.close()
+                    error = OSError(code, f"Connection to {host}:{port} failed")
+                    # Try the next address right away
+                    next_attempt = now
+                    continue
+                # Connected: drop the other attempts
+                for other in list(selector.get_map().values()):
+                    selector.unregister(other.fileobj)
+                    other.fileobj.close()
+                sock.setblocking(True)
+                sock.settimeout(socket_timeout)
+                return sock
+
+
+def _new_conn(connection: urllib3.connection.HTTPConnection) -> socket.socket:
+    # urllib3's HTTPConnection._new_conn, connecting through create_connection
+    extra_kw = {}
+    if connection.source_address:
+        extra_kw['source_address'] = connection.source_address
+    if connection.socket_options:
+        extra_kw['socket_options'] = connection.socket_options
+    try:
+        return create_connection((connection._dns_host, connection.port), connection.timeout, **extra_kw)
+    except socket.timeout:
+        raise urllib3.exceptions.ConnectTimeoutError(
+            connection, f"Connection to {connection.host} timed out. (connect timeout={connection.timeout})")
+    except OSError as e:
+        raise urllib3.exceptions.NewConnectionError(connection, f"Failed to establish a new connection: {e}")
+
+
+class _HTTPConnection(urllib3.connection.HTTPConnection):
+    _new_conn = _new_conn
+
+
+class _HTTPSConnection(urllib3.connection.HTTPSConnection):
+    _new_conn = _new_conn
+
+
+class _HTTPConnectionPool(urllib3.HTTPConnectionPool):
+    ConnectionCls = _HTTPConnection
+
+
+class _HTTPSConnectionPool(urllib3.HTTPSConnectionPool):
+    ConnectionCls = _HTTPSConnection
+
+
+def mount(adapter: requests.adapters.BaseAdapter) -> requests.adapters.BaseAdapter:
+    """ Route the connections of a transport adapter through the DNS cache, if enabled. """
+    if configs.ENGINE_DNS_CACHE.get() and isinstance(adapter, requests.adapters.HTTPAdapter):
+        adapter.poolmanager.pool_classes_by_scheme = {'http': _HTTPConnectionPool, 'https': _HTTPSConnectionPool}
+    return adapter
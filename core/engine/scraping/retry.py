@@ -0,0 +1,150 @@
+import asyncio
+import email.utils
+import random
+import threading
+import time
+import urllib.parse
+from typing import Awaitable, Callable, Iterator, Optional
+
+import requests
+from iotech.utils.classes import Singleton
+
+from .. import configs
+from ..budget import SearchBudget
+from ..metrics import Metrics
+from .clearance import is_challenged
+
+import logging
+LOGGER = logging.getLogger(__name__)
+
+# Only the requests without side effects are sent again
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+_RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+_RETRYABLE_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    value = response.headers.get('Retry-After', '')
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(email.utils.parsedate_to_datetime(value).timestamp() - time.time(), 0.)
+    except (TypeError, ValueError):
+        return
+
+
+@Singleton
+class RetryBudget:
+    """
+    Token bucket bounding the retries to a ratio of the requests (retry_budget_ratio), plus a reserve, so that
+    an outage of a site does not multiply the load on it.
+    """
+
+    def __init__(self):
+        self._tokens: float = configs.ENGINE_RETRY_BUDGET_RESERVE.get()
+        self._lock = threading.Lock()
+
+    def deposit(self):
+        """ Earn a fraction of a retry with a request. """
+        with self._lock:
+            self._tokens = min(self._tokens + configs.ENGINE_RETRY_BUDGET_RATIO.get(),
+                               configs.ENGINE_RETRY_BUDGET_RESERVE.get())
+
+    def withdraw(self) -> bool:
+        """ Spend a retry, if left. """
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            Metrics().set('retry_budget_tokens', round(self._tokens, 2))
+            return True
+
+
+class RetryPolicy:
+    """
+    Retries of the idempotent requests failed on transient errors (connection errors, timeouts, 429 and 5xx
+    responses), with exponential backoff and full jitter, within the global retry budget.
+    """
+
+    def __init__(self, retries: int = None, backoff: float = None, max_backoff: float = None):
+        self.retries: int = configs.ENGINE_RETRIES.get() if retries is None else retries
+        self.backoff: float = backoff or configs.ENGINE_RETRY_BACKOFF.get()
+        self.max_backoff: float = max_backoff or configs.ENGINE_RETRY_MAX_BACKOFF.get()
+
+    def _delays(self) -> Iterator[float]:
+        for attempt in range(self.retries):
+            yield random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    @staticmethod
+    def _should_retry(response: Optional[requests.Response], error: Optional[BaseException]) -> bool:
+        if error is not None:
+            return isinstance(error, _RETRYABLE_ERRORS)
+        # Challenges are solved by the scraper, not by sending the request again
+        return response.status_code in _RETRYABLE_STATUSES and not is_challenged(response)
+
+    def _next_delay(self, url: str, delay: float, response: Optional[requests.Response]) -> Optional[float]:
+        """ Delay of the next attempt, or None if no retry is left in the budgets (global, and of the search). """
+        host = urllib.parse.urlsplit(url).hostname or ''
+        if response is not None:
+            # Honor the delay asked by the server, within the backoff cap
+            delay = max(delay, min(_retry_after(response) or 0, self.max_backoff))
+        budget = SearchBudget.current()
+        if budget is not None and not budget.take_backoff(delay):
+            Metrics().incr('retry_search_budget_exhausted', label=host)
+            return
+        if not RetryBudget().withdraw():
+            Metrics().incr('retry_budget_exhausted', label=host)
+            return
+        Metrics().incr('retry_attempts', label=host)
+        if response is not None:
+            response.close()
+        return delay
+
+    def call(self, method: str, url: str, send: Callable[[], requests.Response]) -> requests.Response:
+        """ Send a request, retrying it if idempotent; the backoff blocks the calling thread. """
+        RetryBudget().deposit()
+        if method.upper() not in IDEMPOTENT_METHODS:
+            return send()
+        for delay in self._delays():
+            response, error = None, None
+            try:
+                response = send()
+            except Exception as e:
+                error = e
+            if not self._should_retry(response, error):
+                break
+            delay = self._next_delay(url, delay, response)
+            if delay is None:
+                break
+            LOGGER.debug(f"Retrying {method} {url} in {delay:.2f}s: {error or response.status_code}")
+            time.sleep(delay)
+        else:
+            return send()
+        if error is not None:
+            raise error
+        return response
+
+    async def acall(self, method: str, url: str, send: Callable[[], Awaitable[requests.Response]]) \
+            -> requests.Response:
+        """ Async variant of call: the backoff waits on the event loop without blocking it. """
+        RetryBudget().deposit()
+        if method.upper() not in IDEMPOTENT_METHODS:
+            return await send()
+        for delay in self._delays():
+            response, error = None, None
+            try:
+                response = await send()
+            except Exception as e:
+                error = e
+            if not self._should_retry(response, error):
+                break
+            delay = self._next_delay(url, delay, response)
+            if delay is None:
+                break
+            LOGGER.debug(f"Retrying {method} {url} in {delay:.2f}s: {error or response.status_code}")
+            await asyncio.sleep(delay)
+        else:
+            return await send()
+        if error is not None:
+            raise error
+        return response
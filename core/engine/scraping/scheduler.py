@@ -0,0 +1,106 @@
+import collections
+import contextlib
+import contextvars
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict, Hashable, Iterator
+
+import requests
+from iotech.utils.classes import Singleton
+
+from .. import configs
+from ..metrics import Metrics
+
+# Priority classes of the outbound requests, in order
+INTERACTIVE = 0
+BACKGROUND = 1
+_PRIORITY_NAMES = {INTERACTIVE: 'interactive', BACKGROUND: 'background'}
+
+_priority: contextvars.ContextVar = contextvars.ContextVar('priority', default=INTERACTIVE)
+_client: contextvars.ContextVar = contextvars.ContextVar('client', default=None)
+_client_ids = itertools.count(1)
+
+
+@contextlib.contextmanager
+def scheduling(priority: int, client: Hashable = None) -> Iterator:
+    """ Set the priority class of the requests sent within the block, and their client (by default a new one). """
+    priority_token = _priority.set(priority)
+    client_token = _client.set(client if client is not None else next(_client_ids))
+    try:
+        yield
+    finally:
+        _priority.reset(priority_token)
+        _client.reset(client_token)
+
+
+class ContextExecutor(ThreadPoolExecutor):
+    """ Thread pool running the tasks in the context of their submitter, to keep its scheduling. """
+
+    def submit(self, fn, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+@Singleton
+class RequestScheduler:
+    """ Global budget of the outbound requests, by priority class and round-robin between the clients of a class. """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._in_flight: Dict[int, int] = {INTERACTIVE: 0, BACKGROUND: 0}
+        # Waiting requests by priority class and client, clients in round-robin order
+        self._queues: Dict[int, Dict[Hashable, Deque]] = {INTERACTIVE: dict(), BACKGROUND: dict()}
+
+    def _grantable(self, priority: int) -> bool:
+        budget = configs.ENGINE_MAX_CONNECTIONS.get()
+        if sum(self._in_flight.values()) >= budget:
+            return False
+        if priority == BACKGROUND:
+            return (not self._queues[INTERACTIVE] and
+                    self._in_flight[BACKGROUND] < max(int(budget * configs.ENGINE_BACKGROUND_SHARE.get()), 1))
+        return True
+
+    def _update_metrics(self):
+        metrics = Metrics()
+        for priority, name in _PRIORITY_NAMES.items():
+            metrics.set('scheduler_queue_depth', sum(map(len, self._queues[priority].values())), label=name)
+            metrics.set('scheduler_in_flight', self._in_flight[priority], label=name)
+
+    def _acquire(self, priority: int, client: Hashable):
+        ticket = object()
+        with self._condition:
+            self._queues[priority].setdefault(client, collections.deque()).append(ticket)
+            self._update_metrics()
+            while True:
+                queues = self._queues[priority]
+                first_client = next(iter(queues))
+                if queues[first_client][0] is ticket and self._grantable(priority):
+                    break
+                self._condition.wait()
+            # Move the client to the end of the round
+            queues[first_client].popleft()
+            waiting = queues.pop(first_client)
+            if waiting:
+                queues[first_client] = waiting
+            self._in_flight[priority] += 1
+            self._update_metrics()
+            self._condition.notify_all()
+
+    def _release(self, priority: int):
+        with self._condition:
+            self._in_flight[priority] -= 1
+            self._update_metrics()
+            self._condition.notify_all()
+
+    def send(self, request: Callable[[], requests.Response]) -> requests.Response:
+        """ Send a request within the global budget, according to the scheduling of the current context. """
+        priority = _priority.get()
+        start = time.perf_counter()
+        self._acquire(priority, _client.get())
+        Metrics().incr('scheduler_wait_seconds', round(time.perf_counter() - start, 6),
+                       label=_PRIORITY_NAMES[priority])
+        try:
+            return request()
+        finally:
+            self._release(priority)
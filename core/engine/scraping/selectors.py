@@ -0,0 +1,136 @@
+from typing import Dict, List, Optional, Tuple
+
+import bs4
+
+
+class Field:
+    """
+    Field of an extraction spec: matcher of the tag to extract and the attribute to read.
+    :param match: Precompiled matcher of the tag; if None, the root tag of the record.
+    :param attr: (optional) Attribute to read; if None, the text of the tag.
+    :param many: (optional) Extract the list of all the matching values instead of the first one.
+    :param spec: (optional) Spec of the record to extract from the tag (the list of records, if the spec has a
+    root), instead of reading a value.
+    """
+    __slots__ = ('match', 'attr', 'many', 'spec', 'names')
+
+    def __init__(self, match: Optional[bs4.SoupStrainer], attr: str = None, many: bool = False,
+                 spec: 'ExtractionSpec' = None):
+        self.match: Optional[bs4.SoupStrainer] = match
+        self.attr: Optional[str] = attr
+        self.many: bool = many
+        self.spec: Optional[ExtractionSpec] = spec
+        # Tag names the matcher is restricted to, to dispatch the tags without running the matcher
+        names = match.name if match is not None else None
+        if isinstance(names, str):
+            names = (names,)
+        self.names: Optional[Tuple[str]] = tuple(names) if isinstance(names, (list, tuple)) else None
+
+    def matches(self, tag: bs4.Tag) -> bool:
+        if not self.match.attrs and self.names is not None:
+            return True
+        return bool(self.match.search_tag(tag))
+
+    def value(self, tag: bs4.Tag):
+        if self.spec is not None:
+            return self.spec.extract(tag) if self.spec.has_root else self.spec.extract_one(tag)
+        if self.attr:
+            return tag.get(self.attr)
+        return tag.get_text()
+
+
+class ExtractionSpec:
+    """
+    Declarative extraction spec of a page, with its matchers compiled once at definition.
+    Each record is extracted in a single pass over its tree, matching every tag only against the pending fields
+    for its tag name. Pages can be parsed building only the tags the spec extracts from (see strainer).
+    :param root: (optional) Matcher of the tags to extract a record from; if None, a single record is
+    extracted from the whole tree.
+    :param scope: (optional) Matcher of the first tag to search the roots in.
+    :param fields: Fields of the records, by name.
+    """
+
+    def __init__(self, root: bs4.SoupStrainer = None, scope: bs4.SoupStrainer = None, **fields: Field):
+        self._root: Optional[bs4.SoupStrainer] = root
+        self._scope: Optional[bs4.SoupStrainer] = scope
+        self._fields: Dict[str, Field] = fields
+        # Fields by tag name, plus the ones matching any tag name
+        self._by_tag: Dict[str, Tuple[str]] = dict()
+        self._any_tag: Tuple[str] = tuple(n for n, f in fields.items() if f.match is not None and f.names is None)
+        for name, field in fields.items():
+            for tag_name in field.names or ():
+                self._by_tag[tag_name] = self._by_tag.get(tag_name, ()) + (name,)
+        self._strainer: Optional[bs4.SoupStrainer] = self._make_strainer()
+
+    def _make_strainer(self) -> Optional[bs4.SoupStrainer]:
+        if self._scope is not None:
+            return self._scope
+        if self._root is not None:
+            return self._root
+        fields = tuple(self._fields.values())
+        if any(field.match is None for field in fields):
+            return
+        # Tags matching any of the fields, with their subtrees; the tag names are checked first, as the
+        # strainer runs on every tag of the page
+        by_tag = {tag_name: tuple(self._fields[name].match for name in names)
+                  for tag_name, names in self._by_tag.items()}
+        any_tag = tuple(field.match for field in fields if field.names is None)
+
+        def strain(name: str, attrs: dict) -> bool:
+            return any(match.search_tag(name, attrs) for match in by_tag.get(name, ()) + any_tag)
+        return bs4.SoupStrainer(strain)
+
+    @property
+    def has_root(self) -> bool:
+        return self._root is not None
+
+    @property
+    def strainer(self) -> Optional[bs4.SoupStrainer]:
+        """ Matcher of the tags to parse a page restricted to (see parsing.parse); None for the whole page. """
+        return self._strainer
+
+    def _extract_record(self, tree: bs4.Tag) -> dict:
+        record = dict()
+        pending = dict()
+        for name, field in self._fields.items():
+            if field.match is None:
+                record[name] = field.value(tree)
+            else:
+                record[name] = [] if field.many else None
+                pending[name] = field
+        for tag in tree.descendants:
+            if not pending:
+                break
+            if not isinstance(tag, bs4.Tag):
+                continue
+            for name in self._by_tag.get(tag.name, ()) + self._any_tag:
+                field = pending.get(name)
+                if field is None or not field.matches(tag):
+                    continue
+                if field.many:
+                    record[name].append(field.value(tag))
+                else:
+                    record[name] = field.value(tag)
+                    del pending[name]
+        return record
+
+    def _find_roots(self, tree: bs4.Tag, limit: int = None) -> List[bs4.Tag]:
+        if self._scope is not None:
+            tree = tree.find(self._scope)
+            if tree is None:
+                return []
+        return tree.find_all(self._root, limit=limit)
+
+    def extract(self, tree: bs4.Tag) -> List[dict]:
+        """ Extract the records from a tree, as plain dictionaries. """
+        if self._root is None:
+            return [self._extract_record(tree)]
+        return [self._extract_record(root) for root in self._find_roots(tree)]
+
+    def extract_one(self, tree: bs4.Tag) -> Optional[dict]:
+        """ Extract the first record from a tree, if any. """
+        if self._root is None:
+            return self._extract_record(tree)
+        roots = self._find_roots(tree, limit=1)
+        if roots:
+            return self._extract_record(roots[0])
@@ -0,0 +1,91 @@
+import contextlib
+import contextvars
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, Optional
+
+import requests
+import urllib3.response
+
+from ..metrics import Metrics
+
+try:
+    import zstandard
+except ImportError:
+    # Without zstandard, zstd is not negotiated
+    zstandard = None
+
+import logging
+LOGGER = logging.getLogger(__name__)
+
+_connector: contextvars.ContextVar = contextvars.ContextVar('connector', default='')
+_account: contextvars.ContextVar = contextvars.ContextVar('account', default=None)
+
+
+def accept_encoding(zstd: bool = True) -> str:
+    """ Content codings to negotiate, best first, among those that can be decoded. """
+    codings = []
+    if zstd and zstandard:
+        codings.append('zstd')
+    if urllib3.response.brotli:
+        codings.append('br')
+    return ', '.join(codings + ['gzip', 'deflate'])
+
+
+def decode_stream(response: requests.Response, chunk_size: int) -> Iterable[bytes]:
+    """ Stream the decoded body of a response, decompressing the codings unknown to urllib3. """
+    if response.headers.get('Content-Encoding', '').strip().lower() != 'zstd' or not zstandard:
+        return response.iter_content(chunk_size)
+    decompressor = zstandard.ZstdDecompressor().decompressobj()
+    return (decompressor.decompress(chunk) for chunk in response.raw.stream(chunk_size, decode_content=False))
+
+
+def wire_size(response: requests.Response, decoded_size: int) -> int:
+    """ Bytes of the body read from the wire, before decompression. """
+    tell = getattr(response.raw, 'tell', None)
+    return tell() if tell else decoded_size
+
+
+class TransferAccount:
+    """ Bytes transferred by the requests of an operation (e.g. a search), by connector. """
+
+    def __init__(self):
+        self.wire: Dict[str, int] = defaultdict(int)
+        self.decoded: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, connector: str, wire: int, decoded: int):
+        with self._lock:
+            self.wire[connector] += wire
+            self.decoded[connector] += decoded
+
+
+@contextlib.contextmanager
+def connector(uid: str) -> Iterator:
+    """ Account the bytes transferred within the block to a connector. """
+    token = _connector.set(uid)
+    try:
+        yield
+    finally:
+        _connector.reset(token)
+
+
+@contextlib.contextmanager
+def account() -> Iterator[TransferAccount]:
+    """ Account the bytes transferred within the block, by connector. """
+    transfer_account = TransferAccount()
+    token = _account.set(transfer_account)
+    try:
+        yield transfer_account
+    finally:
+        _account.reset(token)
+
+
+def record(wire: int, decoded: int):
+    uid = _connector.get()
+    metrics = Metrics()
+    metrics.incr('transfer_wire_bytes', wire, label=uid)
+    metrics.incr('transfer_decoded_bytes', decoded, label=uid)
+    transfer_account: Optional[TransferAccount] = _account.get()
+    if transfer_account is not None:
+        transfer_account.add(uid, wire, decoded)
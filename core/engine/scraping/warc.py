@@ -0,0 +1,238 @@
+import datetime
+import glob
+import gzip
+import hashlib
+import io
+import os
+import threading
+import time
+import urllib.parse
+import uuid
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from .. import configs
+
+import logging
+LOGGER = logging.getLogger(__name__)
+
+RECORD = 'record'
+REPLAY = 'replay'
+
+ArchiveKey = Tuple[str, str, str]
+
+# Bodies are archived decoded, so the transfer headers of the original response no longer apply
+_DROPPED_HEADERS = ('Content-Encoding', 'Transfer-Encoding', 'Content-Length')
+
+
+def _archive_key(method: str, url: str, body) -> ArchiveKey:
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return method.upper(), url, hashlib.sha1(body or b'').hexdigest()
+
+
+def _http_headers(headers) -> bytes:
+    return ''.join(f"{k}: {v}\r\n" for k, v in headers.items()).encode('latin-1', errors='replace')
+
+
+class WarcWriter:
+    """
+    Writer of WARC/1.1 archives, one gzip member per record (.warc.gz), appending to a file per process.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        file_name = f"{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}.warc.gz"
+        self._path: str = os.path.join(directory, file_name)
+        self._lock = threading.Lock()
+
+    def _write_record(self, warc_type: str, url: str, block: bytes, **fields) -> str:
+        record_id = f"<urn:uuid:{uuid.uuid4()}>"
+        headers = {
+            'WARC-Type': warc_type,
+            'WARC-Record-ID': record_id,
+            'WARC-Date': datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'WARC-Target-URI': url,
+            'Content-Type': f"application/http; msgtype={warc_type}",
+            'Content-Length': str(len(block)),
+            **fields
+        }
+        record = b'WARC/1.1\r\n' + _http_headers(headers) + b'\r\n' + block + b'\r\n\r\n'
+        with self._lock, open(self._path, 'ab') as file:
+            file.write(gzip.compress(record))
+        return record_id
+
+    def write(self, request: requests.PreparedRequest, response: requests.Response):
+        """ Archive a request and its response, once read. """
+        url = urllib.parse.urlsplit(request.url)
+        target = urllib.parse.urlunsplit(('', '', url.path or '/', url.query, ''))
+        body = request.body or b''
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        request_headers = CaseInsensitiveDict(request.headers)
+        request_headers.setdefault('Host', url.netloc)
+        request_block = (f"{request.method} {target} HTTP/1.1\r\n".encode()
+                         + _http_headers(request_headers) + b'\r\n' + body)
+        response_headers = CaseInsensitiveDict(response.headers)
+        for name in _DROPPED_HEADERS:
+            response_headers.pop(name, None)
+        response_headers['Content-Length'] = str(len(response.content))
+        response_block = (f"HTTP/1.1 {response.status_code} {response.reason or ''}\r\n".encode()
+                          + _http_headers(response_headers) + b'\r\n' + response.content)
+        response_id = self._write_record('response', request.url, response_block)
+        self._write_record('request', request.url, request_block, **{'WARC-Concurrent-To': response_id})
+
+
+def _read_records(path: str):
+    """ Yield the (headers, block) of the records of a WARC file. """
+    with gzip.open(path, 'rb') as file:
+        while True:
+            line = file.readline()
+            if not line:
+                return
+            if not line.strip():
+                continue
+            headers = dict()
+            for line in iter(file.readline, b'\r\n'):
+                if not line:
+                    return
+                name, _, value = line.decode('utf-8').partition(':')
+                headers[name.strip()] = value.strip()
+            block = file.read(int(headers.get('Content-Length', 0)))
+            file.read(4)
+            yield headers, block
+
+
+def _parse_message(block: bytes) -> Tuple[str, CaseInsensitiveDict, bytes]:
+    head, _, body = block.partition(b'\r\n\r\n')
+    start_line, *header_lines = head.decode('latin-1').split('\r\n')
+    headers = CaseInsensitiveDict()
+    for line in header_lines:
+        name, _, value = line.partition(':')
+        headers[name.strip()] = value.strip()
+    return start_line, headers, body
+
+
+class WarcArchive:
+    """
+    Index of the responses archived in a directory of WARC files, by request method, URL and body.
+    """
+
+    def __init__(self, directory: str):
+        self._responses: Dict[ArchiveKey, bytes] = dict()
+        pending: Dict[str, bytes] = dict()
+        for path in sorted(glob.glob(os.path.join(directory, '*.warc.gz'))):
+            for headers, block in _read_records(path):
+                if headers.get('WARC-Type') == 'response':
+                    pending[headers['WARC-Record-ID']] = block
+                elif headers.get('WARC-Type') == 'request':
+                    response_block = pending.pop(headers.get('WARC-Concurrent-To'), None)
+                    if response_block is None:
+                        continue
+                    start_line, _, body = _parse_message(block)
+                    # Later records of the same request win, e.g. the page served after a challenge
+                    key = _archive_key(start_line.split(' ')[0], headers['WARC-Target-URI'], body)
+                    self._responses[key] = response_block
+        LOGGER.info(f"Loaded {len(self._responses)} archived responses from {directory}")
+
+    def get(self, method: str, url: str, body) -> Optional[bytes]:
+        return self._responses.get(_archive_key(method, url, body))
+
+
+def archive(response: requests.Response):
+    """ Archive a recorded response, once its body is read (e.g. within the size cap). """
+    writer: Optional[WarcWriter] = getattr(response, '_warc_writer', None)
+    if writer is None:
+        return
+    del response._warc_writer
+    try:
+        writer.write(response.request, response)
+    except Exception as e:
+        LOGGER.warning(f"Unable to archive {response.url}: {e}")
+
+
+class RecordingAdapter(BaseAdapter):
+    """
+    Transport adapter recording the exchanges of the adapter it wraps: those without a body to stream (HEAD,
+    redirects, 204, 304) right away, the others when their body is read (see archive).
+    """
+
+    def __init__(self, adapter: BaseAdapter, writer: WarcWriter):
+        super().__init__()
+        self._adapter: BaseAdapter = adapter
+        self._writer: WarcWriter = writer
+
+    def send(self, request, **kwargs):
+        response = self._adapter.send(request, **kwargs)
+        response._warc_writer = self._writer
+        if request.method == 'HEAD' or response.is_redirect or response.status_code in (204, 304):
+            archive(response)
+        return response
+
+    def close(self):
+        self._adapter.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    """ Transport adapter serving the archived responses, with an optional injected latency. """
+
+    def __init__(self, archive: WarcArchive, latency: float = 0):
+        super().__init__()
+        self._archive: WarcArchive = archive
+        self._latency: float = latency
+
+    def send(self, request, **kwargs):
+        block = self._archive.get(request.method, request.url, request.body)
+        if self._latency:
+            time.sleep(self._latency)
+        if block is None:
+            raise requests.ConnectionError(f"Not archived: {request.method} {request.url}", request=request)
+        start_line, headers, body = _parse_message(block)
+        _, status, reason = (start_line.split(' ', 2) + [''])[:3]
+        response = requests.Response()
+        response.status_code = int(status)
+        response.reason = reason
+        response.headers = headers
+        response.raw = io.BytesIO(body)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.encoding = requests.utils.get_encoding_from_headers(headers)
+        return response
+
+    def close(self):
+        pass
+
+
+_writer: Optional[WarcWriter] = None
+_archive: Optional[WarcArchive] = None
+_lock = threading.Lock()
+
+
+def mode() -> str:
+    return configs.ENGINE_WARC_MODE.get()
+
+
+def bypass() -> bool:
+    """ Whether the replayed requests bypass the limits, the scheduler, the mirrors, the retries and the cache. """
+    return mode() == REPLAY and configs.ENGINE_WARC_BYPASS.get()
+
+
+def mount(session: requests.Session) -> requests.Session:
+    """ Mount the recording or replaying adapters on a session, according to the WARC mode (warc_mode). """
+    global _writer, _archive
+    if mode() == RECORD:
+        with _lock:
+            _writer = _writer or WarcWriter(configs.ENGINE_WARC_DIR.get())
+        for prefix in ('https://', 'http://'):
+            session.mount(prefix, RecordingAdapter(session.get_adapter(prefix), _writer))
+    elif mode() == REPLAY:
+        with _lock:
+            _archive = _archive or WarcArchive(configs.ENGINE_WARC_DIR.get())
+        adapter = ReplayAdapter(_archive, configs.ENGINE_WARC_LATENCY.get())
+        for prefix in ('https://', 'http://'):
+            session.mount(prefix, adapter)
+    return session
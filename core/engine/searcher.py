@@ -1,10 +1,24 @@
+import asyncio
+import contextvars
 import functools
-from concurrent.futures import ThreadPoolExecutor
-from typing import Optional, Set
+import time
+from concurrent.futures import Executor
+from typing import Optional, Set, Dict, List, Tuple
+
+import requests
 
 from .connectors.base import SearchConnector, SearchResult
-from .cache import Cache
-from . import connectors
+from .cache import ResultCache, ContextStore, ResolvedCache
+from .cache.resolved import ResolvedEntry
+from .cache.results import make_key
+from .catalog import CatalogIndex, CatalogCrawler
+from .filters import SearchFilters
+from .budget import SearchBudget
+from .popularity import QueryPopularity
+from .warmup import WarmUp
+from .metrics import Metrics
+from .scraping.mirrors import MirrorRegistry
+from . import connectors, configs, scraping
 
 import logging
 LOGGER = logging.getLogger(__name__)
@@ -23,6 +37,13 @@ class SearchEngine:
 
     def __init__(self, app):
         self._app = app
+        self._popularity = QueryPopularity()
+        # noinspection PyTypeChecker
+        self._catalog: CatalogIndex = None
+        if configs.ENGINE_CATALOG.get():
+            self._catalog = CatalogIndex()
+        MirrorRegistry().register(self._connectors_map(no_children=False))
+        self._warm_up: WarmUp = WarmUp(self._connectors_map(no_children=False) if configs.ENGINE_WARMUP.get() else [])
 
     @classmethod
     def _connectors_map(cls, no_children: bool = True):
@@ -36,11 +57,57 @@ class SearchEngine:
             return parents + _recursive(children)
         return _recursive(list(cls._base_map))
 
-    def _internal_search(self, q: str, c: SearchConnector):
+    @property
+    def has_catalog(self) -> bool:
+        return self._catalog is not None
+
+    @property
+    def warm_up_states(self) -> Dict[str, str]:
+        return self._warm_up.states
+
+    @property
+    def is_ready(self) -> bool:
+        return self._warm_up.is_ready
+
+    def warm_up(self):
+        """ Pre-resolve, connect and clear the challenges of the connectors' sites, on their fastest mirrors. """
+        self.probe_mirrors()
+        with scraping.scheduling(scraping.BACKGROUND):
+            self._warm_up.run()
+
+    @staticmethod
+    def probe_mirrors():
+        """ Switch the connectors to the fastest live mirror of their sites. """
+        with scraping.scheduling(scraping.BACKGROUND):
+            MirrorRegistry().probe()
+
+    def sync_catalog(self):
+        """ Sync the listings of the connectors into the local catalog. """
+        with scraping.scheduling(scraping.BACKGROUND):
+            CatalogCrawler(self._catalog, self._base_map).sync()
+
+    def _internal_search(self, q: str, filters: SearchFilters, indexed: Dict[str, List[dict]], context: Optional[dict],
+                         c: SearchConnector):
+        # Answer from the local catalog, if indexed; a type filter applied natively needs the live search
+        records = indexed.get(c.uid())
+        if records and not (filters.type and 'type' in c.native_filters):
+            return filters.apply(c.from_catalog(q, records))
+        # Only the drill-down searches get the context of their parent result
+        kwargs = dict(context=context) if context else dict()
+        budget = SearchBudget.default()
         try:
-            return c.search(q)
+            # The retries of the search's requests block its threads within the budget's backoff
+            with scraping.transfer.connector(c.uid()), budget.applied():
+                result = c.search(q, filters=filters, budget=budget, **kwargs)
         except Exception as e:
             LOGGER.warning(f"{c.uid()}: {e}")
+            return
+        # Write the live results through the local catalog
+        if result and self._catalog and c in self._base_map and not filters:
+            items = [*result.main.values(), *result.secondary.values()]
+            self._catalog.upsert(c.uid(), [i.catalog_record() for i in items])
+        # Apply locally the filters not supported natively by the connector
+        return filters.apply(result, native=c.native_filters)
 
     @classmethod
     def _all_connectors(cls, uid: str = None) -> Set[SearchConnector]:
@@ -52,32 +119,182 @@ class SearchEngine:
             if c.uid() == uid:
                 return c
 
-    async def do_search(self, query: str, uid: str = None) -> Optional[SearchResult]:
+    def _search(self, query: str, uid: str = None, filters: SearchFilters = None,
+                context: dict = None) -> SearchResult:
         result: SearchResult = SearchResult()
-        if query:
-            _map = self._all_connectors(uid)
-            partial = functools.partial(self._internal_search, query)
-            with ThreadPoolExecutor(max_workers=len(_map)) as p:
-                for r in p.map(partial, _map):
-                    result.merge(r)
-        return result.sorted()
+        filters = filters or SearchFilters()
+        # Skip the connectors which cannot serve the filters
+        _map = {c for c in self._all_connectors(uid) if filters.accepts(c)}
+        if not _map:
+            return result
+        indexed = dict()
+        if self._catalog:
+            indexed = self._catalog.search(query, [c.uid() for c in _map if c in self._base_map])
+        partial = functools.partial(self._internal_search, query, filters, indexed, context)
+        with scraping.transfer.account() as transfer_account, scraping.ContextExecutor(max_workers=len(_map)) as p:
+            for r in p.map(partial, _map):
+                result.merge(r)
+        if transfer_account.wire:
+            LOGGER.info(f"Search '{query}' transferred {sum(transfer_account.wire.values())} bytes "
+                        f"({sum(transfer_account.decoded.values())} decoded): {dict(transfer_account.wire)}")
+        Metrics().incr('searches')
+        Metrics().incr('search_wire_bytes', sum(transfer_account.wire.values()))
+        return result
+
+    def _search_and_cache(self, query: str, uid: str = None, filters: SearchFilters = None,
+                          context: dict = None) -> SearchResult:
+        filters = filters or SearchFilters()
+        result = self._search(query, uid, filters, context)
+        if not result.is_empty:
+            ResultCache().set(make_key(query, uid, filters.key), result)
+        return result
+
+    async def do_search(self, query: str, uid: str = None, page: int = 1,
+                        filters: SearchFilters = None, handle: str = None) -> Optional[SearchResult]:
+        """
+        :param handle: (optional) Handle of the context handed by the parent result of a drill-down search.
+        """
+        if not query:
+            return SearchResult()
+        filters = filters or SearchFilters()
+        key = make_key(query, uid, filters.key)
+        self._popularity.hit(key)
+        result = ResultCache().get(key)
+        if result is None:
+            # The requests of a user search have priority, and share the budget fairly with the other searches;
+            # the scraping runs in a thread (in the scheduling context), off the event loop
+            with scraping.scheduling(scraping.INTERACTIVE):
+                result = await asyncio.to_thread(
+                    self._search_and_cache, query, uid, filters, ContextStore().get(handle))
+        return result.ranked(query, page=page, year=filters.year)
+
+    def prewarm(self):
+        """ Re-run the most popular searches which cached results are missing or about to expire. """
+        if configs.ENGINE_RESULTS_TTL.get() <= 0:
+            return
+        # The results expiring before the next run
+        window = min(configs.ENGINE_PREWARM_INTERVAL.get(), configs.ENGINE_RESULTS_TTL.get() / 2)
+        hit_since = time.time() - configs.ENGINE_POPULARITY_HALF_LIFE.get()
+        for key in self._popularity.top(configs.ENGINE_PREWARM_TOP.get(), configs.ENGINE_PREWARM_MIN_SCORE.get(),
+                                        hit_since):
+            if ResultCache().expires_in(key) > window:
+                continue
+            query, uid, filters_key = key
+            LOGGER.info(f"Pre-warming search: {query}")
+            with scraping.scheduling(scraping.BACKGROUND):
+                self._search_and_cache(query, uid, SearchFilters.from_key(filters_key))
 
     @classmethod
     async def execute_from_media_hash(cls, media_hash: str) -> Optional[str]:
         content, media_type = SearchConnector.content_from_hash(media_hash)
         for c in cls._connectors_map(no_children=False):
             if c.uid() == media_type:
-                return await c.execute(content)
+                with scraping.transfer.connector(c.uid()):
+                    return await c.execute(content)
+
+    @classmethod
+    async def expand(cls, uid: str, **kwargs) -> Optional[SearchResult]:
+        connector = cls._get_connector_from_uid(uid)
+        if not connector:
+            return
+        with scraping.transfer.connector(uid), scraping.scheduling(scraping.INTERACTIVE):
+            return await asyncio.to_thread(connector.expand, **kwargs)
+
+    @classmethod
+    async def _resolve(cls, connector: SearchConnector, arguments: dict) -> Optional[dict]:
+        with scraping.transfer.connector(connector.uid()):
+            return await connector.execute_deferred(**arguments)
+
+    @classmethod
+    async def _resolve_many(cls, items: List[Tuple[SearchConnector, dict]]) -> List[Optional[dict]]:
+        """ Resolve several deferred media concurrently, within defer_batch_concurrency; the failed ones are None. """
+        semaphore = asyncio.Semaphore(configs.ENGINE_DEFER_BATCH_CONCURRENCY.get())
+
+        async def resolve(connector: SearchConnector, arguments: dict) -> Optional[dict]:
+            async with semaphore:
+                try:
+                    return await cls._resolve(connector, arguments)
+                except Exception as e:
+                    LOGGER.warning(f"{connector.uid()}: {e}")
+
+        return await asyncio.gather(*(resolve(connector, arguments) for connector, arguments in items))
 
     @classmethod
     async def defer(cls, uid: str, **kwargs) -> dict:
-        cache_name = 'proxy_post'
-        cache_value = Cache().get(cache_name, **kwargs)
+        connector = cls._get_connector_from_uid(uid)
+        if not connector:
+            raise ValueError('Could not parse the request.')
+        # Served while valid, resolved again transparently once expired
+        key = connector.deferred_key(**kwargs)
+        cache_value = ResolvedCache().get(uid, key)
         if not cache_value:
-            connector = cls._get_connector_from_uid(uid)
-            if not connector:
-                raise ValueError('Could not parse the request.')
-            cache_value = await connector.execute_deferred(**kwargs)
+            cache_value = await cls._resolve(connector, kwargs)
             if cache_value:
-                Cache().set(cache_name, cache_value, **kwargs)
+                ResolvedCache().set(uid, key, kwargs, cache_value, connector.deferred_file_url(cache_value))
         return cache_value
+
+    @classmethod
+    async def defer_batch(cls, uid: str, **kwargs) -> Dict[str, dict]:
+        """
+        Resolve the deferred media of a batch (e.g. the episodes of a season) concurrently (see _resolve_many).
+        :return: The results of execute_deferred, by key of the media; the unresolved ones are left out.
+        """
+        connector = cls._get_connector_from_uid(uid)
+        if not connector:
+            raise ValueError('Could not parse the request.')
+        with scraping.transfer.connector(uid), scraping.scheduling(scraping.INTERACTIVE):
+            items = await asyncio.to_thread(connector.deferred_items, **kwargs)
+            keys = {key: connector.deferred_key(**arguments) for key, arguments in items.items()}
+            cached = ResolvedCache().get_many(uid, list(keys.values()))
+            results = {key: value for key, value in zip(items, cached) if value}
+            missing = [key for key in items if key not in results]
+            resolved = await cls._resolve_many([(connector, items[key]) for key in missing])
+        new_results = {key: value for key, value in zip(missing, resolved) if value}
+        ResolvedCache().set_many(uid, [(keys[key], items[key], value, connector.deferred_file_url(value))
+                                       for key, value in new_results.items()])
+        results.update(new_results)
+        # In the order of the batch
+        return {key: results[key] for key in items if key in results}
+
+    def _revalidate_due(self) -> List[ResolvedEntry]:
+        """ Revalidate the resolved media URLs in use which are about to expire, returning those to resolve again. """
+        now = time.time()
+        cache = ResolvedCache()
+        cache.prune(now - configs.ENGINE_RESOLVED_KEEP.get())
+        # Until the next run, plus the validity left to serve them
+        horizon = configs.ENGINE_RESOLVED_REVALIDATE_INTERVAL.get() + configs.ENGINE_RESOLVED_MARGIN.get()
+        due = list()
+        for entry in cache.due(now + horizon, now - configs.ENGINE_RESOLVED_KEEP.get()):
+            if not self._get_connector_from_uid(entry.uid):
+                continue
+            if entry.url and not entry.signed:
+                try:
+                    valid = scraping.is_available(entry.url)
+                except requests.RequestException as e:
+                    LOGGER.debug(f"Revalidation of {entry.url} failed: {e}")
+                    continue
+                cache.learn(entry.host, time.time() - entry.resolved_at, valid)
+                Metrics().incr('resolved_revalidations', label='valid' if valid else 'invalid')
+                if valid:
+                    cache.extend(entry.key, time.time() + horizon)
+                    continue
+            due.append(entry)
+        return due
+
+    async def revalidate_resolved(self, executor: Executor = None):
+        """
+        Revalidate the resolved media URLs in use which are about to expire, and resolve again ahead of the players
+        those no longer valid, or signed until then.
+        :param executor: (optional) Executor of the revalidations; the resolutions run on the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        with scraping.scheduling(scraping.BACKGROUND):
+            due = await loop.run_in_executor(executor, contextvars.copy_context().run, self._revalidate_due)
+            connectors_ = [self._get_connector_from_uid(entry.uid) for entry in due]
+            values = await self._resolve_many([(c, entry.arguments) for c, entry in zip(connectors_, due)])
+        renewed = [(entry.uid, c.deferred_key(**entry.arguments), entry.arguments, value, c.deferred_file_url(value))
+                   for c, entry, value in zip(connectors_, due, values) if value]
+        for uid in {item[0] for item in renewed}:
+            items = [item[1:] for item in renewed if item[0] == uid]
+            await loop.run_in_executor(executor, ResolvedCache().set_many, uid, items)
+        Metrics().incr('resolved_renewals', len(renewed))
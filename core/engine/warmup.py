@@ -0,0 +1,55 @@
+import threading
+import urllib.parse
+from typing import Dict, Iterable, List
+
+from . import scraping
+
+import logging
+LOGGER = logging.getLogger(__name__)
+
+PENDING = 'pending'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class WarmUp:
+    """ Warm-up of the connectors' sites (DNS, connections, clearances), with the readiness of each connector. """
+
+    def __init__(self, connectors: Iterable):
+        self._sites: Dict[str, List] = dict()
+        for c in connectors:
+            if c.site_url():
+                self._sites.setdefault(c.site_url(), []).append(c)
+        self._states: Dict[str, str] = {c.uid(): PENDING for group in self._sites.values() for c in group}
+        self._lock = threading.Lock()
+
+    @property
+    def states(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._states)
+
+    @property
+    def is_ready(self) -> bool:
+        return PENDING not in self.states.values()
+
+    def _warm_up_site(self, site: str):
+        # The site may have moved to another mirror since
+        url = self._sites[site][0].site_url()
+        url_parts = urllib.parse.urlsplit(url)
+        state = READY
+        try:
+            scraping.resolver.DnsCache().getaddrinfo(url_parts.hostname, url_parts.port or 443)
+            scraping.warm_up(url)
+        except Exception as e:
+            LOGGER.warning(f"Warm-up of {url} failed: {e}")
+            state = FAILED
+        with self._lock:
+            for c in self._sites[site]:
+                self._states[c.uid()] = state
+        LOGGER.info(f"Warm-up of {url}: {state}")
+
+    def run(self):
+        if not self._sites:
+            return
+        with scraping.ContextExecutor(max_workers=len(self._sites)) as executor:
+            list(executor.map(self._warm_up_site, self._sites))
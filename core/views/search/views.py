@@ -3,6 +3,7 @@ from quart import redirect, url_for, render_template as quart_render_template, r
 from iotech.microservice.web import spec
 
 from ...engine import security
+from ...engine.filters import SearchFilters
 
 
 @spec.hookimpl(tryfirst=True)
@@ -37,13 +38,25 @@ def load_blueprints(core):
         # Canonical search by query
         query = request.args.get('q')
         uid = data.get('u')
-        result = await core.engine.do_search(query, uid=uid)
+        page = request.args.get('p', 1, type=int)
+        filters = SearchFilters.from_args(request.args)
+        result = await core.engine.do_search(query, uid=uid, page=page, filters=filters, handle=data.get('h'))
         # Additional parameters for the view
         kwargs = dict()
         if query:
             kwargs['title_prefix'] = f'{query} - '
         # Render the view
-        return await render_template('search/index.html', result=result, **kwargs)
+        return await render_template('search/index.html', result=result, filters=filters, **kwargs)
+
+    @core.app.route('/expand')
+    async def expand():
+        # Decrypt secured data
+        data = security.decrypt_dict(request.args.get('d'))
+        uid = data.pop('u', None)
+        result = await core.engine.expand(uid, **data) if uid else None
+        if result is None:
+            return redirect(url_for('search'))
+        return await render_template('search/index.html', result=result, filters=SearchFilters())
 
     @core.app.route('/deferred_execute', methods=['POST'])
     async def deferred_execute():
@@ -56,3 +69,15 @@ def load_blueprints(core):
             return await core.engine.defer(uid, **kwargs)
         except Exception as e:
             return str(e), 500
+
+    @core.app.route('/deferred_execute_batch', methods=['POST'])
+    async def deferred_execute_batch():
+        try:
+            # Decrypt secured data
+            kwargs = security.decrypt_dict(request.args.get('d'))
+            uid = kwargs.pop('u', None)
+            if not uid:
+                return core.response_bad_request('Unable to process the request.')
+            return await core.engine.defer_batch(uid, **kwargs)
+        except Exception as e:
+            return str(e), 500
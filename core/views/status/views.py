@@ -0,0 +1,21 @@
+from http import HTTPStatus
+
+from quart import jsonify
+
+from iotech.microservice.web import spec
+
+from ...engine.metrics import Metrics
+
+
+@spec.hookimpl(tryfirst=True)
+def load_blueprints(core):
+
+    @core.app.route('/metrics')
+    async def metrics():
+        return jsonify(Metrics().snapshot())
+
+    @core.app.route('/health')
+    async def health():
+        # Hold the traffic until the warm-up of the connectors is over
+        status = HTTPStatus.OK if core.engine.is_ready else HTTPStatus.SERVICE_UNAVAILABLE
+        return jsonify(ready=core.engine.is_ready, connectors=core.engine.warm_up_states), status
@@ -0,0 +1,20 @@
+"""
+Tests of the engine against fixture pages served locally, run from the repository root:
+
+    python -m unittest discover -s tests -t .
+"""
+import os
+
+from iotech.configurator import Config
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def configure(**options):
+    """
+    Load the configuration of the application, overriding options of its ENGINE section.
+    :param options: Values of the ENGINE options, e.g. cache_dir.
+    """
+    Config.init(os.path.join(ROOT, 'config'), 'application.ini')
+    for option, value in options.items():
+        Config.parser.set('ENGINE', option, str(value))
@@ -0,0 +1,54 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+
+class FixtureSite:
+    """
+    Local site serving fixture pages, by path, on a free port of the loopback interface.
+    Use it as a context manager: the site serves while the block runs.
+    """
+
+    def __init__(self, pages: Dict[str, bytes] = None, handler: Callable[[str], Optional[bytes]] = None):
+        """
+        :param pages: (optional) Bodies of the pages, by path.
+        :param handler: (optional) Function returning the body of a path not in pages, None if not found.
+        """
+        self.pages: Dict[str, bytes] = pages or dict()
+        self.handler: Optional[Callable[[str], Optional[bytes]]] = handler
+        self.requests: int = 0
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def _body(self, path: str) -> Optional[bytes]:
+        body = self.pages.get(path)
+        if body is None and self.handler:
+            body = self.handler(path)
+        return body
+
+    def __enter__(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site.requests += 1
+                body = site._body(self.path)
+                self.send_response(200 if body is not None else 404)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body or b'')))
+                self.end_headers()
+                self.wfile.write(body or b'')
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,16 @@
+from .supervideo import _filler
+
+
+def results_page(base_url: str, rows: int) -> bytes:
+    """ Search page of DailyFlix, with a table row per result. """
+    trs = ''.join(f'<tr><td><a href="{base_url}/films/{n}/">Fixture Film {n}</a></td><td>2021</td></tr>'
+                  for n in range(rows))
+    return f'<html><body>{_filler(300)}<table class="table">{trs}</table>{_filler(300)}</body></html>'.encode()
+
+
+def details_page(n: int) -> bytes:
+    """ Film page of DailyFlix, with its player iframe, tags and poster. """
+    tags = ''.join(f'<a rel="tag" href="/tags/{t}">{t}</a>' for t in ('Action', '#2021', 'HD'))
+    return (f'<html><body>{_filler(500)}<img aria-label="Poster of Fixture Film {n}" src="/posters/{n}.jpg">'
+            f'<div class="tags">{tags}</div><iframe src="https://filemoon.sx/e/{n}"></iframe>'
+            f'{_filler(500)}</body></html>').encode()
@@ -0,0 +1,6 @@
+from core.engine import configs
+
+
+def configured(markup: str) -> tuple:
+    """ Extraction routine reporting the configuration of the process running it. """
+    return markup, configs.ENGINE_MAX_BODY_SIZE.get(), configs.ENGINE_PAGE_SIZE.get()
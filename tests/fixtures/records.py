@@ -0,0 +1,26 @@
+import html
+import json
+
+
+def records(count: int) -> list:
+    """ Records of a search payload, as StreamingCommunity lists them. """
+    return [dict(id=i, slug=f'fixture-show-{i}', name=f"Fixture Show {i}", type='tv' if i % 2 else 'movie',
+                 images=[dict(sc_url=f'/images/{i}-{n}.jpg', type='poster') for n in range(3)],
+                 plot="lorem ipsum & <dolor> " * 10)
+            for i in range(count)]
+
+
+def search_page(count: int, decoy: bool = False) -> bytes:
+    """
+    Search page carrying its records as JSON in the records-json attribute of <the-search-page>.
+    :param count: Number of records.
+    :param decoy: (optional) Whether an earlier tag carries the payload of another attribute ending with the name.
+    """
+    payload = html.escape(json.dumps(records(count)))
+    decoy_tag = '<div data-records-json="[]"></div>' if decoy else ''
+    # Filler markup, as the real pages carry menus, cards and scripts around the payload
+    filler = ''.join(f'<div class="card"><a href="/titles/{n}"><img src="/i/{n}.jpg" alt="card {n}"></a></div>'
+                     for n in range(1500))
+    return (f'<html><head><title>Search</title></head><body>{decoy_tag}{filler}'
+            f'<the-search-page records-json="{payload}" query="fixture"></the-search-page>'
+            f'{filler}</body></html>').encode()
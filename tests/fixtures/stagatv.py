@@ -0,0 +1,36 @@
+from typing import Dict
+
+
+def series_list(base_url: str, series_count: int, seasons: int) -> bytes:
+    """ Page of the series list, with a link per season of each series. """
+    items = ''.join(
+        f'<li><a href="{base_url}/series/{i}-{s}/">Fixture Show {i} (S{s:02})</a></li>'
+        for i in range(series_count) for s in range(1, seasons + 1))
+    return f'<html><body><div class="soralist"><ul>{items}</ul></div></body></html>'.encode()
+
+
+def series_page(series: int, season: int, episodes: int) -> bytes:
+    """ Page of a season of a series, with its poster, date and the list of its episodes. """
+    title = f"Fixture Show {series} (S{season:02})"
+    links = ''.join(
+        f'<li><a href="/episodes/{series}-{season}-{e}/"><div class="epl-num">S{season} EP{e}</div>'
+        f'<div class="epl-title">{title} episode {e} ' + 'lorem ipsum ' * 20 + '</div></a></li>'
+        for e in range(1, episodes + 1))
+    # Filler markup, as the real pages carry menus, comments and scripts around the data
+    filler = ''.join(f'<div class="widget"><p>filler <b>text</b> {n}</p></div>' for n in range(400))
+    return (f'<html><head><title>{title}</title></head><body>{filler}'
+            f'<img class="ts-post-image" alt="{title}" src="/images/{series}-{season}.jpg">'
+            f'<time itemprop="dateCreated" datetime="2020-01-0{season % 9 + 1}T00:00:00+00:00"></time>'
+            f'<div class="gallery_img"><a href="/posters/{series}-{season}.jpg"></a></div>'
+            f'<div class="bixbox ts-ep-list"><span class="ts-chl-collapsible">Season {season}</span>'
+            f'<div class="ts-chl-collapsible-content"><div class="epsdlist"><ul>{links}</ul></div></div></div>'
+            f'{filler}</body></html>').encode()
+
+
+def site_pages(base_url: str, series_count: int, seasons: int, episodes: int) -> Dict[str, bytes]:
+    """ Pages of a StagaTV site, by path. """
+    pages = {'/series-lists/': series_list(base_url, series_count, seasons)}
+    for i in range(series_count):
+        for s in range(1, seasons + 1):
+            pages[f'/series/{i}-{s}/'] = series_page(i, s, episodes)
+    return pages
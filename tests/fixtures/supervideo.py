@@ -0,0 +1,24 @@
+def _filler(count: int) -> str:
+    # Filler markup, as the real pages carry menus, comments and scripts around the data
+    return ''.join(f'<div class="widget"><a href="/w/{n}">widget <b>{n}</b></a><p>filler text {n}</p></div>'
+                   for n in range(count))
+
+
+def player_page(links: int = 40) -> bytes:
+    """ Film page of a SuperVideo site, with its mirror links (the trusted one last) and an iframe. """
+    mirrors = ''.join(f'<li data-link="//mirror{n}.example/e/{n}">Mirror {n}</li>' for n in range(links))
+    return (f'<html><body>{_filler(500)}<ul class="mirrors">{mirrors}'
+            f'<li data-link="//supervideo.tv/e/fixture">SuperVideo</li></ul>'
+            f'<iframe src="/guardahd/player/fixture"></iframe>{_filler(500)}</body></html>').encode()
+
+
+def details_page() -> bytes:
+    """ Film page of AltaDefinizione, with its details list. """
+    cast = ''.join(f'<a href="/actors/{n}">Actor {n}</a>' for n in range(12))
+    details = (f'<ul id="details">'
+               f'<li><label>Titolo:</label><span id="title" data-value="Fixture Film">Fixture Film</span></li>'
+               f'<li><label>Genere:</label><a href="/genres/drama">Drama</a></li>'
+               f'<li><label>Cast:</label><span id="staring">{cast}</span></li>'
+               f'<li><label>Anno:</label>\n2021</li>'
+               f'</ul>')
+    return f'<html><body>{_filler(500)}{details}{_filler(500)}</body></html>'.encode()
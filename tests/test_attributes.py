@@ -0,0 +1,68 @@
+import json
+import time
+import tracemalloc
+import unittest
+
+from .fixtures import records
+
+# Records of the benchmark page, about 300 KB with its markup
+_RECORDS = 300
+
+
+def _measure(function, *args) -> tuple:
+    """ Best time (in seconds) of a few calls of a function, and the peak of the memory it allocates (in MB). """
+    timings = list()
+    for _ in range(3):
+        start = time.perf_counter()
+        function(*args)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak / 2 ** 20
+
+
+class ExtractAttributeTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        from . import configure
+        configure()
+        from core.engine.scraping import attributes
+        cls.attributes = attributes
+
+    def test_payload(self):
+        value = self.attributes.extract_attribute(records.search_page(5), 'the-search-page', 'records-json')
+        self.assertEqual(json.loads(value), records.records(5))
+
+    def test_longer_attribute_names(self):
+        body = b'<archivio data-records="[1]" x-records=\'[2]\' records="[3]"></archivio>'
+        self.assertEqual(self.attributes.extract_attribute(body, 'archivio', 'records'), '[3]')
+        body = records.search_page(5, decoy=True)
+        self.assertEqual(json.loads(self.attributes.extract_attribute(body, None, 'records-json')),
+                         records.records(5))
+
+    def test_adjacent_attributes(self):
+        body = b'<archivio class="list"records=\'[{"a": "&amp;"}]\'></archivio>'
+        self.assertEqual(self.attributes.extract_attribute(body, 'archivio', 'records'), '[{"a": "&"}]')
+
+    def test_dom_fallback(self):
+        # Unquoted values are left to the DOM
+        self.assertEqual(self.attributes.extract_attribute(b'<archivio records=[1]></archivio>', 'archivio',
+                                                           'records'), '[1]')
+
+    def test_benchmark(self):
+        body = records.search_page(_RECORDS)
+        fast_time, fast_peak = _measure(self.attributes.extract_attribute, body, 'the-search-page', 'records-json')
+        dom_time, dom_peak = _measure(self.attributes._dom_extract, body, 'the-search-page', 'records-json', 'utf-8')
+        print(f"\n{len(body) / 1024:.0f} KB page: fast path {fast_time * 1000:.1f} ms / {fast_peak:.1f} MB peak, "
+              f"DOM {dom_time * 1000:.1f} ms / {dom_peak:.1f} MB peak")
+        self.assertLess(fast_time * 10, dom_time)
+        self.assertLess(fast_peak * 2, dom_peak)
+
+
+if __name__ == '__main__':
+    unittest.main()
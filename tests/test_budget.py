@@ -0,0 +1,66 @@
+import threading
+import unittest
+
+from . import configure
+
+configure(budget_max_main=3, budget_max_fetches=5, budget_max_backoff=2)
+
+from core.engine.budget import SearchBudget  # noqa: E402
+
+
+class SearchBudgetTest(unittest.TestCase):
+
+    def test_fetches(self):
+        budget = SearchBudget(max_fetches=2)
+        self.assertEqual([budget.take_fetch() for _ in range(3)], [True, True, False])
+        self.assertTrue(budget.is_exhausted)
+        self.assertFalse(budget.is_met)
+
+    def test_main_results_stop_the_fetches(self):
+        budget = SearchBudget(max_main=2, max_fetches=10)
+        budget.add_main(2)
+        self.assertTrue(budget.is_met)
+        self.assertFalse(budget.take_fetch())
+
+    def test_unbounded(self):
+        budget = SearchBudget()
+        self.assertTrue(all(budget.take_fetch() for _ in range(1000)))
+        self.assertTrue(budget.take_backoff(3600))
+
+    def test_backoff(self):
+        budget = SearchBudget(max_backoff=2)
+        self.assertTrue(budget.take_backoff(1.5))
+        self.assertFalse(budget.take_backoff(1))
+        self.assertTrue(budget.take_backoff(0.5))
+
+    def test_default(self):
+        configure(budget_max_main=3, budget_max_fetches=5, budget_max_backoff=2)
+        budget = SearchBudget.default()
+        self.assertEqual(sum(budget.take_fetch() for _ in range(10)), 5)
+        budget.add_main(3)
+        self.assertTrue(budget.is_met)
+
+    def test_concurrent_fetches(self):
+        budget = SearchBudget(max_fetches=100)
+        taken = list()
+
+        def _take():
+            taken.extend(budget.take_fetch() for _ in range(50))
+
+        threads = [threading.Thread(target=_take) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sum(taken), 100)
+
+    def test_current(self):
+        budget = SearchBudget()
+        self.assertIsNone(SearchBudget.current())
+        with budget.applied():
+            self.assertIs(SearchBudget.current(), budget)
+        self.assertIsNone(SearchBudget.current())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+from . import configure
+
+configure(cache_dir=tempfile.mkdtemp(), catalog_max_pages=2)
+
+from core.engine.catalog import CatalogIndex, CatalogCrawler  # noqa: E402
+
+
+def _record(title: str, year: int = None) -> dict:
+    return dict(original_title=title, url=f"https://site.example/{title.lower().replace(' ', '-')}", year=year)
+
+
+class _Connector:
+    """ Connector listing its catalog in pages of two records. """
+
+    def __init__(self, pages: int):
+        self.pages = [[_record(f"Title {p}{i}") for i in 'ab'] for p in range(1, pages + 1)]
+        self.requested = list()
+
+    @staticmethod
+    def uid() -> str:
+        return 'fixture'
+
+    def catalog_page(self, page: int) -> list:
+        self.requested.append(page)
+        return self.pages[page - 1] if page <= len(self.pages) else []
+
+
+class CatalogIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = CatalogIndex(os.path.join(tempfile.mkdtemp(), 'catalog.db'))
+
+    def test_upsert_counts_the_new_records(self):
+        self.assertEqual(self.index.upsert('a', [_record('Amélie', 2001), _record('Alien', 1979)]), 2)
+        self.assertEqual(self.index.upsert('a', [dict(_record('Alien', 1979), year=1980)]), 0)
+        self.assertEqual(self.index.search('alien', ['a'])['a'][0]['year'], 1980)
+
+    def test_search(self):
+        self.index.upsert('a', [_record('Amélie', 2001), _record('The Matrix Reloaded', 2003)])
+        self.index.upsert('b', [_record('The Matrix', 1999)])
+        # Diacritics are ignored, the last token is a prefix
+        self.assertEqual([r['original_title'] for r in self.index.search('amelie', ['a'])['a']], ['Amélie'])
+        self.assertEqual(sorted(self.index.search('matr', ['a', 'b'])), ['a', 'b'])
+        self.assertEqual(list(self.index.search('matrix', ['b'])), ['b'])
+        self.assertEqual(self.index.search('"*', ['a']), dict())
+        self.assertEqual(self.index.search('matrix', []), dict())
+
+    def test_sync_state(self):
+        self.assertEqual(self.index.get_state('a'), (1, False))
+        self.index.set_state('a', 4, True)
+        self.assertEqual(self.index.get_state('a'), (4, True))
+
+
+class CatalogCrawlerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = CatalogIndex(os.path.join(tempfile.mkdtemp(), 'catalog.db'))
+        self.connector = _Connector(pages=3)
+        self.crawler = CatalogCrawler(self.index, [self.connector])
+
+    def test_backfill_then_delta(self):
+        # Backfill, catalog_max_pages at a time
+        self.crawler.sync()
+        self.assertEqual(self.connector.requested, [1, 2])
+        self.assertEqual(self.index.get_state('fixture'), (3, False))
+        # The newest page brings nothing new: on with the backfill, until the end of the listing
+        self.connector.requested.clear()
+        self.crawler.sync()
+        self.assertEqual(self.connector.requested, [1, 3, 4])
+        self.assertEqual(self.index.get_state('fixture'), (4, True))
+        # New titles on the first page: refresh until a page brings none
+        self.connector.pages[0].append(_record('Title new'))
+        self.connector.requested.clear()
+        self.crawler.sync()
+        self.assertEqual(self.connector.requested, [1, 2])
+        self.assertIn('fixture', self.index.search('title new', ['fixture']))
+
+    def test_failures_do_not_stop_the_sync(self):
+        broken = _Connector(pages=1)
+        broken.catalog_page = None
+        with self.assertLogs('core.engine.catalog.crawler', 'WARNING'):
+            CatalogCrawler(self.index, [broken, self.connector]).sync()
+        self.assertEqual(self.connector.requested, [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import io
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+from . import configure
+
+configure(cache_dir=tempfile.mkdtemp())
+
+from core.engine.scraping import clearance  # noqa: E402
+
+_URL = 'https://protected.example/page'
+
+
+def _response(status: int) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.headers['Server'] = 'cloudflare'
+    response.raw = io.BytesIO()
+    return response
+
+
+class _Session(requests.Session):
+    """ Scraper of a site challenging the requests without clearance. """
+
+    def __init__(self):
+        super().__init__()
+        self.headers['User-Agent'] = 'fixture'
+        self.sent = 0
+
+    def request(self, method, url, *args, **kwargs):
+        self.sent += 1
+        return _response(200 if self.cookies.get('cf_clearance') else 503)
+
+
+class _Cloudflare:
+    """ Solver of the fixture challenges, slow enough for the concurrent requests to meet. """
+    solves = 0
+    lock = threading.Lock()
+
+    def __init__(self, session: _Session):
+        self.session = session
+
+    @staticmethod
+    def is_Challenge_Request(response) -> bool:
+        return response.status_code == 503
+
+    def Challenge_Response(self, response, **kwargs):
+        with self.lock:
+            _Cloudflare.solves += 1
+        time.sleep(0.2)
+        self.session.cookies.set('cf_clearance', 'solved', domain='protected.example', path='/')
+        return _response(200)
+
+
+class ClearanceStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        configure(cache_dir=tempfile.mkdtemp())
+        self.store = clearance.ClearanceStore._cls()
+        _Cloudflare.solves = 0
+        patcher = mock.patch.object(clearance, 'Cloudflare', _Cloudflare)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_concurrent_challenges_are_solved_once(self):
+        statuses = list()
+
+        def _request():
+            statuses.append(self.store.request(_Session(), 'GET', _URL).status_code)
+
+        threads = [threading.Thread(target=_request) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(statuses, [200] * 4)
+        self.assertEqual(_Cloudflare.solves, 1)
+
+    def test_stored_clearance_is_reused(self):
+        self.store.request(_Session(), 'GET', _URL)
+        session = _Session()
+        self.assertEqual(self.store.request(session, 'GET', _URL).status_code, 200)
+        self.assertEqual((session.sent, _Cloudflare.solves), (1, 1))
+        # Another process reads it from the file
+        entry = clearance.ClearanceStore._cls().load('protected.example')
+        self.assertEqual([c['name'] for c in entry['cookies']], ['cf_clearance'])
+
+    def test_expires_with_the_clearance_cookie(self):
+        session = _Session()
+        session.cookies.set('cf_clearance', 'solved', domain='protected.example', path='/', expires=time.time() + 1)
+        self.store.save('protected.example', session)
+        self.assertIsNotNone(self.store.load('protected.example'))
+        with mock.patch.object(clearance.time, 'time', return_value=time.time() + 2):
+            self.assertIsNone(self.store.load('protected.example'))
+
+    def test_hosts_without_challenges_are_stored(self):
+        session = _Session()
+        session.cookies.set('cf_clearance', 'solved', domain='protected.example', path='/')
+        self.store.request(session, 'GET', _URL)
+        self.assertIsNotNone(self.store.load('protected.example'))
+        self.assertEqual(_Cloudflare.solves, 0)
+
+    def test_is_challenged(self):
+        self.assertTrue(clearance.is_challenged(_response(403)))
+        response = _response(503)
+        response.headers['Server'] = 'nginx'
+        self.assertFalse(clearance.is_challenged(response))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import tempfile
+import unittest
+from unittest import mock
+
+from . import configure
+
+configure(context_ttl=60, context_max_entries=2)
+
+from core.engine.cache import contexts  # noqa: E402
+from core.engine.cache.contexts import ContextStore  # noqa: E402
+from core.engine.connectors.stagatv.lib import Series  # noqa: E402
+from core.engine.connectors.stagatv.series_season import StagaTV_SeriesSeason  # noqa: E402
+from .fixtures import FixtureSite, stagatv  # noqa: E402
+
+
+class ContextStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        configure(context_ttl=60, context_max_entries=2)
+        self.store = ContextStore._cls()
+
+    def test_put_get(self):
+        handle = self.store.put({'series': []})
+        self.assertEqual(self.store.get(handle), {'series': []})
+        self.assertNotEqual(self.store.put({}), handle)
+        self.assertIsNone(self.store.get('unknown'))
+        self.assertIsNone(self.store.get(None))
+
+    def test_expired(self):
+        handle = self.store.put({})
+        with mock.patch.object(contexts.time, 'time', return_value=contexts.time.time() + 60):
+            self.assertIsNone(self.store.get(handle))
+        self.assertNotIn(handle, self.store._entries)
+
+    def test_least_recently_used_evicted(self):
+        first, second = self.store.put({'n': 1}), self.store.put({'n': 2})
+        self.store.get(first)
+        self.store.put({'n': 3})
+        self.assertEqual(self.store.get(first), {'n': 1})
+        self.assertIsNone(self.store.get(second))
+
+
+class DrillDownTest(unittest.TestCase):
+
+    def setUp(self):
+        configure(cache_dir=tempfile.mkdtemp(), http_cache='false', warmup='false', parse_workers=0)
+        self.site = FixtureSite()
+        self.site.__enter__()
+        self.addCleanup(self.site.__exit__)
+        self.site.pages.update(stagatv.site_pages(self.site.base_url, 1, 1, 3))
+        self.addCleanup(setattr, Series, '_base_url_', Series._base_url_)
+        Series._base_url_ = self.site.base_url
+
+    def test_series_record_round_trip(self):
+        series = Series('Fixture Show 0 (S01)', f"{self.site.base_url}/series/0-1/")
+        self.assertFalse(Series.from_record(series.to_record()).scraped)
+        series.scrape()
+        restored = Series.from_record(series.to_record())
+        self.assertEqual(restored.to_record(), series.to_record())
+        self.assertEqual([e.url for e in restored.episodes], [f"/episodes/0-1-{e}/" for e in range(1, 4)])
+
+    def test_search_from_the_context(self):
+        series = Series('Fixture Show 0 (S01)', f"{self.site.base_url}/series/0-1/")
+        series.scrape()
+        requests = self.site.requests
+        result = StagaTV_SeriesSeason.search('fixture show 0', context=dict(series=[series.to_record()]))
+        self.assertEqual([item.query_title for item in result.main.values()], ['fixture show 0 s1 (3 episodes)'])
+        # Neither the series list nor the series page is fetched again
+        self.assertEqual(self.site.requests, requests)
+
+
+if __name__ == '__main__':
+    unittest.main()
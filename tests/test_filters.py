@@ -0,0 +1,46 @@
+import unittest
+
+from . import configure
+
+configure()
+
+from core.engine.connectors.base import SearchResult  # noqa: E402
+from core.engine.connectors.streamingcommunity.connector import StreamingCommunity  # noqa: E402
+from core.engine.filters import SearchFilters  # noqa: E402
+
+
+def _titles(result: SearchResult) -> list:
+    return sorted(x.query_title for x in [*result.main.values(), *result.secondary.values()])
+
+
+class SearchFiltersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.result = SearchResult([
+            StreamingCommunity('Dated 2020', year=2020, media_type='movie'),
+            StreamingCommunity('Dated 2019', year='2019', media_type='movie'),
+            StreamingCommunity('Undated', media_type='series'),
+        ])
+
+    def test_year_drops_the_undated_items(self):
+        self.assertEqual(_titles(SearchFilters(year=2020).apply(self.result)), ['dated 2020'])
+
+    def test_native_filters_are_not_applied_again(self):
+        self.assertEqual(len(_titles(SearchFilters(year=2020).apply(self.result, native=('year',)))), 3)
+
+    def test_type(self):
+        self.assertEqual(_titles(SearchFilters(type_='series').apply(self.result)), ['undated'])
+
+    def test_no_filters(self):
+        self.assertIs(SearchFilters().apply(self.result), self.result)
+
+    def test_key_round_trip(self):
+        filters = SearchFilters(year=2020, type_='movie', lang='it')
+        self.assertEqual(SearchFilters.from_key(filters.key).key, filters.key)
+        self.assertFalse(SearchFilters.from_key(None))
+        with self.assertRaises(ValueError):
+            SearchFilters(type_='book')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import requests
+
+from . import configure
+
+configure(cache_dir=tempfile.mkdtemp())
+
+from core.engine.cache.http import HttpCache, freshness  # noqa: E402
+
+_DATE = 'Tue, 14 Nov 2023 22:13:20 GMT'
+
+
+def _response(body: bytes, **headers) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.headers.update({'Cache-Control': 'max-age=60', **headers})
+    # noinspection PyProtectedMember
+    response._content = body
+    return response
+
+
+class FreshnessTest(unittest.TestCase):
+
+    def test_max_age_wins(self):
+        self.assertEqual(freshness({'Cache-Control': 'public, max-age=120', 'Expires': _DATE}), 120)
+
+    def test_age_is_subtracted(self):
+        self.assertEqual(freshness({'Cache-Control': 'max-age=120', 'Age': '100'}), 20)
+        self.assertEqual(freshness({'Cache-Control': 'max-age=120', 'Age': '300'}), 0)
+
+    def test_no_store_and_no_cache(self):
+        self.assertIsNone(freshness({'Cache-Control': 'no-store, max-age=120'}))
+        self.assertEqual(freshness({'Cache-Control': 'no-cache, max-age=120'}), 0)
+
+    def test_expires_relative_to_date(self):
+        self.assertEqual(freshness({'Date': _DATE, 'Expires': 'Tue, 14 Nov 2023 23:13:20 GMT'}), 3600)
+        # An invalid Expires means already expired
+        self.assertEqual(freshness({'Date': _DATE, 'Expires': '0'}), 0)
+
+    def test_heuristic(self):
+        # A tenth of the age of the page, at most a day
+        self.assertEqual(freshness({'Date': _DATE, 'Last-Modified': 'Tue, 14 Nov 2023 12:13:20 GMT'}), 3600)
+        self.assertEqual(freshness({'Date': _DATE, 'Last-Modified': 'Tue, 14 Nov 2000 22:13:20 GMT'}), 24 * 3600)
+        self.assertEqual(freshness({}), 0)
+
+
+class HttpCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        configure(cache_dir=tempfile.mkdtemp(), http_cache_size=256 * 1024 * 1024)
+        self.cache = HttpCache._cls()
+
+    def _accessed_at(self, key: str) -> float:
+        with self.cache._connect() as connection:
+            return connection.execute("SELECT accessed_at FROM responses WHERE key=?", (key,)).fetchone()[0]
+
+    def test_store_and_lookup(self):
+        self.cache.store('https://site.example/a', _response(b'page', ETag='"1"'))
+        entry = self.cache.lookup('https://site.example/a')
+        self.assertTrue(entry.is_fresh)
+        self.assertEqual(entry.validators, {'If-None-Match': '"1"'})
+        self.assertEqual(self.cache.to_response(entry).content, b'page')
+        self.assertIsNone(self.cache.lookup('https://site.example/b'))
+
+    def test_lookups_update_the_access_time_sparingly(self):
+        key = 'https://site.example/a'
+        with mock.patch('core.engine.cache.http.time.time', return_value=1000.):
+            self.cache.store(key, _response(b'page'))
+        with mock.patch('core.engine.cache.http.time.time', return_value=1030.):
+            self.cache.lookup(key)
+        self.assertEqual(self._accessed_at(key), 1000.)
+        with mock.patch('core.engine.cache.http.time.time', return_value=1100.):
+            self.cache.lookup(key)
+        self.assertEqual(self._accessed_at(key), 1100.)
+
+    def test_eviction_keeps_the_shared_bodies(self):
+        body = os.urandom(4096)
+        self.cache.store('https://site.example/a', _response(body))
+        self.cache.store('https://site.example/b', _response(body))
+        configure(http_cache_size=6000)
+        self.cache.store('https://site.example/c', _response(os.urandom(4096)))
+        # The LRU ones went, with their shared body
+        self.assertIsNone(self.cache.lookup('https://site.example/a'))
+        self.assertIsNone(self.cache.lookup('https://site.example/b'))
+        self.assertIsNotNone(self.cache.to_response(self.cache.lookup('https://site.example/c')))
+
+    def test_eviction_during_a_store(self):
+        shared, other = os.urandom(4096), os.urandom(4096)
+        self.cache.store('https://site.example/a', _response(shared))
+        self.cache.store('https://site.example/c', _response(other))
+        # Evicting a and its body is enough, unless b refers to it
+        configure(http_cache_size=5000)
+        write_body = self.cache._write_body
+        evictions = list()
+
+        def _write_body(*args):
+            size = write_body(*args)
+            # An eviction between the check of the body and the row of the response
+            evictions.append(threading.Thread(target=self.cache._evict))
+            evictions[0].start()
+            evictions[0].join(0.5)
+            return size
+
+        with mock.patch.object(self.cache, '_write_body', _write_body):
+            self.cache.store('https://site.example/b', _response(shared))
+        evictions[0].join()
+        self.assertIsNone(self.cache.lookup('https://site.example/a'))
+        self.assertEqual(self.cache.to_response(self.cache.lookup('https://site.example/b')).content, shared)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+import io
+import threading
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+from . import configure
+
+configure(host_concurrency=4, host_concurrency_min=1, host_concurrency_max=6)
+
+from core.engine.scraping.limits import HostLimit, HostLimits  # noqa: E402
+
+
+def _response(status: int) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.raw = io.BytesIO()
+    return response
+
+
+class HostLimitTest(unittest.TestCase):
+
+    def setUp(self):
+        configure(host_concurrency=4, host_concurrency_min=1, host_concurrency_max=6)
+        self.now = 100.
+        patcher = mock.patch('core.engine.scraping.limits.time.monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.limit = HostLimit('site.example')
+
+    def _round(self, throttled=False, latency: float = 0.1):
+        started = self.limit.acquire()
+        self.now += latency
+        self.limit.release(started, throttled)
+
+    def test_additive_increase(self):
+        # About one more request per round of limit responses
+        for _ in range(5):
+            self._round()
+        self.assertEqual(int(self.limit.limit), 5)
+
+    def test_bounded(self):
+        for _ in range(100):
+            self._round()
+        self.assertEqual(self.limit.limit, 6)
+        for _ in range(10):
+            self._round(throttled=True)
+            self.now += 1
+        self.assertEqual(self.limit.limit, 1)
+
+    def test_unstable_latency_does_not_increase(self):
+        self._round(latency=0.1)
+        limit = self.limit.limit
+        self._round(latency=1.)
+        self.assertEqual(self.limit.limit, limit)
+
+    def test_multiplicative_decrease_once_per_round(self):
+        # The requests in flight when throttled count as one signal
+        started = [self.limit.acquire() for _ in range(3)]
+        self.now += 0.1
+        for s in started:
+            self.limit.release(s, True)
+        self.assertEqual(self.limit.limit, 2)
+
+    def test_failures_without_signal(self):
+        self._round(throttled=None)
+        self.assertEqual(self.limit.limit, 4)
+
+    def test_waits_for_a_slot(self):
+        started = [self.limit.acquire() for _ in range(4)]
+        acquired = threading.Event()
+        threading.Thread(target=lambda: (self.limit.acquire(), acquired.set())).start()
+        self.assertFalse(acquired.wait(0.1))
+        self.limit.release(started[0], None)
+        self.assertTrue(acquired.wait(1))
+
+
+class HostLimitsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.limits = HostLimits._cls()
+
+    def test_throttling_responses(self):
+        for status in (429, 503):
+            self.limits.send(f"https://throttled-{status}.example/", lambda: _response(status))
+            self.assertEqual(self.limits.get(f"throttled-{status}.example").limit, 2)
+        self.limits.send('https://ok.example/', lambda: _response(200))
+        self.assertGreater(self.limits.get('ok.example').limit, 4)
+
+    def test_timeouts_throttle(self):
+        def _timeout():
+            raise requests.Timeout()
+        with self.assertRaises(requests.Timeout):
+            self.limits.send('https://slow.example/', _timeout)
+        self.assertEqual(self.limits.get('slow.example').limit, 2)
+        self.assertEqual(self.limits.get('slow.example')._in_flight, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from unittest import mock
+
+from . import configure
+
+configure(parse_memo_max_entries=2)
+
+from core.engine.scraping import memo  # noqa: E402
+from core.engine.connectors.stagatv import lib  # noqa: E402
+
+
+@memo.extractor(version=3)
+def _extract(markup: str, *args) -> tuple:
+    return markup, args
+
+
+def _unversioned(markup: str) -> str:
+    return markup
+
+
+class MakeKeyTest(unittest.TestCase):
+
+    def test_key(self):
+        name, version, body_hash, rest = memo.make_key(_extract, b'page', 'utf-8', ('a',))
+        self.assertEqual((name, version, rest), ('tests.test_memo._extract', 3, ('utf-8', 'a')))
+        self.assertEqual(body_hash, memo.make_key(_extract, b'page', 'utf-8')[2])
+        self.assertEqual(memo.make_key(_unversioned, b'page', 'utf-8')[1], 0)
+
+    def test_connector_routines_are_named_relative_to_the_package(self):
+        self.assertEqual(memo.make_key(lib._extract_series_list, b'', 'utf-8')[0], 'stagatv.lib._extract_series_list')
+
+    def test_everything_identifying_the_records_is_in_the_key(self):
+        key = memo.make_key(_extract, b'page', 'utf-8', ('a',))
+        self.assertNotEqual(key, memo.make_key(_extract, b'page!', 'utf-8', ('a',)))
+        self.assertNotEqual(key, memo.make_key(_extract, b'page', 'latin-1', ('a',)))
+        self.assertNotEqual(key, memo.make_key(_extract, b'page', 'utf-8', ('b',)))
+        # A new version of the routine
+        with mock.patch.object(_extract, 'extractor_version', 4):
+            self.assertNotEqual(key, memo.make_key(_extract, b'page', 'utf-8', ('a',)))
+
+
+class ParseMemoTest(unittest.TestCase):
+
+    def setUp(self):
+        self.memo = memo.ParseMemo._cls()
+
+    def test_runs_once_per_key(self):
+        func = mock.Mock(return_value=['record'])
+        key = memo.make_key(_extract, b'page', 'utf-8')
+        self.assertEqual(self.memo.run(key, func), ['record'])
+        self.assertEqual(self.memo.run(key, func), ['record'])
+        func.assert_called_once()
+
+    def test_memoizes_empty_records(self):
+        key = memo.make_key(_extract, b'page', 'utf-8')
+        self.memo.set(key, None, 0.1)
+        self.assertEqual(self.memo.get(key), (None,))
+
+    def test_evicts_the_least_recently_used(self):
+        keys = [memo.make_key(_extract, body, 'utf-8') for body in (b'a', b'b', b'c')]
+        self.memo.set(keys[0], 'a', 0)
+        self.memo.set(keys[1], 'b', 0)
+        self.memo.get(keys[0])
+        self.memo.set(keys[2], 'c', 0)
+        self.assertIsNone(self.memo.get(keys[1]))
+        self.assertEqual(self.memo.get(keys[0]), ('a',))
+
+
+if __name__ == '__main__':
+    unittest.main()
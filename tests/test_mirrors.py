@@ -0,0 +1,60 @@
+import socket
+import tempfile
+import unittest
+from unittest import mock
+
+from . import configure
+
+configure(cache_dir=tempfile.mkdtemp(), http_cache='false', retries=0, mirrors_probe_timeout=2)
+
+from core.engine.scraping.clearance import ClearanceStore  # noqa: E402
+from core.engine.scraping.limits import HostLimits  # noqa: E402
+from core.engine.scraping.mirrors import MirrorSet  # noqa: E402
+from .fixtures import FixtureSite  # noqa: E402
+
+
+class _Connector:
+    site = None
+
+    @classmethod
+    def uid(cls) -> str:
+        return 'fixture'
+
+    @classmethod
+    def site_url(cls) -> str:
+        return cls.site
+
+    @classmethod
+    def set_site_url(cls, url: str):
+        cls.site = url
+
+
+def _dead_url() -> str:
+    # A port nobody listens on
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+class MirrorProbeTest(unittest.TestCase):
+
+    def test_switches_to_the_live_mirror(self):
+        with FixtureSite({'/': b'home'}) as site:
+            mirror_set = MirrorSet([_dead_url(), site.base_url], [_Connector], cloud=False)
+            self.assertNotEqual(_Connector.site, site.base_url)
+            mirror_set.probe()
+        self.assertEqual(_Connector.site, site.base_url)
+        self.assertEqual(mirror_set.current, site.base_url)
+
+    def test_probes_through_the_scraping_stack(self):
+        with FixtureSite({'/': b'home'}) as site, \
+                mock.patch.object(HostLimits(), 'send', wraps=HostLimits().send) as send, \
+                mock.patch.object(ClearanceStore(), 'request', wraps=ClearanceStore().request) as cloud_request:
+            MirrorSet([site.base_url, f"http://localhost:{site.base_url.rsplit(':', 1)[1]}"], [_Connector]).probe()
+        self.assertEqual(send.call_count, 2)
+        # Probed with the Cloudflare scraper, reusing the clearances
+        self.assertEqual(cloud_request.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import itertools
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from . import ROOT
+
+# Searches of each run, each over the seasons of a few series
+_SEARCHES = 16
+_SERIES = 1
+_SEASONS = 3
+_EPISODES = 30
+_CONCURRENCY = (1, 4, 16)
+# Throughput gain expected from the parsing workers at the highest concurrency, on hosts with enough CPUs
+_MIN_CPUS = 4
+_MIN_GAIN = 1.5
+
+
+def _probe(workers: int) -> dict:
+    """ Pages parsed per second by concurrent StagaTV searches over the fixture site, by concurrency. """
+    from . import configure
+    configure(cache_dir=tempfile.mkdtemp(), http_cache='false', warmup='false', parse_workers=workers,
+              host_concurrency=32, host_concurrency_max=32)
+    from .fixtures import FixtureSite
+    from .fixtures import stagatv
+    from core.engine.connectors.stagatv.lib import Series
+    from core.engine.connectors.stagatv.series_season import StagaTV_SeriesSeason
+    from core.engine.scraping import parsing
+    counter = itertools.count()
+    pages = dict()
+
+    def handler(path: str):
+        # Every response differs, so that no page is served from the parse memo
+        body = pages.get(path)
+        return body + f'<!-- {next(counter)} -->'.encode() if body is not None else None
+
+    throughput = dict()
+    with FixtureSite(handler=handler) as site:
+        pages.update(stagatv.site_pages(site.base_url, _SERIES, _SEASONS, _EPISODES))
+        Series._base_url_ = site.base_url
+        # Start the workers before the runs
+        StagaTV_SeriesSeason.search('fixture show')
+        for concurrency in _CONCURRENCY:
+            requests = site.requests
+            start = time.perf_counter()
+            with ThreadPoolExecutor(concurrency) as executor:
+                results = list(executor.map(
+                    lambda _: StagaTV_SeriesSeason.search('fixture show'), range(_SEARCHES)))
+            elapsed = time.perf_counter() - start
+            assert all(len(result.main) == _SERIES * _SEASONS for result in results)
+            throughput[concurrency] = (site.requests - requests) / elapsed
+    parsing.shutdown()
+    return throughput
+
+
+def _run(workers: int) -> dict:
+    # A fresh process, as the parsing pool is configured once per process
+    output = subprocess.run(
+        [sys.executable, '-m', 'tests.test_parsing_throughput', str(workers)], cwd=ROOT, check=True,
+        capture_output=True, text=True, env={**os.environ, 'PYTHONPATH': ROOT}).stdout
+    return {int(k): v for k, v in json.loads(output.strip().splitlines()[-1]).items()}
+
+
+class ParsingThroughputTest(unittest.TestCase):
+    """ Throughput of concurrent searches with and without the parsing workers (one per CPU). """
+
+    def test_throughput(self):
+        inline = _run(0)
+        pooled = _run(-1)
+        for concurrency in _CONCURRENCY:
+            print(f"\n{concurrency} concurrent searches: {inline[concurrency]:.0f} pages/s inline, "
+                  f"{pooled[concurrency]:.0f} pages/s with {os.cpu_count()} parsing workers", end='')
+        if (os.cpu_count() or 1) >= _MIN_CPUS:
+            self.assertGreater(pooled[_CONCURRENCY[-1]], inline[_CONCURRENCY[-1]] * _MIN_GAIN)
+
+
+if __name__ == '__main__':
+    print(json.dumps(_probe(int(sys.argv[1]))))
@@ -0,0 +1,29 @@
+import tempfile
+import unittest
+
+from iotech.configurator import Config
+
+from . import configure
+
+configure(cache_dir=tempfile.mkdtemp())
+
+from core.engine import configs  # noqa: E402
+from core.engine.scraping import parsing  # noqa: E402
+from .fixtures.extractors import configured  # noqa: E402
+
+
+class ParsingWorkersTest(unittest.TestCase):
+
+    def setUp(self):
+        configure(parse_workers=1, max_body_size=1234)
+        configs.ENGINE_PAGE_SIZE.set(7)
+        self.addCleanup(Config._local_values.clear)
+        self.addCleanup(configure)
+        self.addCleanup(parsing.shutdown)
+
+    def test_workers_share_the_runtime_configuration(self):
+        self.assertEqual(parsing.run(configured, 'page'), ('page', 1234, 7))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import time
+import unittest
+from unittest import mock
+
+from . import configure
+
+configure()
+
+from core.engine.popularity import QueryPopularity  # noqa: E402
+from core.engine.searcher import SearchEngine  # noqa: E402
+from core.engine.cache import ResultCache  # noqa: E402
+from core.engine.cache.results import make_key  # noqa: E402
+from core.engine.connectors.base import SearchResult  # noqa: E402
+
+
+class QueryPopularityTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1_000_000.
+        patcher = mock.patch('core.engine.popularity.time.time', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.popularity = QueryPopularity(half_life=3600)
+
+    def test_top_orders_by_decayed_score(self):
+        for _ in range(3):
+            self.popularity.hit(('old',))
+        self.now += 2 * 3600
+        self.popularity.hit(('new',))
+        self.popularity.hit(('new',))
+        self.assertEqual(self.popularity.top(2), [('new',), ('old',)])
+        self.assertEqual(self.popularity.top(1), [('new',)])
+
+    def test_min_score(self):
+        self.popularity.hit(('once',))
+        self.popularity.hit(('twice',))
+        self.popularity.hit(('twice',))
+        self.assertEqual(self.popularity.top(10, min_score=1.5), [('twice',)])
+
+    def test_drops_the_stale_keys(self):
+        self.popularity.hit(('stale',))
+        self.popularity.hit(('stale',))
+        self.now += 3 * 3600
+        self.assertEqual(self.popularity.top(10, min_score=1.5, hit_since=self.now - 3600), [])
+        # Dropped: a new hit starts over
+        self.popularity.hit(('stale',))
+        self.assertEqual(self.popularity.top(10, min_score=1.5, hit_since=self.now - 3600), [])
+
+    def test_hit_since(self):
+        for _ in range(10):
+            self.popularity.hit(('popular',))
+        self.now += 2 * 3600
+        self.assertEqual(self.popularity.top(10, min_score=1.5), [('popular',)])
+        self.assertEqual(self.popularity.top(10, min_score=1.5, hit_since=self.now - 3600), [])
+
+
+class PrewarmTest(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = SearchEngine.__new__(SearchEngine)
+        self.engine._popularity = QueryPopularity(half_life=3600)
+        self.searched = list()
+        self.engine._search_and_cache = lambda query, uid, filters: self.searched.append(query)
+
+    def test_prewarms_only_the_repeated_searches(self):
+        for query, hits in (('once', 1), ('twice', 2)):
+            for _ in range(hits):
+                self.engine._popularity.hit(make_key(query))
+        self.engine.prewarm()
+        self.assertEqual(self.searched, ['twice'])
+
+    def test_skips_the_fresh_results(self):
+        key = make_key('fresh')
+        self.engine._popularity.hit(key)
+        self.engine._popularity.hit(key)
+        ResultCache().set(key, SearchResult())
+        self.engine.prewarm()
+        self.assertEqual(self.searched, [])
+        # About to expire
+        ResultCache().set(key, SearchResult(), ttl=10)
+        self.engine.prewarm()
+        self.assertEqual(self.searched, ['fresh'])
+
+
+if __name__ == '__main__':
+    unittest.main()
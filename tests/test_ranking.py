@@ -0,0 +1,60 @@
+import unittest
+
+from . import configure
+
+configure()
+
+from core.engine import ranking  # noqa: E402
+from core.engine.connectors.base import SearchResult  # noqa: E402
+from core.engine.connectors.streamingcommunity.connector import StreamingCommunity  # noqa: E402
+
+
+class NormalizeTest(unittest.TestCase):
+
+    def test_folds_accents_punctuation_and_case(self):
+        self.assertEqual(ranking.normalize("Amélie: Le Fabuleux_Destin!"), 'amelie fabuleux destin')
+
+    def test_drops_the_articles(self):
+        self.assertEqual(ranking.normalize("L'ora legale"), 'ora legale')
+        # Unless nothing else is left
+        self.assertEqual(ranking.normalize("Il Lo"), 'il lo')
+        self.assertEqual(ranking.normalize(None), '')
+
+
+class RankTest(unittest.TestCase):
+
+    def test_trailing_year(self):
+        query = ranking.RankedQuery('dune 2021')
+        self.assertEqual((query.normalized, query.year), ('dune', 2021))
+        # Not a year of a single-token query, nor when given
+        self.assertEqual(ranking.RankedQuery('2012').normalized, '2012')
+        self.assertEqual(ranking.RankedQuery('dune 2021', year=1984).year, 1984)
+
+    def test_order(self):
+        titles = [ranking.RankedTitle(*t) for t in (
+            ('Dune', 1984), ('Dune', 2021), ('Dune: Part Two', 2024), ('Dunkirk', 2017), ('Blade Runner', 1982))]
+        scored = ranking.rank(ranking.RankedQuery('dune 2021'), titles, key=lambda t: t)
+        ranked = [(t.normalized, t.year) for _, t in scored]
+        self.assertEqual(ranked[:2], [('dune', 2021), ('dune', 1984)])
+        self.assertEqual(ranked[-1], ('blade runner', 1982))
+
+    def test_prefix_tokens(self):
+        query = ranking.RankedQuery('matr')
+        self.assertGreater(ranking.score(query, ranking.RankedTitle('The Matrix')),
+                           ranking.score(query, ranking.RankedTitle('Mad Max')))
+        self.assertEqual(ranking.score(ranking.RankedQuery(''), ranking.RankedTitle('The Matrix')), 0)
+
+    def test_ranked_result_pages(self):
+        result = SearchResult([StreamingCommunity(f"Show {i}") for i in range(5)],
+                              [StreamingCommunity('Show secondary')])
+        page = result.ranked('show 3', page=1, page_size=2)
+        self.assertEqual([x.query_title for x in page.main.values()], ['show 3', 'show 0'])
+        self.assertTrue(page.has_next)
+        last = result.ranked('show 3', page=3, page_size=2)
+        # Main results first
+        self.assertEqual([x.query_title for x in last.secondary.values()], ['show secondary'])
+        self.assertFalse(last.has_next)
+
+
+if __name__ == '__main__':
+    unittest.main()
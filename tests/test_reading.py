@@ -0,0 +1,68 @@
+import io
+import unittest
+
+import requests
+
+from . import configure
+
+configure(max_body_size=1024)
+
+from core.engine import scraping  # noqa: E402
+from core.engine.scraping import transfer  # noqa: E402
+
+
+def _response(body: bytes, **headers) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.headers.update(headers)
+    response.raw = io.BytesIO(body)
+    response.url = 'https://site.example/page'
+    return response
+
+
+class ReadTest(unittest.TestCase):
+
+    def setUp(self):
+        configure(max_body_size=1024)
+
+    def test_reads_within_the_cap(self):
+        self.assertEqual(scraping._read(_response(b'x' * 1024)).content, b'x' * 1024)
+
+    def test_declared_length_over_the_cap(self):
+        response = _response(b'', **{'Content-Length': '2048'})
+        with self.assertRaises(scraping.ResponseTooLarge):
+            scraping._read(response)
+
+    def test_streamed_body_over_the_cap(self):
+        with self.assertRaises(scraping.ResponseTooLarge):
+            scraping._read(_response(b'x' * 1025))
+        # A larger cap for the call
+        self.assertEqual(len(scraping._read(_response(b'x' * 2048), max_bytes=4096).content), 2048)
+
+    def test_accounts_the_transfer(self):
+        with transfer.account() as transfer_account, transfer.connector('fixture'):
+            scraping._read(_response(b'x' * 100))
+        self.assertEqual(transfer_account.decoded, {'fixture': 100})
+
+
+class DecodeTest(unittest.TestCase):
+
+    def test_encoding(self):
+        response = _response(b'', **{'Content-Type': 'text/html; charset="ISO-8859-1"'})
+        self.assertEqual(scraping.encoding_of(response), 'ISO-8859-1')
+        # The one expected for the site wins
+        self.assertEqual(scraping.encoding_of(response, 'windows-1252'), 'windows-1252')
+        self.assertEqual(scraping.encoding_of(_response(b'', **{'Content-Type': 'text/html'})), 'utf-8')
+
+    def test_decode(self):
+        body = 'Amélie'.encode('latin-1')
+        response = scraping._read(_response(body, **{'Content-Type': 'text/html; charset=latin-1'}))
+        self.assertEqual(scraping.decode(response), 'Amélie')
+        # Undecodable bytes are replaced, unknown charsets decoded as UTF-8
+        self.assertEqual(scraping.decode(scraping._read(_response(body))), 'Am�lie')
+        unknown = scraping._read(_response('Amélie'.encode(), **{'Content-Type': 'text/html; charset=nope'}))
+        self.assertEqual(scraping.decode(unknown), 'Amélie')
+
+
+if __name__ == '__main__':
+    unittest.main()
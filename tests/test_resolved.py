@@ -0,0 +1,107 @@
+import asyncio
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from . import configure
+
+configure(cache_dir=tempfile.mkdtemp(), http_cache='false', warmup='false')
+
+from core.engine.cache import ResolvedCache  # noqa: E402
+from core.engine.cache.resolved import parse_expiry  # noqa: E402
+from core.engine.connectors.stagatv.lib import SeriesSeasonEpisode  # noqa: E402
+from core.engine.connectors.stagatv.series_episode import StagaTV_SeriesEpisode  # noqa: E402
+from core.engine.searcher import SearchEngine  # noqa: E402
+
+_PAGE = 'https://stagatv.example/show-1x01/'
+
+
+class ParseExpiryTest(unittest.TestCase):
+
+    def test_query_expiry(self):
+        self.assertEqual(parse_expiry('https://cdn.example/v.mp4?token=abc&expires=1700000000'), 1700000000.)
+        self.assertEqual(parse_expiry('https://cdn.example/v.mp4?e=1700000000123'), 1700000000.123)
+
+    def test_path_token(self):
+        self.assertEqual(parse_expiry('https://cdn.example/hls/exp=1700000000~acl=/*~hmac=ff/v.m3u8'), 1700000000.)
+
+    def test_amazon_signature(self):
+        url = 'https://s3.example/v.mp4?X-Amz-Date=20231114T221320Z&X-Amz-Expires=3600&X-Amz-Signature=ff'
+        self.assertEqual(parse_expiry(url), 1700000000. + 3600)
+
+    def test_unsigned(self):
+        self.assertIsNone(parse_expiry('https://cdn.example/v.mp4'))
+        # Ids are not expiries
+        self.assertIsNone(parse_expiry('https://cdn.example/v.mp4?id=1700000000'))
+
+
+class ResolvedCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        configure(cache_dir=tempfile.mkdtemp())
+        # A fresh cache in the new directory
+        ResolvedCache._instance = ResolvedCache._cls()
+        self.cache = ResolvedCache()
+
+    def test_get_many_in_order(self):
+        self.cache.set_many('uid', [
+            (dict(page='a'), dict(url='a'), dict(file_url='/a.mp4'), 'https://cdn.example/a.mp4'),
+            (dict(page='b'), dict(url='b'), dict(file_url='/b.mp4'), 'https://cdn.example/b.mp4'),
+        ])
+        values = self.cache.get_many('uid', [dict(page='b'), dict(page='missing'), dict(page='a')])
+        self.assertEqual(values, [dict(file_url='/b.mp4'), None, dict(file_url='/a.mp4')])
+        self.assertEqual(self.cache.get('other', dict(page='a')), None)
+
+    def test_expiring_entries_are_not_served(self):
+        soon = int(time.time()) + 60
+        self.cache.set('uid', dict(page='a'), dict(url='a'), dict(file_url='/a.mp4'),
+                       f"https://cdn.example/a.mp4?expires={soon}")
+        # Within resolved_margin of the expiry
+        self.assertIsNone(self.cache.get('uid', dict(page='a')))
+        self.assertEqual([e.arguments for e in self.cache.due(soon, 0)], [dict(url='a')])
+
+
+class DeferredKeyTest(unittest.TestCase):
+
+    def setUp(self):
+        configure(cache_dir=tempfile.mkdtemp())
+        ResolvedCache._instance = ResolvedCache._cls()
+        self.uid = StagaTV_SeriesEpisode.uid()
+        patchers = [
+            mock.patch.object(StagaTV_SeriesEpisode, 'deferred_items', return_value={'1x01': dict(url=_PAGE)}),
+            mock.patch.object(StagaTV_SeriesEpisode, 'execute_deferred', mock.AsyncMock(
+                return_value=dict(file_url='/show-1x01.mp4'))),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_player_reuses_the_batch(self):
+        results = asyncio.run(SearchEngine.defer_batch(
+            self.uid, url='https://stagatv.example/show/', full_title='Show'))
+        self.assertEqual(results, {'1x01': dict(file_url='/show-1x01.mp4')})
+        # The player carries the episode page and the scraped file URL
+        value = asyncio.run(SearchEngine.defer(
+            self.uid, url=SeriesSeasonEpisode.files_dl_base_url + 'files/1', page=_PAGE, data=dict(token='t'),
+            title='Show', details='1x01'))
+        self.assertEqual(value, dict(file_url='/show-1x01.mp4'))
+        self.assertEqual(StagaTV_SeriesEpisode.execute_deferred.await_count, 1)
+
+    def test_batch_reuses_the_player(self):
+        asyncio.run(SearchEngine.defer(self.uid, url='files/1', page=_PAGE, data=dict(token='t'), title='Show'))
+        asyncio.run(SearchEngine.defer_batch(self.uid, url='https://stagatv.example/show/', full_title='Show'))
+        self.assertEqual(StagaTV_SeriesEpisode.execute_deferred.await_count, 1)
+
+    def test_revalidation_resolves_the_expiring_entries(self):
+        soon = int(time.time()) + 60
+        ResolvedCache().set(self.uid, dict(page=_PAGE), dict(url=_PAGE), dict(file_url='/old.mp4'),
+                            f"https://cdn.example/old.mp4?expires={soon}")
+        engine = SearchEngine.__new__(SearchEngine)
+        asyncio.run(engine.revalidate_resolved())
+        StagaTV_SeriesEpisode.execute_deferred.assert_awaited_once_with(url=_PAGE)
+        self.assertEqual(ResolvedCache().get(self.uid, dict(page=_PAGE)), dict(file_url='/show-1x01.mp4'))
+
+
+if __name__ == '__main__':
+    unittest.main()
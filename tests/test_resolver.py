@@ -0,0 +1,104 @@
+import socket
+import unittest
+from unittest import mock
+
+from . import configure
+
+configure(dns_ttl=60, dns_min_ttl=30)
+
+from core.engine.scraping import resolver  # noqa: E402
+from core.engine.scraping.resolver import DnsCache  # noqa: E402
+
+_V4 = (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('192.0.2.1', 443))
+_V4_OTHER = (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('192.0.2.2', 443))
+_V6 = (socket.AF_INET6, socket.SOCK_STREAM, 6, '', ('2001:db8::1', 443, 0, 0))
+
+
+class DnsCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        configure(dns_ttl=60, dns_min_ttl=30)
+        self.cache = DnsCache._cls()
+        self.lookups = mock.Mock(return_value=[_V4])
+        patches = (mock.patch.object(resolver.socket, 'getaddrinfo', self.lookups),
+                   mock.patch.object(resolver, '_refresher'),
+                   mock.patch.object(resolver, 'dns', None))
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _age(self, seconds: float):
+        for entry in self.cache._entries.values():
+            entry.resolved_at -= seconds
+
+    def test_cached(self):
+        self.assertEqual(self.cache.getaddrinfo('site.example', 443), [_V4])
+        self.assertEqual(self.cache.getaddrinfo('site.example', 443), [_V4])
+        self.assertEqual(self.lookups.call_count, 1)
+        resolver._refresher.submit.assert_not_called()
+
+    def test_ttl_floor(self):
+        configure(dns_ttl=5)
+        self.cache.getaddrinfo('site.example', 443)
+        self.assertEqual(self.cache._entries[('site.example', 443, socket.AF_UNSPEC)].ttl, 30)
+
+    def test_refreshed_ahead(self):
+        self.cache.getaddrinfo('site.example', 443)
+        self._age(50)
+        self.assertEqual(self.cache.getaddrinfo('site.example', 443), [_V4])
+        self.assertEqual(self.cache.getaddrinfo('site.example', 443), [_V4])
+        # Stale while refreshed, once
+        self.assertEqual(self.lookups.call_count, 1)
+        self.assertEqual(resolver._refresher.submit.call_count, 1)
+        self.lookups.return_value = [_V4_OTHER]
+        self.cache._refresh(*resolver._refresher.submit.call_args.args[1:])
+        self.assertEqual(self.cache.getaddrinfo('site.example', 443), [_V4_OTHER])
+
+    def test_failed_refresh_retried(self):
+        self.cache.getaddrinfo('site.example', 443)
+        self._age(50)
+        self.cache.getaddrinfo('site.example', 443)
+        self.lookups.side_effect = OSError('unreachable')
+        self.cache._refresh(*resolver._refresher.submit.call_args.args[1:])
+        self.cache.getaddrinfo('site.example', 443)
+        self.assertEqual(resolver._refresher.submit.call_count, 2)
+
+    def test_expired(self):
+        self.cache.getaddrinfo('site.example', 443)
+        self._age(120)
+        self.lookups.return_value = [_V4_OTHER]
+        self.assertEqual(self.cache.getaddrinfo('site.example', 443), [_V4_OTHER])
+        self.assertEqual(self.lookups.call_count, 2)
+
+    def test_ip_not_cached(self):
+        self.cache.getaddrinfo('192.0.2.1', 443)
+        self.cache.getaddrinfo('192.0.2.1', 443)
+        self.assertEqual(self.lookups.call_count, 2)
+        self.assertEqual(self.cache._entries, {})
+
+
+class InterleaveTest(unittest.TestCase):
+
+    def test_alternates_the_families(self):
+        self.assertEqual(resolver._interleave([_V6, _V4, _V4_OTHER]), [_V6, _V4, _V4_OTHER])
+        self.assertEqual(resolver._interleave([_V4, _V4_OTHER, _V6]), [_V4, _V6, _V4_OTHER])
+        self.assertEqual(resolver._interleave([]), [])
+
+
+class CreateConnectionTest(unittest.TestCase):
+
+    def test_falls_back_to_the_next_address(self):
+        with socket.socket() as server, socket.socket() as closed:
+            server.bind(('127.0.0.1', 0))
+            server.listen()
+            closed.bind(('127.0.0.1', 0))
+            port = server.getsockname()[1]
+            addresses = [(socket.AF_INET, socket.SOCK_STREAM, 6, '', closed.getsockname()),
+                         (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', port))]
+            with mock.patch.object(DnsCache(), 'getaddrinfo', return_value=addresses):
+                with resolver.create_connection(('localhost', port), timeout=2) as sock:
+                    self.assertEqual(sock.getpeername()[1], port)
+
+
+if __name__ == '__main__':
+    unittest.main()
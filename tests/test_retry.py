@@ -0,0 +1,85 @@
+import asyncio
+import io
+import unittest
+from unittest import mock
+
+import requests
+
+from . import configure
+
+configure()
+
+from core.engine.budget import SearchBudget  # noqa: E402
+from core.engine.scraping.retry import RetryPolicy, RetryBudget  # noqa: E402
+
+_URL = 'https://site.example/page'
+
+
+def _response(status: int, **headers) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers)
+    response.raw = io.BytesIO()
+    return response
+
+
+class RetryPolicyTest(unittest.TestCase):
+
+    def setUp(self):
+        RetryBudget._instance = None
+        patchers = [mock.patch('core.engine.scraping.retry.time.sleep'),
+                    # The full backoff, without jitter
+                    mock.patch('core.engine.scraping.retry.random.uniform', lambda low, high: high)]
+        self.sleep = patchers[0].start()
+        patchers[1].start()
+        for patcher in patchers:
+            self.addCleanup(patcher.stop)
+        self.policy = RetryPolicy(retries=4, backoff=1, max_backoff=4)
+
+    def test_retries_the_transient_failures(self):
+        send = mock.Mock(side_effect=[requests.ConnectionError(), _response(503), _response(200)])
+        self.assertEqual(self.policy.call('GET', _URL, send).status_code, 200)
+        self.assertEqual([c.args[0] for c in self.sleep.call_args_list], [1, 2])
+
+    def test_not_idempotent(self):
+        send = mock.Mock(side_effect=requests.ConnectionError())
+        with self.assertRaises(requests.ConnectionError):
+            self.policy.call('POST', _URL, send)
+        self.assertEqual(send.call_count, 1)
+
+    def test_retry_after(self):
+        send = mock.Mock(side_effect=[_response(429, **{'Retry-After': '3'}), _response(200)])
+        self.policy = RetryPolicy(retries=4, backoff=0.5, max_backoff=4)
+        self.policy.call('GET', _URL, send)
+        self.sleep.assert_called_once_with(3.)
+
+    def test_search_budget_bounds_the_backoff(self):
+        send = mock.Mock(side_effect=requests.ConnectionError())
+        with SearchBudget(max_backoff=3.5).applied(), self.assertRaises(requests.ConnectionError):
+            self.policy.call('GET', _URL, send)
+        # 1 + 2 seconds, the next 4 exceed the budget
+        self.assertEqual(sum(c.args[0] for c in self.sleep.call_args_list), 3)
+        self.assertEqual(send.call_count, 3)
+
+    def test_global_budget(self):
+        configure(retry_budget_reserve=1, retry_budget_ratio=0)
+        self.addCleanup(configure)
+        RetryBudget._instance = None
+        send = mock.Mock(side_effect=requests.ConnectionError())
+        with self.assertRaises(requests.ConnectionError):
+            self.policy.call('GET', _URL, send)
+        self.assertEqual(send.call_count, 2)
+
+    def test_async(self):
+        async def send():
+            return next(responses)
+        responses = iter([_response(502), _response(200)])
+        with mock.patch('core.engine.scraping.retry.asyncio.sleep', mock.AsyncMock()) as sleep:
+            response = asyncio.run(self.policy.acall('GET', _URL, send))
+        self.assertEqual(response.status_code, 200)
+        sleep.assert_awaited_once_with(1)
+        self.sleep.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import threading
+import time
+import unittest
+
+from . import configure
+
+configure(max_connections=1, background_share=0.5)
+
+from core.engine.scraping import scheduler  # noqa: E402
+from core.engine.scraping.scheduler import RequestScheduler, ContextExecutor, scheduling  # noqa: E402
+from core.engine.scraping.scheduler import INTERACTIVE, BACKGROUND  # noqa: E402
+
+
+class RequestSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        configure(max_connections=1, background_share=0.5)
+        self.scheduler = RequestScheduler._cls()
+        self.granted = list()
+        self.threads = list()
+
+    def tearDown(self):
+        for thread in self.threads:
+            thread.join()
+
+    def _queued(self) -> int:
+        with self.scheduler._condition:
+            return sum(len(q) for queues in self.scheduler._queues.values() for q in queues.values())
+
+    def _send(self, label: str, priority: int, client, hold: threading.Event = None):
+        """ Send a request from a thread, once the previous ones are queued. """
+        def _request():
+            self.granted.append(label)
+            if hold:
+                hold.wait()
+
+        def _run():
+            with scheduling(priority, client):
+                self.scheduler.send(_request)
+
+        queued = self._queued()
+        thread = threading.Thread(target=_run)
+        self.threads.append(thread)
+        thread.start()
+        while self._queued() == queued and not (hold and label in self.granted):
+            time.sleep(0.001)
+
+    def test_round_robin_between_the_clients(self):
+        hold = threading.Event()
+        self._send('first', INTERACTIVE, 'a', hold)
+        for label, client in (('a1', 'a'), ('a2', 'a'), ('a3', 'a'), ('b1', 'b'), ('c1', 'c')):
+            self._send(label, INTERACTIVE, client)
+        hold.set()
+        self.tearDown()
+        self.assertEqual(self.granted, ['first', 'a1', 'b1', 'c1', 'a2', 'a3'])
+
+    def test_interactive_first(self):
+        hold = threading.Event()
+        self._send('first', BACKGROUND, 'prewarm', hold)
+        self._send('background', BACKGROUND, 'prewarm')
+        self._send('interactive', INTERACTIVE, 'search')
+        hold.set()
+        self.tearDown()
+        self.assertEqual(self.granted, ['first', 'interactive', 'background'])
+
+    def test_background_share(self):
+        configure(max_connections=4)
+        holds = [threading.Event() for _ in range(2)]
+        for i, hold in enumerate(holds):
+            self._send(f"background {i}", BACKGROUND, 'sync', hold)
+        # Half of the budget
+        self._send('background 2', BACKGROUND, 'sync')
+        self._send('interactive', INTERACTIVE, 'search', holds[0])
+        self.assertEqual(self.granted, ['background 0', 'background 1', 'interactive'])
+        for hold in holds:
+            hold.set()
+        self.tearDown()
+        self.assertEqual(self.granted[-1], 'background 2')
+
+
+class SchedulingTest(unittest.TestCase):
+
+    def test_context(self):
+        with scheduling(BACKGROUND, 'sync'):
+            self.assertEqual((scheduler._priority.get(), scheduler._client.get()), (BACKGROUND, 'sync'))
+            # Kept by the tasks of the context executors
+            with ContextExecutor(max_workers=1) as executor:
+                self.assertEqual(executor.submit(scheduler._priority.get).result(), BACKGROUND)
+        self.assertEqual(scheduler._priority.get(), INTERACTIVE)
+        with scheduling(INTERACTIVE):
+            first = scheduler._client.get()
+        with scheduling(INTERACTIVE):
+            self.assertNotEqual(scheduler._client.get(), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
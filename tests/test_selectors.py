@@ -0,0 +1,160 @@
+import gc
+import re
+import time
+import unittest
+
+import bs4
+
+from .fixtures import dailyflix, stagatv, supervideo
+
+# Rows of the benchmark StagaTV series list and DailyFlix results
+_LIST_SERIES = 600
+_LIST_SEASONS = 5
+_RESULT_ROWS = 200
+
+
+def _best_time(function, *args, rounds: int = 5) -> float:
+    """ Best time of a few calls of a function, in ms, without the collections of the previous calls' trees. """
+    timings = list()
+    for _ in range(rounds):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            function(*args)
+            timings.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return min(timings) * 1000
+
+
+# Find chains the extraction specs replaced, as references of their records and timings
+
+def _find_series_list(markup: str) -> list:
+    soup = bs4.BeautifulSoup(markup)
+    return [dict(text=li.text, full_title=li.find('a').text, url=li.find('a')['href'])
+            for li in soup.find('div', {'class': 'soralist'}).findAll('li')]
+
+
+def _find_series(markup: str, full_title: str) -> dict:
+    soup = bs4.BeautifulSoup(markup)
+    image = soup.find('img', {'class': 'ts-post-image', 'alt': full_title})
+    time_tag = soup.find('time', {'itemprop': 'dateCreated'})
+    gallery_image = soup.find('div', {'class': 'gallery_img'})
+    box = soup.find('div', {'class': 'bixbox ts-ep-list'})
+    spans = [s.text for s in box.find_all('span', {'class': 'ts-chl-collapsible'})]
+    divs = [d.find('div', 'epsdlist') for d in box.find_all('div', {'class': 'ts-chl-collapsible-content'})]
+    episodes = [(season_string, li.find('a')['href'], li.find('div', {'class': 'epl-num'}).text)
+                for season_string, episode_list in zip(spans, divs) for li in episode_list.find_all('li')]
+    return dict(image_url=image['src'], year=time_tag['datetime'][:4], poster_url=gallery_image.find('a')['href'],
+                episodes=episodes)
+
+
+def _find_player(markup: str) -> dict:
+    soup = bs4.BeautifulSoup(markup)
+    return dict(
+        data_target=[t['data-target'] for t in soup.findAll(
+            lambda tag: tag.name in ('a', 'li') and tag.get('data-target') and 'supervideo.tv' in tag['data-target'])],
+        data_link=[t['data-link'] for t in soup.findAll(
+            lambda tag: tag.name in ('a', 'li') and tag.get('data-link') and 'supervideo.tv' in tag['data-link'])],
+        iframes=[t['src'] for t in soup.findAll(lambda tag: tag.name == 'iframe' and tag.get('src'))])
+
+
+def _find_item_details(markup: str) -> dict:
+    soup = bs4.BeautifulSoup(markup)
+    details = {}
+    for li in soup.find('ul', {'id': 'details'}).find_all('li'):
+        key = li.find('label').text.split(':')[0].strip()
+        span = li.find('span')
+        if span:
+            value = [a.text for a in span.find_all('a')] if span['id'] == 'staring' else span.attrs['data-value']
+        else:
+            a = li.find('a')
+            value = a.text if a else int(li.text.split('\n')[-1])
+        details[key] = value
+    return details
+
+
+def _find_rows(markup: str) -> list:
+    soup = bs4.BeautifulSoup(markup)
+    return [dict(title=tr.find('a').text, href=tr.find('a')['href'])
+            for tr in soup.find('table', {'class': 'table'}).find_all('tr')]
+
+
+def _find_details(markup: str) -> dict:
+    soup = bs4.BeautifulSoup(markup)
+    return dict(
+        file_url=soup.find('iframe')['src'],
+        breadcrumbs=[a.text for a in soup.findAll(
+            lambda tag: tag.name == 'a' and 'rel' in tag.attrs and 'tag' in tag.attrs['rel'])],
+        image_url=soup.findAll(
+            lambda tag: tag.name == 'img' and tag.get('aria-label', '').startswith('Poster'))[0]['src'])
+
+
+class ExtractionSpecsTest(unittest.TestCase):
+    """
+    Records and timings of the connectors' extraction routines on fixture pages, against the find chains they
+    replaced; the timings are printed, and a routine must not be slower than its find chain.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        from . import configure
+        configure()
+        from core.engine.connectors.stagatv import lib
+        from core.engine.connectors.supervideo import connector as supervideo_connector
+        from core.engine.connectors.supervideo.altadefinizione import connector as altadefinizione_connector
+        from core.engine.connectors.dailyflix.main_dailyflix import connector as dailyflix_connector
+        cls.lib = lib
+        cls.supervideo = supervideo_connector
+        cls.altadefinizione = altadefinizione_connector
+        cls.dailyflix = dailyflix_connector
+
+    def _compare(self, name: str, extract, find, *args):
+        extract_ms = _best_time(extract, *args)
+        find_ms = _best_time(find, *args)
+        print(f"\n{name}: {extract_ms:.1f} ms (find chains {find_ms:.1f} ms)", end='')
+        self.assertLess(extract_ms, find_ms * 1.1)
+
+    def test_stagatv_series_list(self):
+        markup = stagatv.series_list('https://stagatv.test', _LIST_SERIES, _LIST_SEASONS).decode()
+        records = self.lib._extract_series_list(markup)
+        self.assertEqual(records, _find_series_list(markup))
+        self._compare('stagatv series list', self.lib._extract_series_list, _find_series_list, markup)
+
+    def test_stagatv_series(self):
+        markup = stagatv.series_page(3, 2, 30).decode()
+        full_title = "Fixture Show 3 (S02)"
+        details = self.lib._extract_series(markup, full_title)
+        reference = _find_series(markup, full_title)
+        self.assertEqual(details['image_url'], reference['image_url'])
+        self.assertEqual(str(details['year']), reference['year'])
+        self.assertEqual(details['poster_url'], reference['poster_url'])
+        self.assertEqual([(e.season_number, e.episode_number, e.url) for e in details['episodes']],
+                         [(int(re.search(r'\d+', season)[0]), int(number.split('EP')[1]), url)
+                          for season, url, number in reference['episodes']])
+        self._compare('stagatv series', self.lib._extract_series, _find_series, markup, full_title)
+
+    def test_supervideo_player(self):
+        markup = supervideo.player_page().decode()
+        self.assertEqual(self.supervideo._extract_player(markup), _find_player(markup))
+        self._compare('supervideo player', self.supervideo._extract_player, _find_player, markup)
+
+    def test_altadefinizione_details(self):
+        markup = supervideo.details_page().decode()
+        self.assertEqual(self.altadefinizione._extract_details(markup), _find_item_details(markup))
+        self._compare('altadefinizione details', self.altadefinizione._extract_details, _find_item_details, markup)
+
+    def test_dailyflix_rows(self):
+        markup = dailyflix.results_page('https://dailyflix.test', _RESULT_ROWS).decode()
+        self.assertEqual(self.dailyflix._extract_rows(markup), _find_rows(markup))
+        self._compare('dailyflix rows', self.dailyflix._extract_rows, _find_rows, markup)
+
+    def test_dailyflix_details(self):
+        markup = dailyflix.details_page(7).decode()
+        self.assertEqual(self.dailyflix._extract_details(markup), _find_details(markup))
+        self._compare('dailyflix details', self.dailyflix._extract_details, _find_details, markup)
+
+
+if __name__ == '__main__':
+    unittest.main()
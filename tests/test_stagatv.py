@@ -0,0 +1,67 @@
+import tempfile
+import unittest
+
+from . import configure
+
+configure(cache_dir=tempfile.mkdtemp(), http_cache='false', warmup='false', parse_workers=0)
+
+from core.engine.connectors.stagatv.lib import Series, SeriesSeasonEpisode  # noqa: E402
+from core.engine.connectors.stagatv.series_episode import StagaTV_SeriesEpisode  # noqa: E402
+from core.engine.connectors.stagatv.series_season import StagaTV_SeriesSeason  # noqa: E402
+from .fixtures import FixtureSite, stagatv  # noqa: E402
+
+
+class SeriesSeasonEpisodeTest(unittest.TestCase):
+
+    def test_from_record(self):
+        episode = SeriesSeasonEpisode.from_record('Show (S02)', 'Season 2', {'url': '/ep/', 'number': 'S2 EP7'})
+        self.assertEqual((episode.clean_title, episode.season_number, episode.episode_number, episode.url),
+                         ('Show', 2, 7, '/ep/'))
+        self.assertEqual(episode.title, 'Show (S2 E07)')
+
+    def test_from_record_without_numbers(self):
+        episode = SeriesSeasonEpisode.from_record('Show', 'Specials', {'url': '/ep/', 'number': 'Pilot'})
+        self.assertEqual((episode.season_number, episode.episode_number), (None, None))
+
+
+class SeriesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.series = Series('Show (S01)', '/series/show/')
+        self.series.episodes = [SeriesSeasonEpisode('Show', s, e, f"/ep/{s}-{e}/") for s, e in
+                                ((2, 1), (2, 2), (1, 1), (None, 1))]
+
+    def test_get_seasons(self):
+        self.assertEqual(list(self.series.get_seasons().items()), [(2, 2), (1, 1), (None, 1)])
+
+    def test_get_season_episodes(self):
+        self.assertEqual([e.url for e in self.series.get_season_episodes(2)], ['/ep/2-1/', '/ep/2-2/'])
+        self.assertEqual([e.url for e in self.series.get_season_episodes(None)], ['/ep/None-1/'])
+
+
+class SeasonsTest(unittest.TestCase):
+
+    def setUp(self):
+        configure(cache_dir=tempfile.mkdtemp(), http_cache='false', warmup='false', parse_workers=0)
+        self.site = FixtureSite()
+        self.site.__enter__()
+        self.addCleanup(self.site.__exit__)
+        self.site.pages.update(stagatv.site_pages(self.site.base_url, 2, 2, 3))
+        self.base_url = Series._base_url_
+        Series._base_url_ = self.site.base_url
+        self.addCleanup(setattr, Series, '_base_url_', self.base_url)
+
+    def test_search_lists_the_seasons(self):
+        result = StagaTV_SeriesSeason.search('fixture show 1')
+        self.assertEqual(sorted(item.query_title for item in result.main.values()),
+                         ['fixture show 1 s1 (3 episodes)', 'fixture show 1 s2 (3 episodes)'])
+
+    def test_expand_lists_the_episodes(self):
+        result = StagaTV_SeriesEpisode.expand(f"{self.site.base_url}/series/0-2/", 'Fixture Show 0 (S02)', season=2)
+        episodes = list(result.main.values())
+        self.assertEqual([item.url for item in episodes], [f"/episodes/0-2-{e}/" for e in range(1, 4)])
+        self.assertEqual(episodes[0].get_content()['season']['season'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
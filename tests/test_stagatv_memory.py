@@ -0,0 +1,55 @@
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from . import ROOT
+
+# Size of the search: series matching the query, seasons of each, episodes of each season
+_SERIES = 20
+_SEASONS = 5
+_EPISODES = 30
+# Budget of the peak RSS growth of the search, in MB: about 70 with the trees released, over 300 if they are kept
+_PEAK_RSS_BUDGET = 150
+
+
+def _probe() -> dict:
+    """ Run a large StagaTV search over the fixture site, and measure the peak RSS of the process around it. """
+    from . import configure
+    # Few concurrent fetches, so that the pages parsed at once do not weigh on the peak
+    configure(cache_dir=tempfile.mkdtemp(), http_cache='false', warmup='false', parse_workers=0,
+              host_concurrency=2, host_concurrency_max=2)
+    from .fixtures import FixtureSite
+    from .fixtures import stagatv
+    from core.engine.connectors.stagatv.lib import Series
+    from core.engine.connectors.stagatv.series_season import StagaTV_SeriesSeason
+    with FixtureSite() as site:
+        site.pages.update(stagatv.site_pages(site.base_url, _SERIES, _SEASONS, _EPISODES))
+        Series._base_url_ = site.base_url
+        # Warm the imports and the site list before the baseline
+        Series.get_all('')
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        result = StagaTV_SeriesSeason.search('fixture show')
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return dict(results=len(result.main) + len(result.secondary), growth_mb=(peak - baseline) / 1024)
+
+
+class StagaTVMemoryTest(unittest.TestCase):
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "ru_maxrss is measured in KB on Linux only")
+    def test_search_peak_rss(self):
+        # A fresh process, so that the peak is not the one of the previous tests
+        output = subprocess.run(
+            [sys.executable, '-m', 'tests.test_stagatv_memory'], cwd=ROOT, check=True,
+            capture_output=True, text=True, env={**os.environ, 'PYTHONPATH': ROOT}).stdout
+        probe = json.loads(output.strip().splitlines()[-1])
+        self.assertEqual(probe['results'], _SERIES * _SEASONS)
+        self.assertLess(probe['growth_mb'], _PEAK_RSS_BUDGET,
+                        f"Peak RSS of the search grew by {probe['growth_mb']:.1f} MB")
+
+
+if __name__ == '__main__':
+    print(json.dumps(_probe()))
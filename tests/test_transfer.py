@@ -0,0 +1,71 @@
+import gzip
+import io
+import unittest
+from unittest import mock
+
+import requests
+import urllib3
+
+from . import configure
+
+configure()
+
+from core.engine.scraping import transfer  # noqa: E402
+
+_BODY = b'transferred body ' * 64
+
+
+def _response(body: bytes, encoding: str) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Content-Encoding'] = encoding
+    response.raw = urllib3.HTTPResponse(io.BytesIO(body), headers={'Content-Encoding': encoding},
+                                        preload_content=False)
+    return response
+
+
+class EncodingTest(unittest.TestCase):
+
+    def test_accept_encoding(self):
+        with mock.patch.object(transfer, 'zstandard', mock.Mock()), \
+                mock.patch.object(urllib3.response, 'brotli', mock.Mock()):
+            self.assertEqual(transfer.accept_encoding(), 'zstd, br, gzip, deflate')
+            self.assertEqual(transfer.accept_encoding(zstd=False), 'br, gzip, deflate')
+        with mock.patch.object(transfer, 'zstandard', None), mock.patch.object(urllib3.response, 'brotli', None):
+            self.assertEqual(transfer.accept_encoding(), 'gzip, deflate')
+
+    def test_decodes_gzip(self):
+        compressed = gzip.compress(_BODY)
+        response = _response(compressed, 'gzip')
+        self.assertEqual(b''.join(transfer.decode_stream(response, 128)), _BODY)
+        self.assertEqual(transfer.wire_size(response, len(_BODY)), len(compressed))
+
+    def test_decodes_zstd(self):
+        zstandard = mock.Mock()
+        zstandard.ZstdDecompressor.return_value.decompressobj.return_value.decompress = bytes.upper
+        with mock.patch.object(transfer, 'zstandard', zstandard):
+            response = _response(_BODY, 'zstd')
+            self.assertEqual(b''.join(transfer.decode_stream(response, 128)), _BODY.upper())
+
+    def test_wire_size_without_raw_position(self):
+        response = requests.Response()
+        response.raw = object()
+        self.assertEqual(transfer.wire_size(response, 42), 42)
+
+
+class AccountTest(unittest.TestCase):
+
+    def test_by_connector(self):
+        with transfer.account() as transfer_account:
+            with transfer.connector('first'):
+                transfer.record(10, 30)
+                transfer.record(5, 5)
+            with transfer.connector('second'):
+                transfer.record(1, 2)
+        transfer.record(100, 100)
+        self.assertEqual(transfer_account.wire, {'first': 15, 'second': 1})
+        self.assertEqual(transfer_account.decoded, {'first': 35, 'second': 2})
+
+
+if __name__ == '__main__':
+    unittest.main()
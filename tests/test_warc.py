@@ -0,0 +1,69 @@
+import tempfile
+import unittest
+from unittest import mock
+
+import urllib3
+
+from . import configure
+
+configure(cache_dir=tempfile.mkdtemp(), http_cache='false', retries=0)
+
+from core.engine import scraping  # noqa: E402
+from core.engine.scraping import warc, transfer  # noqa: E402
+from core.engine.scraping.limits import HostLimits  # noqa: E402
+from .fixtures import FixtureSite  # noqa: E402
+
+_PAGE = b'<html><body>' + b'<p>fixture</p>' * 1000 + b'</body></html>'
+
+
+class WarcTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        warc._writer, warc._archive = None, None
+        self.addCleanup(configure, warc_mode='', warc_bypass='false')
+
+    def _record(self, site: FixtureSite, path: str, **kwargs):
+        configure(warc_mode=warc.RECORD, warc_dir=self.directory)
+        return scraping.get(f"{site.base_url}{path}", cloud=False, **kwargs)
+
+    def _replay(self, url: str, bypass: bool = False):
+        configure(warc_mode=warc.REPLAY, warc_dir=self.directory, warc_bypass=str(bypass).lower())
+        warc._archive = None
+        return scraping.get(url, cloud=False)
+
+    def test_record_and_replay(self):
+        with FixtureSite({'/page': _PAGE}) as site:
+            url = f"{site.base_url}/page"
+            with transfer.account() as transfer_account:
+                response = self._record(site, '/page')
+        # The recorder leaves the wire stream to the capped read
+        self.assertIsInstance(response.raw, urllib3.HTTPResponse)
+        self.assertEqual(sum(transfer_account.wire.values()), len(_PAGE))
+        self.assertEqual(response.content, _PAGE)
+        # The site is down: served from the archive, through the limits of the hosts
+        with mock.patch.object(HostLimits(), 'send', wraps=HostLimits().send) as send:
+            self.assertEqual(self._replay(url).content, _PAGE)
+        self.assertEqual(send.call_count, 1)
+
+    def test_bypass(self):
+        with FixtureSite({'/page': _PAGE}) as site:
+            url = f"{site.base_url}/page"
+            self._record(site, '/page')
+        with mock.patch.object(HostLimits(), 'send') as send:
+            self.assertEqual(self._replay(url, bypass=True).content, _PAGE)
+        send.assert_not_called()
+
+    def test_oversized_pages_are_not_archived(self):
+        with FixtureSite({'/page': _PAGE, '/small': b'small'}) as site:
+            with self.assertRaises(scraping.ResponseTooLarge):
+                self._record(site, '/page', max_bytes=1024)
+            self._record(site, '/small')
+            url = site.base_url
+        archive = warc.WarcArchive(self.directory)
+        self.assertIsNone(archive.get('GET', f"{url}/page", None))
+        self.assertIsNotNone(archive.get('GET', f"{url}/small", None))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import socket
+import tempfile
+import unittest
+
+from . import configure
+
+configure(cache_dir=tempfile.mkdtemp(), http_cache='false', retries=0)
+
+from core.engine import warmup  # noqa: E402
+from .fixtures import FixtureSite  # noqa: E402
+
+
+def _connector(uid: str, url: str):
+    return type(uid, (), dict(uid=classmethod(lambda cls: uid), site_url=classmethod(lambda cls: url)))
+
+
+def _dead_url() -> str:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return f"http://127.0.0.1:{s.getsockname()[1]}"
+
+
+class WarmUpTest(unittest.TestCase):
+
+    def test_states(self):
+        dead_url = _dead_url()
+        with FixtureSite({'/': b'home'}) as site:
+            connectors = [_connector('a', site.base_url), _connector('b', site.base_url), _connector('c', dead_url),
+                          _connector('no_site', None)]
+            warm_up = warmup.WarmUp(connectors)
+            self.assertEqual(warm_up.states, dict(a=warmup.PENDING, b=warmup.PENDING, c=warmup.PENDING))
+            self.assertFalse(warm_up.is_ready)
+            with self.assertLogs('core.engine.warmup', 'WARNING'):
+                warm_up.run()
+            # One warm-up per site
+            self.assertEqual(site.requests, 1)
+        self.assertEqual(warm_up.states, dict(a=warmup.READY, b=warmup.READY, c=warmup.FAILED))
+        self.assertTrue(warm_up.is_ready)
+
+    def test_nothing_to_warm_up(self):
+        warm_up = warmup.WarmUp([])
+        warm_up.run()
+        self.assertTrue(warm_up.is_ready)
+
+
+if __name__ == '__main__':
+    unittest.main()